@@ -0,0 +1,310 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import re
+import tempfile
+import time
+from pathlib import Path
+import helpers_generic
+import helpers_dcs
+import synthetic_dcs
+import fprintdcs
+import extract_template
+import restore_config
+
+# Stored results of the CLI suite, compared against on every run
+BASELINE_FILE = Path(__file__).resolve().parent / "benchmark_baseline.json"
+BASELINE_VERSION = 1
+
+# A run slower than baseline * tolerance is reported as a regression
+DEFAULT_TOLERANCE = 1.5
+
+# Runs faster than this are too noisy to flag as regressions
+NOISE_FLOOR_MS = 5.0
+
+# Synthetic installs the CLI suite runs against
+SCALES = {
+    "small": {"aircraft_count": 10, "controllers_per_aircraft": 5, "dual_sticks": 1, "diff_size": 0},
+    "medium": {"aircraft_count": 60, "controllers_per_aircraft": 8, "dual_sticks": 2, "diff_size": 8192},
+    "large": {"aircraft_count": 300, "controllers_per_aircraft": 10, "dual_sticks": 2, "diff_size": 32768},
+}
+
+# Fixed machine GUID for the synthetic machine, so fingerprints never query the OS
+SYNTHETIC_MACHINE_GUID = "00000000-0000-4000-8000-000000000000"
+
+def legacy_glob_scan(input_path: Path) -> list:
+    """
+    The recursive glob walk get_dcs_controllers used before helpers_dcs.walk_joystick_configs().
+    Kept here only as the benchmark baseline.
+
+        Args:
+            input_path (Path): The Config/Input folder
+
+        Returns:
+            list: (aircraft_name, controller_name, dcs_guid) tuples
+    """
+    pattern = re.compile(r"^(.*)\s+({.*})\.diff\.lua$")
+    found = []
+    for joy_dir in sorted(input_path.glob("**/joystick")):
+        for file in sorted(joy_dir.glob("*.diff.lua")):
+            match = pattern.match(file.name)
+            if match:
+                found.append((joy_dir.parent.name, match.group(1).strip(), match.group(2).strip()))
+    return found
+
+
+def _best_of(func, repeat: int) -> float:
+    """
+    Runs func repeat times and returns the fastest run in milliseconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_scan(aircraft_count: int = 300, repeat: int = 5) -> dict:
+    """
+    Compares the legacy recursive glob with the scandir walker on a synthetic tree.
+
+        Args:
+            aircraft_count (int): Number of aircraft in the synthetic tree
+            repeat (int): Runs per implementation (the best run is reported)
+
+        Returns:
+            dict: glob_ms, scandir_ms, speedup and the number of configs found
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_dcs.generate_saved_games(Path(tmp), aircraft_count)
+        input_path = Path(tmp) / "Config" / "Input"
+
+        legacy = legacy_glob_scan(input_path)
+        walked = [t[:3] for t in helpers_dcs.walk_joystick_configs(input_path)]
+        if legacy != walked:
+            raise SystemExit("Error: scandir walker and legacy glob disagree on the synthetic tree.")
+
+        glob_ms = _best_of(lambda: legacy_glob_scan(input_path), repeat)
+        scandir_ms = _best_of(lambda: list(helpers_dcs.walk_joystick_configs(input_path)), repeat)
+
+    return {
+        "configs": len(walked),
+        "glob_ms": glob_ms,
+        "scandir_ms": scandir_ms,
+        "speedup": glob_ms / scandir_ms if scandir_ms else 0,
+    }
+
+
+@contextlib.contextmanager
+def _synthetic_machine():
+    """
+    Pins the machine GUID and silences the CLIs' status output while a suite runs.
+    """
+    original = fprintdcs.MACHINE_GUID_PROVIDER
+    fprintdcs.MACHINE_GUID_PROVIDER = lambda: SYNTHETIC_MACHINE_GUID
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        fprintdcs.MACHINE_GUID_PROVIDER = original
+
+
+def _timed(func) -> float:
+    """
+    Runs func once and returns the elapsed time in milliseconds.
+    """
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_cli_scale(scale: dict, repeat: int = 3) -> dict:
+    """
+    Times the three CLIs end to end against one synthetic Saved Games tree.
+    Cold runs start from an empty library or Saved Games folder, warm runs repeat over the result.
+
+        Args:
+            scale (dict): Arguments for synthetic_dcs.generate_saved_games()
+            repeat (int): Runs per measurement (the best run is reported)
+
+        Returns:
+            dict: metric name -> best time in milliseconds
+    """
+    helpers_generic.print_debug(f"bench_cli_scale({scale})")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, _synthetic_machine():
+        tmp = Path(tmp)
+        source_root = tmp / "source"
+        synthetic_dcs.generate_saved_games(source_root, **scale)
+        aircraft_names = sorted(d.name for d in helpers_dcs.get_input_path(str(source_root)).iterdir())
+
+        fprint_dir = tmp / "fingerprints"
+        results["fingerprint"] = _best_of(
+            lambda: fprintdcs.build_machine_fingerprint(save_root=str(source_root), dest_dir=fprint_dir), repeat)
+        hostname = fprintdcs.get_hostname()
+
+        def extract(library):
+            library.mkdir(parents=True, exist_ok=True)
+            for aircraft in aircraft_names:
+                extract_template.extract_aircraft_config(aircraft, str(source_root), library)
+
+        def restore(target_root, merge=False):
+            (target_root / "Config" / "Input").mkdir(parents=True, exist_ok=True)
+            for aircraft in aircraft_names:
+                restore_config.restore_aircraft_config(aircraft, hostname, fprint_dir, library, str(target_root), merge=merge)
+
+        cold, warm, restore_cold, restore_warm, merge_warm = [], [], [], [], []
+        for run in range(repeat):
+            library = tmp / f"library-{run}"
+            cold.append(_timed(lambda: extract(library)))
+            warm.append(_timed(lambda: extract(library)))
+
+            target_root = tmp / f"restore-{run}"
+            restore_cold.append(_timed(lambda: restore(target_root)))
+            restore_warm.append(_timed(lambda: restore(target_root)))
+            merge_warm.append(_timed(lambda: restore(target_root, merge=True)))
+
+        results["extract_cold"] = min(cold)
+        results["extract_warm"] = min(warm)
+        results["restore_cold"] = min(restore_cold)
+        results["restore_warm"] = min(restore_warm)
+        results["restore_merge_warm"] = min(merge_warm)
+
+    return results
+
+
+def bench_cli(scale_names: list, repeat: int = 3) -> dict:
+    """
+    Runs the CLI suite at several scales.
+
+        Args:
+            scale_names (list): Keys of SCALES
+            repeat (int): Runs per measurement (the best run is reported)
+
+        Returns:
+            dict: scale name -> metric name -> milliseconds
+    """
+    return {name: bench_cli_scale(SCALES[name], repeat) for name in scale_names}
+
+
+def load_baseline(file_path: Path = BASELINE_FILE) -> dict:
+    """
+    Reads stored CLI suite results.
+
+        Args:
+            file_path (Path): The baseline JSON file
+
+        Returns:
+            dict: scale name -> metric name -> milliseconds, or empty if there is no usable baseline
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != BASELINE_VERSION:
+        return {}
+    return data.get("results", {})
+
+
+def save_baseline(results: dict, file_path: Path = BASELINE_FILE):
+    """
+    Stores CLI suite results as the new baseline, keeping scales that were not re-run.
+
+        Args:
+            results (dict): The output of bench_cli()
+            file_path (Path): The baseline JSON file
+
+        Returns:
+            None
+    """
+    merged = {**load_baseline(file_path), **results}
+    data = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {name: {k: round(v, 2) for k, v in metrics.items()} for name, metrics in sorted(merged.items())},
+    }
+    file_path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Finds measurements that got slower than the baseline allows.
+
+        Args:
+            results (dict): The output of bench_cli()
+            baseline (dict): The output of load_baseline()
+            tolerance (float): Allowed slowdown factor
+
+        Returns:
+            list: (scale, metric, baseline_ms, current_ms) for every regression
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, current in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None or current < NOISE_FLOOR_MS:
+                continue
+            if current > base * tolerance:
+                regressions.append((name, metric, base, current))
+    return regressions
+
+
+def print_cli_results(results: dict, baseline: dict):
+    """
+    Prints the CLI suite as a table, with the change against the baseline where there is one.
+    """
+    for name, metrics in results.items():
+        print(f"CLI suite, {name} ({SCALES[name]['aircraft_count']} aircraft):")
+        for metric, current in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            change = f"  ({current / base:5.2f}x baseline)" if base else ""
+            print(f"  {metric:20} {current:10.2f} ms{change}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='benchmark', description='Benchmarks for the dcs-config-mapper hot paths.')
+    parser.add_argument('--suite', choices=['scan', 'cli'], default='scan', help='scan: controller scan only. cli: fingerprint, extract and restore')
+    parser.add_argument('--aircraft', type=int, default=300, help='Aircraft in the synthetic tree (scan suite)')
+    parser.add_argument('--scales', type=str, default="small,medium", help=f'Comma separated scales for the cli suite ({", ".join(SCALES)})')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported)')
+    parser.add_argument('--baseline', type=str, default=str(BASELINE_FILE), help='Baseline results file for the cli suite')
+    parser.add_argument('--savebaseline', action='store_true', help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Slowdown factor reported as a regression')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    if args.suite == "cli":
+        scale_names = [s.strip() for s in args.scales.split(",") if s.strip()]
+        unknown = [s for s in scale_names if s not in SCALES]
+        if unknown:
+            parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+        baseline_file = Path(args.baseline)
+        baseline = load_baseline(baseline_file)
+        results = bench_cli(scale_names, args.repeat)
+        print_cli_results(results, baseline)
+
+        if args.savebaseline:
+            save_baseline(results, baseline_file)
+            print(f"Saved baseline to: {baseline_file}")
+        else:
+            regressions = compare_to_baseline(results, baseline, args.tolerance)
+            for name, metric, base, current in regressions:
+                print(f"[REGRESSION] {name} {metric}: {base:.2f} ms -> {current:.2f} ms")
+            if regressions:
+                raise SystemExit(f"Error: {len(regressions)} measurement(s) slower than {args.tolerance}x baseline.")
+    else:
+        result = bench_scan(args.aircraft, args.repeat)
+        print(f"Controller scan, {args.aircraft} aircraft ({result['configs']} configs):")
+        print(f"  glob    {result['glob_ms']:8.2f} ms")
+        print(f"  scandir {result['scandir_ms']:8.2f} ms")
+        print(f"  speedup {result['speedup']:8.1f}x")
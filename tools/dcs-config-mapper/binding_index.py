@@ -0,0 +1,285 @@
+import argparse
+import json
+import time
+from pathlib import Path
+import helpers_generic
+import difflua
+import hardware_map
+import restore_config
+import template_pack
+
+# Constants
+INDEX_FILENAME = ".binding_index.json"
+INDEX_VERSION = 1
+
+# Entry kinds that bind a key to an action (a "removed" entry only unbinds a DCS default)
+BINDING_KINDS = ("added", "changed")
+
+
+def index_path_for(template_root: Path) -> Path:
+    """
+    Returns where the binding index of a library is kept (inside the library, or in a pack's cache folder).
+    """
+    if template_pack.is_pack(template_root):
+        return template_pack.cache_dir_for(template_root) / INDEX_FILENAME
+    return template_root / INDEX_FILENAME
+
+
+def _load_index_file(index_path: Path) -> dict:
+    """
+    Loads the on-disk index, returning an empty index if it is missing, corrupt or from another version.
+
+        Args:
+            index_path (Path): The index file location
+
+        Returns:
+            dict: The raw index data
+    """
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION and isinstance(data.get("files"), dict) and isinstance(data.get("blobs"), dict):
+            return data
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+
+    return {"version": INDEX_VERSION, "files": {}, "blobs": {}}
+
+
+def binding_key(entry: dict) -> str:
+    """
+    Returns the key of a binding entry, with its modifiers, e.g. "JOY_BTN5" or "LAlt + JOY_BTN5".
+    """
+    reformers = entry.get("reformers") or {}
+    return " + ".join([*(reformers[i] for i in sorted(reformers)), entry.get("key", "?")])
+
+
+def parse_bindings(file_path: Path) -> list:
+    """
+    Lists every key an action binds or unbinds in one template.
+
+        Args:
+            file_path (Path): The .diff.lua template
+
+        Returns:
+            list: [section, action_id, action name, kind, key] rows, where kind is "added", "removed" or "changed"
+    """
+    rows = []
+    with helpers_generic.span("parse bindings", "index", file=file_path.name):
+        for section, action_id, entry in difflua.iter_entries(file_path):
+            for kind in ("added", "removed", "changed"):
+                for binding in (entry.get(kind) or {}).values():
+                    rows.append([section, action_id, entry.get("name", ""), kind, binding_key(binding)])
+    return rows
+
+
+class BindingIndex:
+    """
+    Every binding in a template library, inverted so it can be looked up by controller and key:
+        (controller_name, key) -> [(aircraft, instance_id, section, action_id, action name, kind)]
+    """
+    __slots__ = ("_by_binding", "_controllers")
+
+    def __init__(self, rows):
+        """
+            Args:
+                rows (iterable): (aircraft, controller_name, instance_id, section, action_id, name, kind, key) tuples
+        """
+        self._by_binding = {}
+        self._controllers = {}
+        for aircraft_name, ctrl_name, instance_id, section, action_id, name, kind, key in rows:
+            self._by_binding.setdefault((ctrl_name, key), []).append((aircraft_name, instance_id, section, action_id, name, kind))
+            self._controllers.setdefault(ctrl_name, set()).add(key)
+
+    def controllers(self, pattern: str = "") -> list:
+        """
+        Returns the controller names containing pattern (case-insensitive).
+        """
+        pattern = pattern.lower()
+        return sorted(name for name in self._controllers if pattern in name.lower())
+
+    def lookup(self, controller_name: str, key: str) -> list:
+        """
+        Returns the (aircraft, instance_id, section, action_id, name, kind) tuples binding exactly this controller and key.
+        """
+        return sorted(self._by_binding.get((controller_name, key), ()))
+
+    def query(self, controller_pattern: str, key: str = None) -> dict:
+        """
+        Looks up the bindings of every controller matching controller_pattern.
+
+            Args:
+                controller_pattern (str): Part of the controller name, e.g. "Throttle - HOTAS"
+                key (str): The key, e.g. "JOY_BTN23" (case-insensitive), or None for every key
+
+            Returns:
+                dict: (controller_name, key) -> the tuples returned by lookup()
+        """
+        result = {}
+        for ctrl_name in self.controllers(controller_pattern):
+            keys = self._controllers[ctrl_name]
+            for ctrl_key in sorted(keys):
+                if key is None or ctrl_key.upper() == key.upper():
+                    result[(ctrl_name, ctrl_key)] = self.lookup(ctrl_name, ctrl_key)
+        return result
+
+    def conflicts(self, aircraft_names: list = None) -> list:
+        """
+        Finds keys bound to more than one action of the same aircraft on the same controller instance.
+        Only bindings added or changed by the templates are known, so DCS defaults are not checked.
+
+            Args:
+                aircraft_names (list): Only check these aircraft (all when None)
+
+            Returns:
+                list: (aircraft, controller_name, instance_id, key, [(action_id, name)]) sorted tuples
+        """
+        selected = set(aircraft_names) if aircraft_names is not None else None
+        found = []
+        for (ctrl_name, key), bindings in self._by_binding.items():
+            actions = {}
+            for aircraft_name, instance_id, _, action_id, name, kind in bindings:
+                if kind not in BINDING_KINDS or (selected is not None and aircraft_name not in selected):
+                    continue
+                actions.setdefault((aircraft_name, instance_id), {})[action_id] = name
+            for (aircraft_name, instance_id), by_action in actions.items():
+                if len(by_action) > 1:
+                    found.append((aircraft_name, ctrl_name, instance_id, key, sorted(by_action.items())))
+        return sorted(found)
+
+    def __len__(self) -> int:
+        return sum(len(bindings) for bindings in self._by_binding.values())
+
+
+def load_binding_index(template_root: Path, aircraft_names: list = None) -> BindingIndex:
+    """
+    Loads the binding index of a template library, re-parsing only templates whose content changed.
+    Files are matched by size and mtime first and by hash second, and parsed bindings are kept per hash,
+    so a template shared by many aircraft is parsed once. The index is written back when anything changed.
+    With aircraft_names only those aircraft are refreshed and indexed; the other entries are kept as they are.
+
+        Args:
+            template_root (Path): The template library (folder, store or pack)
+            aircraft_names (list): Only these aircraft (all when None)
+
+        Returns:
+            BindingIndex: The inverted index of the selected templates
+    """
+    helpers_generic.print_debug(f"binding_index.load_binding_index({template_root})")
+
+    index_path = index_path_for(template_root)
+    data = _load_index_file(index_path)
+    old_files, old_blobs = data["files"], data["blobs"]
+    files, blobs = {}, {}
+    rows = []
+
+    if aircraft_names is None:
+        aircraft_names = restore_config.list_template_aircraft(template_root)
+    else:
+        selected = set(aircraft_names)
+        files = {name: entry for name, entry in old_files.items() if name.split("/", 1)[0] not in selected}
+        blobs = {entry["sha256"]: old_blobs[entry["sha256"]] for entry in files.values() if entry["sha256"] in old_blobs}
+
+    with helpers_generic.span("refresh binding index", "index"):
+        for aircraft_name in aircraft_names:
+            for path, ctrl_name, instance_id in restore_config.find_templates(template_root, aircraft_name) or ():
+                name = f"{aircraft_name}/{hardware_map.template_name(ctrl_name, instance_id)}"
+                st = path.stat()
+                cached = old_files.get(name)
+                if cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+                    digest = cached["sha256"]
+                else:
+                    digest = helpers_generic.hash_file(path)
+
+                if digest not in blobs:
+                    if digest in old_blobs:
+                        blobs[digest] = old_blobs[digest]
+                    else:
+                        helpers_generic.print_debug(f"  Indexing: {name}")
+                        try:
+                            blobs[digest] = parse_bindings(path)
+                        except ValueError as e:
+                            print(f"Warning: Cannot index {name}: {e}")
+                            continue
+
+                files[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+                rows.extend((aircraft_name, ctrl_name, instance_id, *row) for row in blobs[digest])
+
+    if files != old_files or blobs.keys() != old_blobs.keys():
+        # The index is a cache, so a read-only library is not an error
+        try:
+            with helpers_generic.span("write binding index", "io"):
+                index_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = index_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps({"version": INDEX_VERSION, "files": files, "blobs": blobs}), encoding="utf-8")
+                tmp_path.replace(index_path)
+        except OSError as e:
+            helpers_generic.print_debug(f"  Could not write index {index_path}: {e}")
+
+    return BindingIndex(rows)
+
+
+def print_conflicts(conflicts: list):
+    """
+    Prints the conflicts returned by BindingIndex.conflicts().
+    """
+    for aircraft_name, ctrl_name, instance_id, key, actions in conflicts:
+        names = ", ".join(f"'{name}' ({action_id})" for action_id, name in actions)
+        print(f"  [CONFLICT] {aircraft_name}: {hardware_map.template_name(ctrl_name, instance_id)}: {key} -> {names}")
+
+
+def check_conflicts(template_root: Path, aircraft_names: list = None) -> list:
+    """
+    Refreshes the binding index and prints any key bound to two actions in the same aircraft.
+
+        Args:
+            template_root (Path): The template library
+            aircraft_names (list): Only check these aircraft (all when None)
+
+        Returns:
+            list: The conflicts found (see BindingIndex.conflicts())
+    """
+    start = time.perf_counter()
+    conflicts = load_binding_index(template_root, aircraft_names).conflicts(aircraft_names)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if conflicts:
+        print(f"Warning: {len(conflicts)} keys are bound to more than one action:")
+        print_conflicts(conflicts)
+    helpers_generic.print_debug(f"  Checked bindings for conflicts in {elapsed_ms:.1f} ms")
+    return conflicts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='binding_index', description='Query the bindings of a whole template library.')
+    parser.add_argument('command', choices=['query', 'conflicts', 'controllers'])
+    parser.add_argument('controller', nargs='?', default="", help='query/controllers: part of the controller name')
+    parser.add_argument('key', nargs='?', help='query: the key, e.g. JOY_BTN23 (all keys when omitted)')
+    parser.add_argument('--repotemplates', type=str, default=".", help='Templates directory, store or template pack')
+    parser.add_argument('--aircraftlist', type=str, default="all", help='conflicts: comma separated aircraft names, or "all"')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    root = Path(args.repotemplates)
+    if not root.exists():
+        raise SystemExit(f"Error: Template path '{root}' does not exist.")
+
+    if args.command == "conflicts":
+        aircraft_names = None if args.aircraftlist == "all" else args.aircraftlist.split(",")
+        if not check_conflicts(root, aircraft_names):
+            print("No conflicting bindings.")
+    elif args.command == "controllers":
+        for ctrl_name in load_binding_index(root).controllers(args.controller):
+            print(ctrl_name)
+    else:
+        if not args.controller:
+            parser.error("query needs a controller name")
+        results = load_binding_index(root).query(args.controller, args.key)
+        if not results:
+            print("No matching bindings.")
+        for (ctrl_name, key), bindings in results.items():
+            print(f"{ctrl_name}: {key}")
+            for aircraft_name, instance_id, section, action_id, name, kind in bindings:
+                print(f"  {aircraft_name:<20} #{instance_id}  {kind:<8} {name} ({action_id})")
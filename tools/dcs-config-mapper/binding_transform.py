@@ -0,0 +1,285 @@
+import argparse
+import copy
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import helpers_generic
+import difflua
+import hardware_map
+import binding_index
+import template_store
+import template_pack
+
+# Constants
+RULES_VERSION = 1
+RULE_KEYS = {"controller", "instance", "aircraft", "rename", "remap", "copy_filters", "drop"}
+
+# Keys of the report returned by transform_library()
+REPORT_KEYS = ("written", "unchanged", "failed")
+
+# Files handed to each worker process at a time
+CHUNK_SIZE = 8
+
+
+def load_rules(rules_file: Path) -> list:
+    """
+    Loads and checks a transform rules file. Each rule selects templates by controller and rewrites them:
+
+        {"version": 1, "rules": [{
+            "controller": "Throttle - HOTAS Warthog",          (required) templates of this controller
+            "instance": 1,                                     (optional) only this instance
+            "aircraft": ["F-16C_50"],                          (optional) only these aircraft
+            "drop": ["Airbrake Off", "d148pnil..."],           (optional) actions removed, by name or id
+            "remap": {"JOY_BTN7": "JOY_BTN12"},                (optional) keys renamed in every binding
+            "copy_filters": {"JOY_Z": "JOY_SLIDER1"},          (optional) axis filter copied from key to key
+            "rename": {"controller": "Bravo Throttle Quadrant", "instance": 1}
+                                                               (required) the new template written from the source
+        }]}
+
+    The steps run in that order (drop, remap, copy_filters), so copy_filters uses the remapped keys.
+    Sources are never rewritten: every rule writes a new template, so rerunning the rules reproduces the
+    same outputs from the same sources. A rule whose output another rule would read is rejected.
+
+        Args:
+            rules_file (Path): The JSON rules file
+
+        Returns:
+            list: The rules
+    """
+    try:
+        with open(rules_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise SystemExit(f"Error: Cannot read rules file '{rules_file}': {e}")
+
+    if data.get("version") != RULES_VERSION:
+        raise SystemExit(f"Error: Unsupported rules version in '{rules_file}'")
+
+    rules = data.get("rules", [])
+    for number, rule in enumerate(rules, start=1):
+        unknown = set(rule) - RULE_KEYS
+        if unknown:
+            raise SystemExit(f"Error: Rule {number} has unknown keys: {', '.join(sorted(unknown))}")
+        if not rule.get("controller"):
+            raise SystemExit(f"Error: Rule {number} needs a controller")
+        rename = rule.get("rename") or {}
+        if not rename.get("controller") and "instance" not in rename:
+            raise SystemExit(f"Error: Rule {number} needs a rename; rules never rewrite their source template")
+
+    # Chained rules (A -> B plus B -> C) would read templates that this run is writing
+    for number, rule in enumerate(rules, start=1):
+        target = (rule["rename"].get("controller", rule["controller"]), rule["rename"].get("instance"))
+        for other_number, other in enumerate(rules, start=1):
+            if other["controller"] == target[0] and (target[1] is None or other.get("instance", target[1]) == target[1]):
+                reader = "its own source templates" if other_number == number else f"templates that rule {other_number} reads"
+                raise SystemExit(f"Error: Rule {number} writes {reader}")
+    return rules
+
+
+def drop_actions(tree: dict, drops: list) -> dict:
+    """
+    Removes the actions whose id or name is in drops.
+    """
+    drops = set(drops)
+    for section in difflua.SECTIONS:
+        actions = tree.get(section)
+        if actions:
+            tree[section] = {action_id: entry for action_id, entry in actions.items()
+                             if action_id not in drops and entry.get("name") not in drops}
+    return tree
+
+
+def _bindings(tree: dict, sections=difflua.SECTIONS):
+    """
+    Yields every binding entry (the tables holding "key") of the given sections.
+    """
+    for section in sections:
+        for entry in (tree.get(section) or {}).values():
+            for kind in ("added", "removed", "changed"):
+                yield from (entry.get(kind) or {}).values()
+
+
+def remap_keys(tree: dict, remap: dict) -> dict:
+    """
+    Renames keys in every binding, e.g. {"JOY_BTN7": "JOY_BTN12"}. The mapping is applied once, so swaps work.
+    """
+    for binding in _bindings(tree):
+        if binding.get("key") in remap:
+            binding["key"] = remap[binding["key"]]
+    return tree
+
+
+def copy_filters(tree: dict, mapping: dict) -> dict:
+    """
+    Copies the axis filter (curvature, deadzone, ...) bound to one key onto the bindings of another key.
+    Keys without a filter to copy are left alone.
+    """
+    filters = {}
+    for binding in _bindings(tree, ("axisDiffs",)):
+        if "filter" in binding:
+            filters.setdefault(binding.get("key"), binding["filter"])
+
+    for binding in _bindings(tree, ("axisDiffs",)):
+        for source_key, target_key in mapping.items():
+            if binding.get("key") == target_key and source_key in filters:
+                binding["filter"] = copy.deepcopy(filters[source_key])
+    return tree
+
+
+def apply_rule(tree: dict, rule: dict) -> dict:
+    """
+    Applies one rule's drop, remap and copy_filters steps to a parsed template.
+    """
+    if rule.get("drop"):
+        tree = drop_actions(tree, rule["drop"])
+    if rule.get("remap"):
+        tree = remap_keys(tree, rule["remap"])
+    if rule.get("copy_filters"):
+        tree = copy_filters(tree, rule["copy_filters"])
+    return tree
+
+
+def transform_file(job: tuple) -> tuple:
+    """
+    Transforms one template (runs in a worker process).
+    The existing output is compared as a parsed tree, so formatting alone never causes a write.
+
+        Args:
+            job (tuple): (source path, output path, rule)
+
+        Returns:
+            tuple: (output path, new text or None if the output is unchanged, error message or None)
+    """
+    source, output, rule = job
+    try:
+        tree = apply_rule(difflua.load(source), rule)
+        if output.exists() and difflua.load(output) == tree:
+            return output, None, None
+        return output, difflua.dumps(tree), None
+    except (OSError, ValueError) as e:
+        return output, None, str(e)
+
+
+def plan_jobs(template_root: Path, rules: list, aircraft_names: list = None):
+    """
+    Yields the (source, output, rule) jobs for every template a rule selects, in one pass over the library.
+
+        Args:
+            template_root (Path): The template library (folder layout)
+            rules (list): The rules returned by load_rules()
+            aircraft_names (list): Only these aircraft (all when None)
+
+        Returns:
+            generator: (source path, output path, rule) tuples
+    """
+    for source in sorted(template_root.glob("*/joystick/*.diff.lua")):
+        aircraft_name = source.parent.parent.name
+        if aircraft_names is not None and aircraft_name not in aircraft_names:
+            continue
+        parsed = hardware_map.parse_template_name(source.name)
+        if not parsed:
+            continue
+        ctrl_name, instance_id = parsed
+
+        for rule in rules:
+            if rule["controller"] != ctrl_name or rule.get("instance", instance_id) != instance_id:
+                continue
+            if "aircraft" in rule and aircraft_name not in rule["aircraft"]:
+                continue
+            rename = rule["rename"]
+            output_name = hardware_map.template_name(rename.get("controller", ctrl_name), rename.get("instance", instance_id))
+            yield source, source.parent / output_name, rule
+
+
+def transform_library(template_root: Path, rules: list, aircraft_names: list = None, max_workers: int = None) -> dict:
+    """
+    Applies transform rules to the whole library in one pass.
+    Jobs are checked up front, transformed in a process pool and written as results stream back,
+    and only outputs whose bindings changed are written (honours helpers_generic.NO_ACTION).
+
+        Args:
+            template_root (Path): The template library (folder layout)
+            rules (list): The rules returned by load_rules()
+            aircraft_names (list): Only these aircraft (all when None)
+            max_workers (int): Worker processes (defaults to the CPU count)
+
+        Returns:
+            dict: Lists of output paths under "written" and "unchanged", and (path, error) pairs under "failed"
+    """
+    helpers_generic.print_debug(f"binding_transform.transform_library({template_root})")
+
+    if template_pack.is_pack(template_root) or template_store.is_store(template_root):
+        raise SystemExit(f"Error: '{template_root}' is a packed or stored library; transform the template folders and rebuild it")
+
+    report = {key: [] for key in REPORT_KEYS}
+    jobs = list(plan_jobs(template_root, rules, aircraft_names))
+    sources = {source for source, _, _ in jobs}
+    outputs = set()
+
+    def checked_jobs():
+        for source, output, rule in jobs:
+            # An output that is also a source would be read and written in the same run
+            problem = ("written by more than one rule" if output in outputs else
+                       "would overwrite a source template" if output in sources else None)
+            if problem:
+                relative = output.relative_to(template_root).as_posix()
+                report["failed"].append((relative, problem))
+                print(f"  [FAILED] {relative}: {problem}")
+                continue
+            outputs.add(output)
+            yield source, output, rule
+
+    with helpers_generic.span("transform templates", "transform"), ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for output, text, error in pool.map(transform_file, checked_jobs(), chunksize=CHUNK_SIZE):
+            relative = output.relative_to(template_root).as_posix()
+            if error:
+                report["failed"].append((relative, error))
+                print(f"  [FAILED] {relative}: {error}")
+            elif text is None:
+                report["unchanged"].append(relative)
+            elif helpers_generic.NO_ACTION:
+                report["written"].append(relative)
+                print(f"  [DRY RUN] Would write {relative}")
+            else:
+                with open(output, 'w', encoding='utf-8', newline='') as f:
+                    f.write(text)
+                report["written"].append(relative)
+                print(f"  [WRITTEN] {relative}")
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='binding_transform', description='Apply binding transform rules to every template in the library.')
+    parser.add_argument('rules', type=str, help='JSON rules file (see load_rules())')
+    parser.add_argument('--repotemplates', type=str, default=".", help='Templates directory')
+    parser.add_argument('--aircraftlist', type=str, default="all", help='Comma separated aircraft names, or "all"')
+    parser.add_argument('--workers', type=int, help='Worker processes (defaults to the CPU count)')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--noaction', action='store_true', help='Dry run: see what would happen')
+    parser.add_argument('--profile', type=str, nargs='?', const='binding_transform_trace.json', help='Write a Chrome trace of the run (default: binding_transform_trace.json) and print the slowest phases')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+    helpers_generic.NO_ACTION = args.noaction
+
+    root = Path(args.repotemplates)
+    if not root.exists():
+        raise SystemExit(f"Error: Template path '{root}' does not exist.")
+    aircraft_names = None if args.aircraftlist == "all" else args.aircraftlist.split(",")
+
+    if args.profile:
+        helpers_generic.start_profile()
+
+    try:
+        with helpers_generic.span("binding_transform", "cli"):
+            report = transform_library(root, load_rules(Path(args.rules)), aircraft_names, args.workers)
+            print(f"Transform: {len(report['written'])} written, {len(report['unchanged'])} unchanged, {len(report['failed'])} failed")
+            if report["written"] and not helpers_generic.NO_ACTION:
+                binding_index.check_conflicts(root, aircraft_names)
+    finally:
+        if args.profile:
+            helpers_generic.finish_profile(args.profile)
+
+    if report["failed"]:
+        raise SystemExit(1)
@@ -0,0 +1,421 @@
+import argparse
+import re
+import time
+from pathlib import Path
+import helpers_generic
+
+# The sections DCS writes into a <Controller> {GUID}.diff.lua file
+SECTIONS = ("axisDiffs", "keyDiffs")
+
+# One regex for every token the DCS diff format uses, each with its leading whitespace.
+# Strings never span lines in DCS output, so the tokenizer can run line by line.
+# Anything else lands in the last group and is reported as an error.
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+      (--.*)
+    | ("(?:[^"\\]|\\.)*")
+    | (-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | ([A-Za-z_][A-Za-z0-9_]*)
+    | ([\[\]{}=,;])
+    | (\S)
+)""", re.VERBOSE)
+
+# Returned by next() at the end of the token stream
+_EOF = ("eof", None, 0)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", '"': '"', "'": "'"}
+_CONSTANTS = {"true": True, "false": False, "nil": None}
+
+
+def _unescape(raw: str) -> str:
+    """
+    Converts a quoted Lua string token into its Python value.
+
+        Args:
+            raw (str): The token including the surrounding quotes
+
+        Returns:
+            str: The string value
+    """
+    body = raw[1:-1]
+    if "\\" not in body:
+        return body
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _escape(value: str) -> str:
+    """
+    Quotes a Python string the way DCS writes Lua strings.
+
+        Args:
+            value (str): The string value
+
+        Returns:
+            str: The quoted Lua string
+    """
+    value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{value}"'
+
+
+def tokenize(lines):
+    """
+    Yields tokens from an iterable of lines, skipping whitespace and comments.
+
+        Args:
+            lines (iterable): Lines of .diff.lua text (an open file works)
+
+        Returns:
+            generator: (kind, value, line_number) tuples where kind is "str", "num", "name"
+                or the punctuation character itself (e.g. "{")
+    """
+    findall = TOKEN_PATTERN.findall
+    for line_no, line in enumerate(lines, start=1):
+        for comment, string, number, name, op, bad in findall(line):
+            if op:
+                yield op, op, line_no
+            elif string:
+                yield "str", _unescape(string), line_no
+            elif name:
+                yield "name", name, line_no
+            elif number:
+                yield "num", (float(number) if ("." in number or "e" in number or "E" in number) else int(number)), line_no
+            elif bad:
+                raise ValueError(f"Unexpected character {bad!r} on line {line_no}")
+
+
+def _error(token, expected: str):
+    """
+    Builds the ValueError raised for an unexpected token.
+    """
+    if token is _EOF:
+        return ValueError(f"Expected {expected} but reached the end of the file")
+    return ValueError(f"Expected {expected} but found {token[1]!r} on line {token[2]}")
+
+
+def _expect(it, kind: str, value=None):
+    """
+    Consumes one token, raising if it is not of the expected kind (and value).
+    """
+    token = next(it, _EOF)
+    if token[0] != kind or (value is not None and token[1] != value):
+        raise _error(token, repr(value or kind))
+    return token
+
+
+def _parse_key(it, token) -> tuple:
+    """
+    Parses the key of a [key] = or name = field.
+
+        Args:
+            it (iterator): The token stream
+            token (tuple): The first token of the field
+
+        Returns:
+            tuple: (key, first token of the value), or (None, token) for a positional field
+    """
+    kind = token[0]
+    if kind == "[":
+        key_token = next(it, _EOF)
+        if key_token[0] != "str" and key_token[0] != "num":
+            raise _error(key_token, "a table key")
+        _expect(it, "]")
+        _expect(it, "=")
+        return key_token[1], next(it, _EOF)
+    if kind == "name" and token[1] not in _CONSTANTS:
+        _expect(it, "=")
+        return token[1], next(it, _EOF)
+    return None, token
+
+
+def _parse_value(it, token):
+    """
+    Parses a table, string, number or constant starting at token.
+    """
+    kind = token[0]
+    if kind == "{":
+        return _parse_table(it)
+    if kind == "str" or kind == "num":
+        return token[1]
+    if kind == "name" and token[1] in _CONSTANTS:
+        return _CONSTANTS[token[1]]
+    raise _error(token, "a value")
+
+
+def _parse_table(it) -> dict:
+    """
+    Parses the fields of a table whose opening brace has already been consumed.
+    Positional fields are stored under 1-based integer keys, matching Lua.
+    """
+    table = {}
+    position = 1
+    for token in it:
+        if token[0] == "}":
+            return table
+
+        key, token = _parse_key(it, token)
+        if key is None:
+            key = position
+            position += 1
+        table[key] = _parse_value(it, token)
+
+        token = next(it, _EOF)
+        if token[0] == "}":
+            return table
+        if token[0] != "," and token[0] != ";":
+            raise _error(token, "',' or '}'")
+
+    raise ValueError("Reached the end of the file inside a table")
+
+
+def _open_diff(it) -> str:
+    """
+    Consumes the "local diff = {" header and returns the variable name.
+    """
+    _expect(it, "name", "local")
+    var_name = _expect(it, "name")[1]
+    _expect(it, "=")
+    _expect(it, "{")
+    return var_name
+
+
+def _close_diff(it, var_name: str):
+    """
+    Consumes the trailing "return diff".
+    """
+    _expect(it, "name", "return")
+    _expect(it, "name", var_name)
+    token = next(it, _EOF)
+    if token is not _EOF:
+        raise _error(token, "the end of the file")
+
+
+def parse_lines(lines) -> dict:
+    """
+    Parses .diff.lua text into nested dicts.
+
+        Args:
+            lines (iterable): Lines of .diff.lua text
+
+        Returns:
+            dict: The diff table, e.g. {"axisDiffs": {...}, "keyDiffs": {...}}
+    """
+    it = tokenize(lines)
+    var_name = _open_diff(it)
+    tree = _parse_table(it)
+    _close_diff(it, var_name)
+    return tree
+
+
+def loads(text: str) -> dict:
+    """
+    Parses .diff.lua text into nested dicts.
+
+        Args:
+            text (str): The file contents
+
+        Returns:
+            dict: The diff table
+    """
+    return parse_lines(text.splitlines())
+
+
+def load(file_path: Path) -> dict:
+    """
+    Parses a .diff.lua file into nested dicts.
+
+        Args:
+            file_path (Path): The .diff.lua file
+
+        Returns:
+            dict: The diff table
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_lines(f)
+
+
+def iter_entries(file_path: Path):
+    """
+    Streams the entries of a .diff.lua file one at a time without building the whole tree.
+
+        Args:
+            file_path (Path): The .diff.lua file
+
+        Returns:
+            generator: (section, action_id, entry) tuples, e.g.
+                ("keyDiffs", "d84pnilu85cdnilvdnilvpnilvunil", {"name": "Weapon Fire", "removed": {1: {"key": "JOY_BTN1"}}})
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        it = tokenize(f)
+        var_name = _open_diff(it)
+
+        # Only the two outer levels are walked here; each entry is parsed and yielded on its own
+        for token in it:
+            if token[0] == "}":
+                break
+            section, token = _parse_key(it, token)
+            if token[0] != "{":
+                raise _error(token, "'{'")
+
+            for token in it:
+                if token[0] == "}":
+                    break
+                action_id, token = _parse_key(it, token)
+                yield section, action_id, _parse_value(it, token)
+                token = next(it, _EOF)
+                if token[0] == "}":
+                    break
+                if token[0] != ",":
+                    raise _error(token, "',' or '}'")
+
+            token = next(it, _EOF)
+            if token[0] == "}":
+                break
+            if token[0] != ",":
+                raise _error(token, "',' or '}'")
+
+        _close_diff(it, var_name)
+
+
+def _sort_key(key):
+    """
+    DCS writes integer keys first in numeric order, then string keys in byte order.
+    """
+    return (0, key, "") if isinstance(key, int) else (1, 0, key)
+
+
+def _format_scalar(value) -> str:
+    """
+    Formats a non-table value as Lua source.
+    """
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "nil"
+    if isinstance(value, str):
+        return _escape(value)
+    if isinstance(value, float):
+        return repr(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+def _dump_table(table: dict, depth: int, out: list):
+    """
+    Appends the canonical lines of a table's fields to out.
+    """
+    indent = "\t" * depth
+    for key in sorted(table, key=_sort_key):
+        value = table[key]
+        field = f"[{key}]" if isinstance(key, int) else f"[{_escape(key)}]"
+        if isinstance(value, dict):
+            out.append(f"{indent}{field} = {{")
+            _dump_table(value, depth + 1, out)
+            out.append(f"{indent}}},")
+        else:
+            out.append(f"{indent}{field} = {_format_scalar(value)},")
+
+
+def dumps(tree: dict) -> str:
+    """
+    Serializes a diff table in the canonical layout DCS writes (tabs, sorted keys, trailing commas).
+
+        Args:
+            tree (dict): The diff table
+
+        Returns:
+            str: The .diff.lua text
+    """
+    out = ["local diff = {"]
+    _dump_table(tree, 1, out)
+    out.append("}")
+    out.append("return diff")
+    return "\n".join(out)
+
+
+def dump(tree: dict, file_path: Path):
+    """
+    Writes a diff table to a .diff.lua file in the canonical layout.
+
+        Args:
+            tree (dict): The diff table
+            file_path (Path): The destination file
+
+        Returns:
+            None
+    """
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(dumps(tree))
+
+
+def benchmark(template_root: Path, rounds: int = 20) -> dict:
+    """
+    Times full parsing, streaming and serialization over every .diff.lua file in a template library,
+    and checks that each file round-trips byte-for-byte.
+
+        Args:
+            template_root (Path): The library root (e.g. data/templates)
+            rounds (int): How many passes to time
+
+        Returns:
+            dict: File count, bytes, per-pass timings (ms) and the files that did not round-trip
+    """
+    files = sorted(template_root.glob("*/joystick/*.diff.lua"))
+    texts = [f.read_text(encoding="utf-8") for f in files]
+    total_bytes = sum(len(t) for t in texts)
+
+    mismatched = [str(f) for f, t in zip(files, texts) if dumps(loads(t)) != t]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        trees = [load(f) for f in files]
+    parse_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for f in files:
+            for _entry in iter_entries(f):
+                pass
+    stream_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for tree in trees:
+            dumps(tree)
+    dump_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    return {
+        "files": len(files),
+        "bytes": total_bytes,
+        "parse_ms": parse_ms,
+        "stream_ms": stream_ms,
+        "dump_ms": dump_ms,
+        "mismatched": mismatched,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='difflua', description='Parse, check and benchmark DCS .diff.lua files.')
+    parser.add_argument('files', nargs='*', help='.diff.lua files to list entries for')
+    parser.add_argument('--benchmark', type=str, metavar='TEMPLATES', help='Benchmark against a template library root')
+    parser.add_argument('--rounds', type=int, default=20, help='Benchmark passes')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    for file in args.files:
+        print(file)
+        for section, action_id, entry in iter_entries(Path(file)):
+            print(f"  {section:9} {action_id:40} {entry.get('name', '')}")
+
+    if args.benchmark:
+        result = benchmark(Path(args.benchmark), args.rounds)
+        mb = result["bytes"] / 1_000_000
+        print(f"Files: {result['files']} ({result['bytes']} bytes)")
+        for phase in ("parse_ms", "stream_ms", "dump_ms"):
+            ms = result[phase]
+            rate = mb / (ms / 1000) if ms else 0
+            print(f"  {phase[:-3]:7} {ms:8.3f} ms/pass  {rate:7.1f} MB/s")
+        print(f"Round-trip mismatches: {len(result['mismatched'])}")
+        for name in result["mismatched"]:
+            print(f"  [MISMATCH] {name}")
@@ -0,0 +1,267 @@
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import helpers_generic
+import helpers_dcs
+import difflua
+import fprint_db
+import hardware_map
+import restore_config
+
+# Constants
+HASH_CACHE_FILENAME = ".drift_hashes.json"
+HASH_CACHE_VERSION = 1
+
+# Keys of the per-aircraft report returned by scan_host_drift()
+DRIFT_KEYS = ("in_sync", "drifted", "missing", "extra")
+
+
+def _load_hash_cache(cache_path: Path) -> dict:
+    """
+    Loads a host's live file hash cache, returning an empty one if it is missing, corrupt or from another version.
+
+        Args:
+            cache_path (Path): The cache file location
+
+        Returns:
+            dict: relative path -> {size, mtime_ns, sha256}
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == HASH_CACHE_VERSION and isinstance(data.get("files"), dict):
+            return data["files"]
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return {}
+
+
+def _save_hash_cache(cache_path: Path, files: dict):
+    # The cache is only an optimization, so a read-only host folder is not an error
+    try:
+        tmp_path = cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"version": HASH_CACHE_VERSION, "files": dict(sorted(files.items()))}, indent=1), encoding="utf-8")
+        tmp_path.replace(cache_path)
+    except OSError as e:
+        helpers_generic.print_debug(f"  Could not write hash cache {cache_path}: {e}")
+
+
+def _cached_hash(file_path: Path, key: str, old_cache: dict, new_cache: dict) -> str:
+    """
+    Returns a live file's SHA-256, re-hashing only if its size or mtime changed since the cached entry.
+    """
+    st = file_path.stat()
+    entry = old_cache.get(key)
+    if not entry or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": helpers_generic.hash_file(file_path)}
+    new_cache[key] = entry
+    return entry["sha256"]
+
+
+def _same_bindings(template_path: Path, live_path: Path) -> bool:
+    """
+    Compares two configs semantically, so formatting-only differences are not reported as drift.
+    A live file that no longer parses counts as drifted.
+    """
+    with helpers_generic.span("compare bindings", "drift", file=live_path.name):
+        try:
+            return difflua.load(template_path) == difflua.load(live_path)
+        except ValueError as e:
+            helpers_generic.print_debug(f"  Could not parse {live_path}: {e}")
+            return False
+
+
+def load_library(template_root: Path, aircraft_names: list) -> dict:
+    """
+    Loads and hashes the library templates once so they can be compared against every host.
+
+        Args:
+            template_root (Path): The template library (folder, store or pack)
+            aircraft_names (list): Aircraft names, or ["all"] for every aircraft in the library
+
+        Returns:
+            dict: aircraft name -> {template filename: (template_path, sha256)}
+    """
+    helpers_generic.print_debug(f"drift_report.load_library({template_root})")
+
+    if aircraft_names == ["all"]:
+        aircraft_names = restore_config.list_template_aircraft(template_root)
+
+    library = {}
+    for aircraft_name in aircraft_names:
+        templates = restore_config.find_templates(template_root, aircraft_name)
+        if templates is None:
+            print(f"Warning: No templates found for '{aircraft_name}', skipping.")
+            continue
+        library[aircraft_name] = {
+            hardware_map.template_name(ctrl_name, instance_id): (path, helpers_generic.hash_file(path))
+            for path, ctrl_name, instance_id in templates
+        }
+    return library
+
+
+def scan_host_drift(hw_map: hardware_map.HardwareMap, save_root: Path, library: dict) -> dict:
+    """
+    Compares one host's live joystick configs against the library.
+    Each template is paired with the live file named by this machine's GUID for its controller.
+    Files are compared by hash first (cached per host in .drift_hashes.json) and parsed only when the hashes differ.
+
+        Args:
+            hw_map (HardwareMap): The host's compiled fingerprint
+            save_root (Path): The host's Saved Games root
+            library (dict): The templates returned by load_library()
+
+        Returns:
+            dict: aircraft name -> {key: [filenames]} for each of DRIFT_KEYS
+    """
+    helpers_generic.print_debug(f"drift_report.scan_host_drift({hw_map.hostname})")
+
+    input_path = save_root / "Config" / "Input"
+    cache_path = save_root / HASH_CACHE_FILENAME
+    old_cache = _load_hash_cache(cache_path)
+    new_cache = {}
+    report = {}
+
+    for aircraft_name, templates in library.items():
+        result = {key: [] for key in DRIFT_KEYS}
+        live = {file_path.name: file_path for _, _, file_path in helpers_dcs.list_joystick_configs(input_path, aircraft_name) or ()}
+
+        for name, (template_path, template_hash) in sorted(templates.items()):
+            live_name = hw_map.config_name_for_template(name)
+            if live_name is None:
+                # This host does not have the controller, so the template does not apply
+                continue
+            live_path = live.pop(live_name, None)
+            if live_path is None:
+                result["missing"].append(live_name)
+                continue
+
+            live_hash = _cached_hash(live_path, f"{aircraft_name}/{live_name}", old_cache, new_cache)
+            if live_hash == template_hash or _same_bindings(template_path, live_path):
+                result["in_sync"].append(live_name)
+            else:
+                result["drifted"].append(live_name)
+
+        # Live configs left over have no template for this host's hardware
+        result["extra"] = sorted(live)
+        report[aircraft_name] = result
+
+    if new_cache != old_cache:
+        _save_hash_cache(cache_path, new_cache)
+
+    return report
+
+
+def scan_fleet_drift(hostnames: list, aircraft_names: list, fprint_dir: Path, template_root: Path, host_root: Path, max_workers: int = 8) -> dict:
+    """
+    Scans many hosts for drift from the library, one host per worker.
+
+        Args:
+            hostnames (list): Hostnames, or ["all"] for every fingerprinted host
+            aircraft_names (list): Aircraft names, or ["all"] for every aircraft in the library
+            fprint_dir (Path): The fingerprint directory
+            template_root (Path): The template library (folder, store or pack)
+            host_root (Path): Folder holding one Saved Games root per host, named by hostname
+            max_workers (int): Maximum hosts scanned concurrently
+
+        Returns:
+            dict: hostname -> aircraft name -> {key: [filenames]} for each of DRIFT_KEYS
+    """
+    helpers_generic.print_debug(f"drift_report.scan_fleet_drift()")
+
+    conn = fprint_db.open_store(fprint_dir)
+    try:
+        # "all" is every machine under its current hostname
+        if hostnames == ["all"]:
+            fingerprints = [(row[0], fprint_db.find_by_machine_guid(conn, row[1])) for row in fprint_db.list_hosts(conn)]
+        else:
+            fingerprints = [(hostname, fprint_db.find_by_hostname(conn, hostname)) for hostname in hostnames]
+
+        hw_maps = {}
+        for hostname, fingerprint in fingerprints:
+            if not fingerprint:
+                print(f"Warning: No fingerprint found for hostname '{hostname}', skipping.")
+                continue
+            if not (host_root / hostname).is_dir():
+                print(f"Warning: No Saved Games root for '{hostname}' in {host_root}, skipping.")
+                continue
+            hw_maps[hostname] = hardware_map.HardwareMap.from_fingerprint(fingerprint)
+    finally:
+        conn.close()
+
+    with helpers_generic.span("load library", "drift"):
+        library = load_library(template_root, aircraft_names)
+
+    print(f"Scanning {len(library)} aircraft on {len(hw_maps)} hosts ({max_workers} workers).")
+
+    with helpers_generic.span("scan drift", "drift", hosts=len(hw_maps)), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {hostname: pool.submit(scan_host_drift, hw_map, host_root / hostname, library)
+                   for hostname, hw_map in hw_maps.items()}
+        return {hostname: future.result() for hostname, future in sorted(futures.items())}
+
+
+def print_drift_report(report: dict, verbose: bool = False):
+    """
+    Prints one line per host and aircraft, followed by the files that need attention.
+
+        Args:
+            report (dict): The report returned by scan_fleet_drift()
+            verbose (bool): Also list aircraft that are fully in sync
+
+        Returns:
+            None
+    """
+    totals = {key: 0 for key in DRIFT_KEYS}
+    print("\n--- Drift Report ---")
+    for hostname, aircraft in report.items():
+        for aircraft_name, result in aircraft.items():
+            for key in DRIFT_KEYS:
+                totals[key] += len(result[key])
+            if not verbose and not (result["drifted"] or result["missing"] or result["extra"]):
+                continue
+
+            print(f"{hostname}/{aircraft_name}: " + ", ".join(f"{len(result[key])} {key}" for key in DRIFT_KEYS))
+            for key in ("drifted", "missing", "extra"):
+                for name in result[key]:
+                    print(f"  [{key.upper()}] {name}")
+
+    print("Total: " + ", ".join(f"{totals[key]} {key}" for key in DRIFT_KEYS))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='drift_report', description='Report which hosts have drifted from the template library.')
+    parser.add_argument('--hosts', type=str, default="all", help='Comma separated hostnames, or "all"')
+    parser.add_argument('--aircraftlist', type=str, default="all", help='Comma separated aircraft names, or "all"')
+    parser.add_argument('--repofprints', type=str, default=".", help='Fingerprint directory')
+    parser.add_argument('--repotemplates', type=str, default=".", help='Templates directory, store or template pack')
+    parser.add_argument('--hostroot', type=str, default=".", help='Folder holding one Saved Games root per host')
+    parser.add_argument('--workers', type=int, default=8, help='Maximum hosts scanned concurrently')
+    parser.add_argument('--json', type=str, help='Also write the report to this JSON file')
+    parser.add_argument('--verbose', action='store_true', help='Also list aircraft that are in sync')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--profile', type=str, nargs='?', const='drift_report_trace.json', help='Write a Chrome trace of the run (default: drift_report_trace.json) and print the slowest phases')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    if args.profile:
+        helpers_generic.start_profile()
+
+    try:
+        with helpers_generic.span("drift_report", "cli"):
+            report = scan_fleet_drift(
+                args.hosts.split(","),
+                args.aircraftlist.split(","),
+                Path(args.repofprints),
+                Path(args.repotemplates),
+                Path(args.hostroot),
+                args.workers
+            )
+            print_drift_report(report, args.verbose)
+            if args.json:
+                Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+                print(f"Wrote drift report to: {args.json}")
+    finally:
+        if args.profile:
+            helpers_generic.finish_profile(args.profile)
@@ -4,8 +4,9 @@
 # ---------------------------------------------------------------------------
 
 param (
-    [Parameter(Mandatory=$true, Position=0)]
-    [string]$AircraftName
+    [Parameter(Position=0)]
+    [string[]]$AircraftName,
+    [switch]$All # Extract every aircraft found under Config/Input in one pass
 )
 
 $PythonExe     = "python"
@@ -27,13 +28,22 @@ if (!(Test-Path $ScriptPath)) {
     exit 1
 }
 
-Write-Host "Extracting template for: $AircraftName..." -ForegroundColor Cyan
+if ($All) {
+    $Targets = @("--all")
+    Write-Host "Extracting templates for all aircraft..." -ForegroundColor Cyan
+} elseif ($AircraftName) {
+    $Targets = $AircraftName
+    Write-Host "Extracting template for: $($AircraftName -join ', ')..." -ForegroundColor Cyan
+} else {
+    Write-Error "Provide an aircraft name or -All"
+    exit 1
+}
 
 # Execute the command
 & $PythonExe $ScriptPath `
     --saveroot $SaveRoot `
     --repotemplates $RepoTemplates `
-    $AircraftName
+    @Targets
 
 if ($LASTEXITCODE -eq 0) {
     Write-Host "SUCCESS: Template for $AircraftName has been updated in the repo folders." -ForegroundColor Green
@@ -1,100 +1,466 @@
 import argparse
-import re
-import shutil
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import helpers_generic 
 import helpers_dcs
+import fprintdcs
+import hardware_map
+import plan
+import template_store
+import template_pack
+import binding_index
 
 
-def extract_aircraft_config(aircraft_name: str, save_root: str, output_location: Path):
+# Constants
+MANIFEST_FILENAME = ".extract_manifest.json"
+MANIFEST_VERSION = 1
+
+# Keys of the report returned by extract_aircraft_config()
+REPORT_KEYS = ("added", "changed", "unchanged", "removed")
+
+
+def load_manifest(manifest_path: Path) -> dict:
     """
-    Copies .diff.lua files from DCS Saved Game to the target location
+    Loads an aircraft's extraction manifest, returning an empty one if it is missing or unreadable.
+
+        Args:
+            manifest_path: Path - The manifest file
+
+        Returns:
+            dict - template filename -> {source, source_size, source_mtime_ns, sha256, size, mtime_ns}
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data.get("templates", {})
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return {}
+
+
+def dump_manifest(templates: dict) -> str:
+    """
+    Serializes an aircraft's extraction manifest.
+
+        Args:
+            templates: dict - template filename -> entry (see load_manifest)
+
+        Returns:
+            str - The manifest JSON
+    """
+    data = {"version": MANIFEST_VERSION, "templates": dict(sorted(templates.items()))}
+    return json.dumps(data, indent=2)
+
+
+def check_output_location(output_location: Path):
+    """
+    Exits if templates cannot be extracted into output_location (missing, or a read-only template pack).
+    """
+    if not output_location.exists():
+        raise SystemExit(f"Error: Target path '{output_location}' does not exist.")
+    if template_pack.is_pack(output_location):
+        raise SystemExit(f"Error: '{output_location}' is a template pack; extract into a folder and rebuild it with template_pack.py build")
+
+
+def _stat_matches(st, size: int, mtime_ns: int) -> bool:
+    return st is not None and st.st_size == size and st.st_mtime_ns == mtime_ns
+
+
+def _stat_or_none(path: Path):
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _plan_store_templates(p: plan.Plan, aircraft_name: str, output_location: Path, clean_configs: list, old_manifest: dict, manifest: dict, prune: bool):
+    """
+    Plans extracting into the content-addressed template store (see template_store).
+    Each template is stored once as a blob named by its hash and the aircraft's templates.json maps
+    template filenames to blobs, so a controller file shared by many aircraft is stored only once.
+
+        Args:
+            p: Plan - The plan to add to
+            aircraft_name: str - The DCS aircraft name
+            output_location: Path - The template library (a store)
+            clean_configs: list - (source file, template filename) pairs
+            old_manifest: dict - The previous extraction manifest (used to avoid re-hashing unchanged sources)
+            manifest: dict - Receives the new extraction manifest entries
+            prune: bool - Drop templates whose source controller no longer exists
+
+        Returns:
+            None
+    """
+    stored = template_store.load_aircraft_manifest(output_location, aircraft_name) or {}
+    templates = {}
+
+    for file, clean_name in clean_configs:
+        src_stat = file.stat()
+        entry = old_manifest.get(clean_name)
+
+        # Cheap check: the source has not changed since it was last hashed
+        if entry and entry.get("source") == file.name and _stat_matches(src_stat, entry["source_size"], entry["source_mtime_ns"]):
+            digest = entry["sha256"]
+        else:
+            digest = helpers_generic.hash_file(file)
+
+        manifest[clean_name] = {
+            "source": file.name,
+            "source_size": src_stat.st_size,
+            "source_mtime_ns": src_stat.st_mtime_ns,
+            "sha256": digest,
+            "size": src_stat.st_size,
+            "mtime_ns": src_stat.st_mtime_ns,
+        }
+        templates[clean_name] = digest
+
+        if stored.get(clean_name) == digest:
+            p.add("skip", clean_name, status="unchanged", name=clean_name)
+            continue
+
+        status = "added" if clean_name not in stored else "changed"
+        blob = template_store.blob_path(output_location, digest)
+        if blob.exists():
+            p.add("skip", blob, status=status, name=clean_name, message=f"  [EXTRACTED] {clean_name} (already stored)")
+        else:
+            p.add("mkdir", blob.parent)
+            p.add("blob", blob, source=file, status=status, name=clean_name, message=f"  [EXTRACTED] {clean_name}")
+
+    # Templates that no longer have a source controller on this machine
+    for stale in sorted(set(stored) - set(templates)):
+        if prune:
+            p.add("skip", stale, status="removed", name=stale, message=f"  [REMOVED] {stale}")
+        else:
+            templates[stale] = stored[stale]
+            p.add("warn", stale, status="removed", name=stale,
+                  message=f"  [STALE] {stale} has no matching controller (use --prune to remove)")
+
+    if templates != stored:
+        p.add("write", template_store.manifest_path(output_location, aircraft_name),
+              content=template_store.dump_aircraft_manifest(templates), stage=2)
+
+
+
+
+def plan_extract(aircraft_name: str, save_root: str, output_location: Path, prune: bool = False, found_files: list = None, store: bool = False) -> plan.Plan:
+    """
+    Plans copying .diff.lua files from DCS Saved Game to the target location
         Replacing GUIDs with placeholders.
+        Templates whose content has not changed are skipped, using the per-aircraft manifest
+        to avoid hashing when neither the source nor the template has changed on disk.
+        Nothing is written here; the plan is applied by plan.execute_plans().
 
         Args:
             aircraft_name: str - The DCS aircraft name (e.g., "FA-18C_hornet")
             save_root: str - Optional override for DCS saved games path
             output_location: Path - The target location where templates will be saved
+            prune: bool - Delete templates whose source controller no longer exists
+            found_files: list - Optional pre-scanned .diff.lua files (see helpers_dcs.scan_joystick_dirs)
+            store: bool - Write into the content-addressed template store instead of <aircraft>/joystick
 
         Returns:
-            None
+            Plan - The planned operations; plan.report(REPORT_KEYS) gives the expected report
     """
-    helpers_generic.print_debug(f"extract_aircraft_config()")
+    helpers_generic.print_debug(f"plan_extract({aircraft_name})")
+
+    p = plan.Plan(aircraft_name)
 
     # Verify Output Location exists
-    if not output_location.exists():
-        raise SystemExit(f"Error: Target path '{output_location}' does not exist.")
+    check_output_location(output_location)
 
     # Locate Source using the new helper
     input_path = helpers_dcs.get_input_path(save_root)
     src_dir = input_path / aircraft_name / "joystick"
     
-    if not src_dir.exists():
+    if found_files is None and not src_dir.exists():
         print(f"Error: No joystick folder for '{aircraft_name}' at {src_dir}")
-        return
+        return p
 
     # Define Destination (Current Folder or --repotemplates)
     dest_dir = output_location / aircraft_name / "joystick"
+    manifest_path = output_location / aircraft_name / MANIFEST_FILENAME
     
-    # Regex for Sanitization
-    pattern = re.compile(r"^(.*)\s+({.*})\.diff\.lua$")
-
     helpers_generic.print_debug(f"Source: {src_dir}")
     helpers_generic.print_debug(f"Target: {dest_dir}")
 
-    # Ensure the specific aircraft subfolder exists
-    if not helpers_generic.NO_ACTION:
-        dest_dir.mkdir(parents=True, exist_ok=True)
-
-    # Track how many of each controller we've seen in this specific aircraft folder
-    template_counts = {}
-
     # sorted() ensures that the instance assignment matches the 
     # deterministic logic used in the machine fingerprint (alphabetical by GUID)
-    found_files = sorted(src_dir.glob("*.diff.lua"))
+    if found_files is None:
+        found_files = sorted(src_dir.glob("*.diff.lua"))
     
     if not found_files:
         print(f"No .diff.lua files found in {src_dir}")
-        return
-
-    for file in found_files:
-        match = pattern.match(file.name)
-        if match:
-            ctrl_name = match.group(1).strip()
-            
-            # Increment the instance ID for this controller type
-            instance_id = template_counts.get(ctrl_name, 0) + 1
-            template_counts[ctrl_name] = instance_id
-
-            # New Filename: Name {__GUID__}_ID.diff.lua
-            # This ID acts as the "key" that will be used to look up the right controller in the fingerprint
-            clean_name = f"{ctrl_name} {{__GUID__}}_{instance_id}.diff.lua"
-            target_path = dest_dir / clean_name
-
-            if not helpers_generic.NO_ACTION:
-                shutil.copy2(file, target_path)
-                print(f"  [EXTRACTED] {clean_name}")
+        return p
+
+    old_manifest = load_manifest(manifest_path)
+    manifest = {}
+
+    # Sanitization: number repeated controllers per folder, exactly as the machine fingerprint does
+    configs = [(file, parsed) for file in found_files if (parsed := hardware_map.parse_config_name(file.name))]
+    folder_map = hardware_map.HardwareMap.from_configs(parsed for _, parsed in configs)
+    clean_configs = [(file, hardware_map.template_name(*folder_map.key_for(ctrl_guid))) for file, (_, ctrl_guid) in configs]
+
+    if store:
+        p.add("mkdir", output_location / aircraft_name)
+        _plan_store_templates(p, aircraft_name, output_location, clean_configs, old_manifest, manifest, prune)
+        p.add("write", manifest_path, content=dump_manifest(manifest), stage=2)
+        return p
+
+    # Ensure the specific aircraft subfolder exists
+    p.add("mkdir", dest_dir)
+
+    for file, clean_name in clean_configs:
+
+        # New Filename: Name {__GUID__}_ID.diff.lua
+        # This ID acts as the "key" that will be used to look up the right controller in the fingerprint
+        target_path = dest_dir / clean_name
+
+        src_stat = file.stat()
+        dst_stat = _stat_or_none(target_path)
+        entry = old_manifest.get(clean_name)
+
+        # Cheap check: neither side has changed since the last extraction
+        if (entry and entry.get("source") == file.name
+                and _stat_matches(src_stat, entry["source_size"], entry["source_mtime_ns"])
+                and _stat_matches(dst_stat, entry["size"], entry["mtime_ns"])):
+            manifest[clean_name] = entry
+            p.add("skip", target_path, status="unchanged", name=clean_name)
+            continue
+
+        src_hash = helpers_generic.hash_file(file)
+        if dst_stat is not None:
+            if entry and _stat_matches(dst_stat, entry["size"], entry["mtime_ns"]):
+                dst_hash = entry["sha256"]
+            else:
+                dst_hash = helpers_generic.hash_file(target_path)
+
+            if dst_hash == src_hash:
+                manifest[clean_name] = {
+                    "source": file.name,
+                    "source_size": src_stat.st_size,
+                    "source_mtime_ns": src_stat.st_mtime_ns,
+                    "sha256": src_hash,
+                    "size": dst_stat.st_size,
+                    "mtime_ns": dst_stat.st_mtime_ns,
+                }
+                p.add("skip", target_path, status="unchanged", name=clean_name)
+                continue
+
+        # copy2 keeps the source size and mtime, so the template's stat is known up front.
+        # If the filesystem rounds mtimes the next run simply re-hashes once.
+        manifest[clean_name] = {
+            "source": file.name,
+            "source_size": src_stat.st_size,
+            "source_mtime_ns": src_stat.st_mtime_ns,
+            "sha256": src_hash,
+            "size": src_stat.st_size,
+            "mtime_ns": src_stat.st_mtime_ns,
+        }
+        p.add("copy", target_path, source=file, status="added" if dst_stat is None else "changed", name=clean_name,
+              message=f"  [EXTRACTED] {clean_name}")
+
+    # Templates that no longer have a source controller on this machine
+    if dest_dir.exists():
+        for stale in sorted(dest_dir.glob("*{__GUID__}_*.diff.lua")):
+            if stale.name in manifest:
+                continue
+            if prune:
+                p.add("remove", stale, status="removed", name=stale.name, message=f"  [REMOVED] {stale.name}")
             else:
-                print(f"  [DRY RUN] Would extract: {clean_name}")
+                p.add("warn", stale, status="removed", name=stale.name,
+                      message=f"  [STALE] {stale.name} has no matching controller (use --prune to remove)")
+
+    p.add("write", manifest_path, content=dump_manifest(manifest), stage=2)
+
+    return p
+
+
+
+
+def print_summary(p: plan.Plan):
+    """
+    Prints the one line added/changed/unchanged/removed summary of an extract plan.
+    """
+    report = p.report(REPORT_KEYS)
+    print(f"{p.name}: {len(report['added'])} added, {len(report['changed'])} changed, "
+          f"{len(report['unchanged'])} unchanged, {len(report['removed'])} removed")
+
+
+def changed_aircraft(plans: list) -> list:
+    """
+    Returns the aircraft whose extract added, changed or removed a template (the plans are named by aircraft).
+    """
+    return [p.name for p in plans if any(p.report(("added", "changed", "removed")).values())]
+
+
+
+def extract_aircraft_config(aircraft_name: str, save_root: str, output_location: Path, prune: bool = False, found_files: list = None, plan_file: Path = None, store: bool = None, check_conflicts: bool = False) -> dict:
+    """
+    Copies .diff.lua files from DCS Saved Game to the target location
+        Replacing GUIDs with placeholders (see plan_extract()).
+
+        Args:
+            aircraft_name: str - The DCS aircraft name (e.g., "FA-18C_hornet")
+            save_root: str - Optional override for DCS saved games path
+            output_location: Path - The target location where templates will be saved
+            prune: bool - Delete templates whose source controller no longer exists
+            found_files: list - Optional pre-scanned .diff.lua files (see helpers_dcs.scan_joystick_dirs)
+            plan_file: Path - Save the plan here for review instead of executing it
+            store: bool - Write into the template store (defaults to True when output_location already is one)
+            check_conflicts: bool - Check the templates for keys bound twice if anything changed (see binding_index)
+
+        Returns:
+            dict - Lists of template names under "added", "changed", "unchanged" and "removed"
+    """
+    helpers_generic.print_debug(f"extract_aircraft_config()")
+
+    if store is None:
+        store = template_store.is_store(output_location)
+
+    p = plan_extract(aircraft_name, save_root, output_location, prune, found_files, store)
+
+    if plan_file:
+        plan.save_plans([p], plan_file)
+        print(f"Wrote plan ({len(p.operations)} operations) to: {plan_file}")
+    else:
+        plan.execute_plans([p])
+        if check_conflicts and not helpers_generic.NO_ACTION and changed_aircraft([p]):
+            binding_index.check_conflicts(output_location, [aircraft_name])
+
+    print_summary(p)
+    return p.report(REPORT_KEYS)
+
+
+
+
+def extract_all(save_root: str, output_location: Path, aircraft_names: list = None, prune: bool = False, max_workers: int = 8, fprint_dir: Path = None, plan_file: Path = None, store: bool = None, check_conflicts: bool = False) -> dict:
+    """
+    Extracts templates for many aircraft from a single walk of Config/Input.
+    The same walk optionally feeds the machine fingerprint, and each aircraft is extracted in parallel.
+
+        Args:
+            save_root: str - Optional override for DCS saved games path
+            output_location: Path - The target location where templates will be saved
+            aircraft_names: list - Aircraft to extract, or None for every aircraft with a joystick folder
+            prune: bool - Delete templates whose source controller no longer exists
+            max_workers: int - Maximum number of aircraft extracted concurrently
+            fprint_dir: Path - If provided, also write the machine fingerprint here from the same scan
+            plan_file: Path - Save the plans here for review instead of executing them
+            store: bool - Write into the template store (defaults to True when output_location already is one)
+            check_conflicts: bool - Check the changed aircraft for keys bound twice (see binding_index)
+
+        Returns:
+            dict - aircraft name -> report from extract_aircraft_config()
+    """
+    helpers_generic.print_debug(f"extract_all()")
+
+    check_output_location(output_location)
+
+    input_path = helpers_dcs.get_input_path(save_root)
+    if not input_path.exists():
+        raise SystemExit(f"Error: Path {input_path} does not exist.")
+
+    if store is None:
+        store = template_store.is_store(output_location)
+
+    scan = helpers_dcs.scan_joystick_dirs(input_path)
+
+    if fprint_dir is not None:
+        fprintdcs.print_fingerprint_result(*fprintdcs.build_machine_fingerprint(save_root=save_root, dest_dir=fprint_dir, scan=scan))
+
+    if aircraft_names is None:
+        aircraft_names = list(scan)
+
+    missing = [name for name in aircraft_names if name not in scan]
+    for name in missing:
+        print(f"Error: No joystick folder for '{name}' at {input_path / name / 'joystick'}")
+
+    selected = [name for name in aircraft_names if name in scan]
+    print(f"Extracting {len(selected)} aircraft ({max_workers} workers).")
+
+    with helpers_generic.span("plan extract", "plan", aircraft=len(selected)), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(plan_extract, name, save_root, output_location, prune, [path for _, _, path in scan[name]], store)
+            for name in selected
+        ]
+        plans = [future.result() for future in futures]
+
+    if plan_file:
+        plan.save_plans(plans, plan_file)
+        print(f"Wrote {len(plans)} plans to: {plan_file}")
+    else:
+        plan.execute_plans(plans, max_workers)
+        changed = changed_aircraft(plans)
+        if check_conflicts and not helpers_generic.NO_ACTION and changed:
+            binding_index.check_conflicts(output_location, changed)
+
+    reports = {}
+    for p in plans:
+        print_summary(p)
+        reports[p.name] = p.report(REPORT_KEYS)
+
+    totals = {key: sum(len(r[key]) for r in reports.values()) for key in REPORT_KEYS}
+    print(f"Total: {totals['added']} added, {totals['changed']} changed, "
+          f"{totals['unchanged']} unchanged, {totals['removed']} removed")
+
+    return reports
 
 
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='extract_template')
-    parser.add_argument('aircraft', type=str, help='The DCS aircraft module name (e.g., FA-18C_hornet)')
+    parser.add_argument('aircraft', type=str, nargs='*', help='The DCS aircraft module name(s) (e.g., FA-18C_hornet)')
     
+    parser.add_argument('--all', action='store_true', help='Extract every aircraft found under Config/Input')
+
     parser.add_argument('--saveroot', type=str, 
                         help='Override DCS saved games path')
     
     parser.add_argument('--repotemplates', type=str, default=".", 
                         help='Target directory for extracted templates (Defaults to current folder)')
     
+    parser.add_argument('--repofprints', type=str,
+                        help='With --all or several aircraft: also write the machine fingerprint to this directory')
+    parser.add_argument('--workers', type=int, default=8, help='Maximum aircraft extracted in parallel')
+    parser.add_argument('--prune', action='store_true', help='Remove templates whose controller is no longer present')
+    parser.add_argument('--store', action='store_true', help='Write into the content-addressed template store (automatic if --repotemplates already is one)')
+    parser.add_argument('--plan', type=str, help='Write the plan to this JSON file instead of executing it (see plan.py)')
+    parser.add_argument('--checkconflicts', action='store_true', help='Warn about keys bound to two actions in the changed aircraft (see binding_index.py)')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     parser.add_argument('--noaction', action='store_true', help='Dry run: see what would happen')
+    parser.add_argument('--profile', type=str, nargs='?', const='extract_template_trace.json', help='Write a Chrome trace of the run (default: extract_template_trace.json) and print the slowest phases')
 
     args = parser.parse_args()
     helpers_generic.DEBUG = args.debug
     helpers_generic.NO_ACTION = args.noaction
 
-    extract_aircraft_config(args.aircraft, args.saveroot, Path(args.repotemplates))
\ No newline at end of file
+    if args.profile:
+        helpers_generic.start_profile()
+
+    try:
+        with helpers_generic.span("extract_template", "cli"):
+            if not args.all and not args.aircraft:
+                parser.error("give at least one aircraft name or --all")
+
+            if args.all or len(args.aircraft) > 1 or args.repofprints:
+                extract_all(
+                    args.saveroot,
+                    Path(args.repotemplates),
+                    None if args.all else args.aircraft,
+                    args.prune,
+                    args.workers,
+                    Path(args.repofprints) if args.repofprints else None,
+                    Path(args.plan) if args.plan else None,
+                    args.store or None,
+                    args.checkconflicts
+                )
+            else:
+                extract_aircraft_config(args.aircraft[0], args.saveroot, Path(args.repotemplates), args.prune,
+                                        plan_file=Path(args.plan) if args.plan else None, store=args.store or None,
+                                        check_conflicts=args.checkconflicts)
+    finally:
+        if args.profile:
+            helpers_generic.finish_profile(args.profile)
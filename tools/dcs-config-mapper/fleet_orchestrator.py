@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import sys
+from abc import ABC, abstractmethod
+import time
+import uuid
+from pathlib import Path
+import helpers_generic
+import fprintdcs
+import extract_template
+import restore_config
+
+# Constants
+TASKS = ("fingerprint", "extract", "restore")
+
+# Tasks that write to the shared template library run one host at a time
+TASK_LIMITS = {"extract": 1}
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_RETRIES = 1
+
+# Seconds before the first retry; doubled for each further attempt
+RETRY_BACKOFF = 1.0
+
+# Output lines kept per attempt for the failure report
+TAIL_LINES = 20
+
+# Stable machine GUIDs for host folders, which all share this machine's real hardware UUID
+LOCAL_HOST_NAMESPACE = uuid.UUID("5f0c6d1e-3a57-4d1b-9a0e-64636d617070")
+
+
+def synthetic_machine_guid(hostname: str) -> str:
+    return str(uuid.uuid5(LOCAL_HOST_NAMESPACE, hostname))
+
+
+class SubprocessTransport(ABC):
+    """
+    Runs each task as a worker process of this script and streams its output.
+    Subclasses decide where the worker runs by building its command line (see command()),
+    e.g. locally against a folder, or on the sim through a remote shell.
+    """
+
+    @abstractmethod
+    def hosts(self) -> list:
+        """
+        Returns the hostnames this transport can reach.
+        """
+
+    @abstractmethod
+    def command(self, hostname: str, task: str, options: dict) -> list:
+        """
+        Returns the command line that runs one task for one host.
+        """
+
+    async def run(self, hostname: str, task: str, options: dict, on_line, timeout: float) -> int:
+        """
+        Runs one task on one host.
+
+            Args:
+                hostname (str): The host
+                task (str): One of TASKS
+                options (dict): fprint_dir, template_root, aircraft_names, noaction and debug
+                on_line (callable): Called with each output line as it arrives
+                timeout (float): Seconds before the worker is killed
+
+            Returns:
+                int: The worker's exit code
+
+            Raises:
+                asyncio.TimeoutError: If the worker did not finish in time
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *self.command(hostname, task, options),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+
+        async def pump():
+            async for raw in proc.stdout:
+                on_line(raw.decode("utf-8", errors="replace").rstrip())
+            return await proc.wait()
+
+        try:
+            return await asyncio.wait_for(pump(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+
+
+class LocalTransport(SubprocessTransport):
+    """
+    Every host is a folder <host_root>/<hostname> laid out as a DCS Saved Games root (as in batch restores).
+    Workers run on this machine; each host gets its own stable machine GUID (see synthetic_machine_guid()).
+    """
+
+    def __init__(self, host_root: Path):
+        self.host_root = host_root.resolve()
+
+    def hosts(self) -> list:
+        if not self.host_root.is_dir():
+            raise SystemExit(f"Error: Host root '{self.host_root}' does not exist.")
+        return sorted(d.name for d in self.host_root.iterdir() if d.is_dir() and not d.name.startswith("."))
+
+    def command(self, hostname: str, task: str, options: dict) -> list:
+        argv = [sys.executable, str(Path(__file__).resolve()), task, "--worker", "--syntheticguid",
+                "--hostname", hostname,
+                "--saveroot", str(self.host_root / hostname),
+                "--repofprints", str(Path(options["fprint_dir"]).resolve()),
+                "--repotemplates", str(Path(options["template_root"]).resolve()),
+                "--aircraftlist", ",".join(options["aircraft_names"])]
+        if options.get("noaction"):
+            argv.append("--noaction")
+        if options.get("debug"):
+            argv.append("--debug")
+        return argv
+
+
+TRANSPORTS = {"local": LocalTransport}
+
+
+def run_worker_task(task: str, hostname: str, save_root: str, fprint_dir: Path, template_root: Path, aircraft_names: list, synthetic_guid: bool = False):
+    """
+    Runs one task for one host in this process (the worker side of a transport).
+
+        Args:
+            task (str): One of TASKS
+            hostname (str): The host the task runs for
+            save_root (str): The host's DCS Saved Games root
+            fprint_dir (Path): The fingerprint directory
+            template_root (Path): The template library
+            aircraft_names (list): Aircraft names, or ["all"]
+            synthetic_guid (bool): Use synthetic_machine_guid() instead of the hardware UUID
+
+        Returns:
+            None
+    """
+    helpers_generic.print_debug(f"run_worker_task({task}, {hostname})")
+
+    if synthetic_guid:
+        fprintdcs.MACHINE_GUID_PROVIDER = lambda: synthetic_machine_guid(hostname)
+
+    if task == "fingerprint":
+        fprintdcs.print_fingerprint_result(*fprintdcs.build_machine_fingerprint(save_root=save_root, dest_dir=fprint_dir, hostname=hostname))
+    elif task == "extract":
+        extract_template.extract_all(save_root, template_root, None if aircraft_names == ["all"] else aircraft_names)
+    else:
+        if aircraft_names == ["all"]:
+            aircraft_names = restore_config.list_template_aircraft(template_root)
+        for aircraft_name in aircraft_names:
+            restore_config.restore_aircraft_config(aircraft_name, hostname, fprint_dir, template_root, save_root)
+
+
+async def _run_with_retries(transport, hostname: str, task: str, options: dict, timeout: float, retries: int, on_event) -> dict:
+    """
+    Runs one task on one host, retrying failures and timeouts with exponential backoff.
+
+        Returns:
+            dict: task, ok, attempts, seconds, error and the last output lines of the final attempt
+    """
+    start = time.perf_counter()
+    for attempt in range(1, retries + 2):
+        tail = []
+
+        def on_line(line, tail=tail):
+            tail.append(line)
+            del tail[:-TAIL_LINES]
+            on_event(hostname, "output", line)
+
+        try:
+            code = await transport.run(hostname, task, options, on_line, timeout)
+            error = None if code == 0 else f"exit code {code}"
+        except asyncio.TimeoutError:
+            error = f"timed out after {timeout:g}s"
+        except OSError as e:
+            error = f"could not start worker: {e}"
+
+        if error is None or attempt > retries:
+            return {"task": task, "ok": error is None, "attempts": attempt,
+                    "seconds": time.perf_counter() - start, "error": error, "tail": tail}
+
+        on_event(hostname, "retry", f"{task}: {error}, retry {attempt}/{retries}")
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+
+
+async def orchestrate(transport, hostnames: list, tasks: list, options: dict, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES, on_event=None) -> dict:
+    """
+    Runs a task pipeline on many hosts at once.
+    Each host runs its tasks in order and stops at the first failure; hosts run concurrently up to
+    `concurrency`, and tasks in TASK_LIMITS are further limited across hosts.
+    So the whole rollout takes about as long as the slowest host, not the sum of all hosts.
+
+        Args:
+            transport: A transport (see SubprocessTransport)
+            hostnames (list): The hosts
+            tasks (list): Task names from TASKS, run in order on each host
+            options (dict): Passed to the transport (fprint_dir, template_root, aircraft_names, noaction, debug)
+            concurrency (int): Maximum hosts running at once
+            timeout (float): Seconds per task attempt
+            retries (int): Extra attempts for a failed or timed out task
+            on_event (callable): Called with (hostname, kind, detail) as the rollout progresses
+
+        Returns:
+            dict: hostname -> {"ok": bool, "seconds": float (including time queued for TASK_LIMITS), "tasks": [task results]}
+    """
+    on_event = on_event or (lambda hostname, kind, detail: None)
+    host_limit = asyncio.Semaphore(concurrency)
+    task_limits = {task: asyncio.Semaphore(limit) for task, limit in TASK_LIMITS.items()}
+
+    async def run_host(hostname: str) -> dict:
+        async with host_limit:
+            start = time.perf_counter()
+            on_event(hostname, "start", ",".join(tasks))
+            results = []
+            for task in tasks:
+                limit = task_limits.get(task)
+                if limit is not None:
+                    async with limit:
+                        result = await _run_with_retries(transport, hostname, task, options, timeout, retries, on_event)
+                else:
+                    result = await _run_with_retries(transport, hostname, task, options, timeout, retries, on_event)
+                results.append(result)
+                on_event(hostname, "task", result)
+                if not result["ok"]:
+                    break
+            host = {"ok": all(r["ok"] for r in results), "seconds": time.perf_counter() - start, "tasks": results}
+            on_event(hostname, "done", host)
+            return host
+
+    results = await asyncio.gather(*(run_host(hostname) for hostname in hostnames))
+    return dict(zip(hostnames, results))
+
+
+class ProgressPrinter:
+    """
+    Streams rollout progress: one line per finished task and host, and the workers' output when verbose.
+    """
+
+    def __init__(self, total: int, verbose: bool = False):
+        self.total = total
+        self.done = 0
+        self.verbose = verbose
+
+    def __call__(self, hostname: str, kind: str, detail):
+        if kind == "output":
+            if self.verbose:
+                print(f"  [{hostname}] {detail}")
+        elif kind == "retry":
+            print(f"  [{hostname}] [RETRY] {detail}")
+        elif kind == "task":
+            status = "OK" if detail["ok"] else f"FAILED ({detail['error']})"
+            print(f"  [{hostname}] {detail['task']}: {status} in {detail['seconds']:.1f}s")
+            if not detail["ok"] and not self.verbose:
+                for line in detail["tail"]:
+                    print(f"  [{hostname}]   {line}")
+        elif kind == "done":
+            self.done += 1
+            print(f"[{self.done}/{self.total}] {hostname} {'done' if detail['ok'] else 'FAILED'} ({detail['seconds']:.1f}s)")
+
+
+def print_rollout_summary(results: dict, elapsed: float):
+    failed = sorted(hostname for hostname, host in results.items() if not host["ok"])
+    # A host's "seconds" includes time queued behind other hosts (TASK_LIMITS), so only task time is summed
+    busy = {hostname: sum(task["seconds"] for task in host["tasks"]) for hostname, host in results.items()}
+    slowest = max(busy, key=busy.get, default=None)
+
+    print("\n--- Rollout Report ---")
+    print(f"{len(results) - len(failed)} hosts succeeded, {len(failed)} failed in {elapsed:.1f}s "
+          f"(slowest host {slowest} {busy.get(slowest, 0.0):.1f}s, {sum(busy.values()):.1f}s if run one at a time)")
+    for hostname in failed:
+        print(f"  [FAILED] {hostname}: {results[hostname]['tasks'][-1]['task']}: {results[hostname]['tasks'][-1]['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='fleet_orchestrator', description='Run fingerprint, extract and restore across many hosts at once.')
+    parser.add_argument('tasks', type=str, help=f'Comma separated tasks run in order on each host: {", ".join(TASKS)}')
+    parser.add_argument('--transport', choices=list(TRANSPORTS), default="local", help='How hosts are reached')
+    parser.add_argument('--hostroot', type=str, default=".", help='local: folder holding one Saved Games root per host')
+    parser.add_argument('--hosts', type=str, default="all", help='Comma separated hostnames, or "all"')
+    parser.add_argument('--aircraftlist', type=str, default="all", help='Comma separated aircraft names, or "all"')
+    parser.add_argument('--repofprints', type=str, default=".", help='Fingerprint directory')
+    parser.add_argument('--repotemplates', type=str, default=".", help='Templates directory')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Maximum hosts running at once')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds per task attempt')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='Extra attempts for a failed task')
+    parser.add_argument('--verbose', action='store_true', help="Stream every worker's output")
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--noaction', action='store_true', help='Dry run: see what would happen')
+    # Worker side of a transport: run one task for one host in this process
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--hostname', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--saveroot', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--syntheticguid', action='store_true', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+    helpers_generic.NO_ACTION = args.noaction
+
+    tasks = args.tasks.split(",")
+    unknown = [task for task in tasks if task not in TASKS]
+    if unknown:
+        parser.error(f"unknown task(s): {', '.join(unknown)}")
+
+    if args.worker:
+        run_worker_task(tasks[0], args.hostname, args.saveroot, Path(args.repofprints), Path(args.repotemplates),
+                        args.aircraftlist.split(","), args.syntheticguid)
+        raise SystemExit(0)
+
+    transport = TRANSPORTS[args.transport](Path(args.hostroot))
+    hostnames = transport.hosts() if args.hosts == "all" else args.hosts.split(",")
+    options = {
+        "fprint_dir": args.repofprints,
+        "template_root": args.repotemplates,
+        "aircraft_names": args.aircraftlist.split(","),
+        "noaction": args.noaction,
+        "debug": args.debug,
+    }
+
+    print(f"Running {', '.join(tasks)} on {len(hostnames)} hosts ({args.concurrency} at a time).")
+    start = time.perf_counter()
+    results = asyncio.run(orchestrate(transport, hostnames, tasks, options, args.concurrency, args.timeout,
+                                      args.retries, ProgressPrinter(len(hostnames), args.verbose)))
+    print_rollout_summary(results, time.perf_counter() - start)
+    if any(not host["ok"] for host in results.values()):
+        raise SystemExit(1)
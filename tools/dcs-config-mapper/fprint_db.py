@@ -0,0 +1,301 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+import helpers_generic
+import fprint_index
+
+# Constants
+DB_FILENAME = ".fingerprints.sqlite"
+DB_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS machines (
+    machine_guid TEXT PRIMARY KEY,
+    hostname TEXT,
+    last_seen TEXT,
+    schema_version INTEGER,
+    source_file TEXT
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    hostname TEXT PRIMARY KEY,
+    machine_guid TEXT NOT NULL,
+    last_seen TEXT,
+    source_file TEXT
+);
+CREATE TABLE IF NOT EXISTS controllers (
+    machine_guid TEXT NOT NULL,
+    controller_name TEXT NOT NULL,
+    instance_id INTEGER NOT NULL,
+    dcs_guid TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_hosts_machine ON hosts (machine_guid);
+CREATE INDEX IF NOT EXISTS idx_controllers_machine ON controllers (machine_guid);
+CREATE INDEX IF NOT EXISTS idx_controllers_name ON controllers (controller_name, instance_id);
+CREATE INDEX IF NOT EXISTS idx_controllers_guid ON controllers (dcs_guid);
+"""
+
+
+def _files_signature(index: dict) -> str:
+    """
+    Summarizes the fingerprint files (name, mtime and size) so a stale database can be detected cheaply.
+    """
+    files = index["files"]
+    text = json.dumps([(name, files[name].get("mtime_ns"), files[name].get("size")) for name in sorted(files)])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _newest_first(records: list) -> list:
+    """
+    Orders (filename, record) pairs by newest last_seen, then filename, so duplicates resolve deterministically.
+    """
+    return sorted(records, key=lambda item: (item[1].get("last_seen") or "", item[0]), reverse=True)
+
+
+def import_json_dir(conn: sqlite3.Connection, fprint_dir: Path) -> dict:
+    """
+    Replaces the database contents with the fingerprint JSON files of a directory.
+    Files describing the same machine_guid are merged: the newest last_seen provides the controllers,
+    and every hostname they used keeps resolving to that machine.
+
+        Args:
+            conn (sqlite3.Connection): An open store (see open_store())
+            fprint_dir (Path): The fingerprint directory
+
+        Returns:
+            dict: Counts of "files", "machines", "hosts" and "duplicates" (machine_guids seen in more than one file)
+    """
+    helpers_generic.print_debug(f"fprint_db.import_json_dir({fprint_dir})")
+
+    index = fprint_index.load_fingerprint_index(fprint_dir)
+
+    by_machine = {}
+    for name in sorted(index["files"]):
+        try:
+            with open(fprint_dir / name, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            print(f"Warning: Skipping unreadable fingerprint {name}")
+            continue
+        if not isinstance(record, dict) or not record.get("machine_guid"):
+            print(f"Warning: Skipping fingerprint without machine_guid {name}")
+            continue
+        by_machine.setdefault(record["machine_guid"], []).append((name, record))
+
+    hosts = {}
+    with helpers_generic.span("import fingerprints", "db"), conn:
+        conn.execute("DELETE FROM machines")
+        conn.execute("DELETE FROM hosts")
+        conn.execute("DELETE FROM controllers")
+
+        for machine_guid, records in by_machine.items():
+            records = _newest_first(records)
+            name, newest = records[0]
+            conn.execute(
+                "INSERT INTO machines (machine_guid, hostname, last_seen, schema_version, source_file) VALUES (?, ?, ?, ?, ?)",
+                (machine_guid, newest.get("hostname"), newest.get("last_seen"), newest.get("schema_version"), name))
+            conn.executemany(
+                "INSERT INTO controllers (machine_guid, controller_name, instance_id, dcs_guid) VALUES (?, ?, ?, ?)",
+                [(machine_guid, c["controller_name"], c["instance_id"], c["dcs_guid"]) for c in newest.get("controllers", [])])
+
+            for file_name, record in records:
+                if record.get("hostname"):
+                    hosts.setdefault(record["hostname"], []).append((file_name, record))
+
+        for hostname, records in hosts.items():
+            records = _newest_first(records)
+            if len({r.get("machine_guid") for _, r in records}) > 1:
+                print(f"Warning: Hostname '{hostname}' is claimed by {len(records)} machines, using {records[0][0]}")
+            file_name, record = records[0]
+            conn.execute("INSERT INTO hosts (hostname, machine_guid, last_seen, source_file) VALUES (?, ?, ?, ?)",
+                         (hostname, record["machine_guid"], record.get("last_seen"), file_name))
+
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (_files_signature(index),))
+
+    return {
+        "files": sum(len(records) for records in by_machine.values()),
+        "machines": len(by_machine),
+        "hosts": len(hosts),
+        "duplicates": sum(1 for records in by_machine.values() if len(records) > 1),
+    }
+
+
+def _connect(db_path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None or int(row[0]) != DB_VERSION:
+        # The store is rebuilt from JSON, so an old layout is simply cleared
+        with conn:
+            conn.execute("DELETE FROM meta")
+            conn.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(DB_VERSION),))
+    return conn
+
+
+def open_store(fprint_dir: Path, db_path: Path = None) -> sqlite3.Connection:
+    """
+    Opens the fingerprint database for a directory, re-importing the JSON files if any of them changed.
+    The database is a cache of the JSON files; if it cannot be written next to them an in-memory copy is used.
+
+        Args:
+            fprint_dir (Path): The fingerprint directory
+            db_path (Path): Optional database location (defaults to <fprint_dir>/.fingerprints.sqlite)
+
+        Returns:
+            sqlite3.Connection: The open, up to date store
+    """
+    helpers_generic.print_debug(f"fprint_db.open_store({fprint_dir})")
+
+    if not fprint_dir.exists():
+        raise SystemExit(f"Error: Fingerprint path '{fprint_dir}' not found.")
+
+    db_path = db_path or fprint_dir / DB_FILENAME
+    try:
+        conn = _connect(db_path)
+    except sqlite3.Error as e:
+        helpers_generic.print_debug(f"  Could not open {db_path} ({e}), using an in-memory store")
+        conn = _connect(":memory:")
+
+    row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+    if row is None or row[0] != _files_signature(fprint_index.load_fingerprint_index(fprint_dir)):
+        try:
+            import_json_dir(conn, fprint_dir)
+        except sqlite3.OperationalError as e:
+            helpers_generic.print_debug(f"  Could not update {db_path} ({e}), using an in-memory store")
+            conn.close()
+            conn = _connect(":memory:")
+            import_json_dir(conn, fprint_dir)
+
+    return conn
+
+
+def _machine_record(conn: sqlite3.Connection, machine_guid: str) -> dict:
+    """
+    Rebuilds a fingerprint record (the JSON layout) for one machine.
+    """
+    row = conn.execute("SELECT hostname, last_seen, schema_version FROM machines WHERE machine_guid = ?", (machine_guid,)).fetchone()
+    if row is None:
+        return None
+
+    controllers = conn.execute(
+        "SELECT controller_name, dcs_guid, instance_id FROM controllers WHERE machine_guid = ? ORDER BY rowid",
+        (machine_guid,)).fetchall()
+    return {
+        "schema_version": row[2],
+        "machine_guid": machine_guid,
+        "hostname": row[0],
+        "last_seen": row[1],
+        "controllers": [{"controller_name": n, "dcs_guid": g, "instance_id": i} for n, g, i in controllers],
+    }
+
+
+def find_by_hostname(conn: sqlite3.Connection, hostname: str) -> dict:
+    """
+    Returns the fingerprint for a hostname (any hostname the machine has used), or None.
+    """
+    row = conn.execute("SELECT machine_guid FROM hosts WHERE hostname = ?", (hostname,)).fetchone()
+    return _machine_record(conn, row[0]) if row else None
+
+
+def find_by_machine_guid(conn: sqlite3.Connection, machine_guid: str) -> dict:
+    """
+    Returns the fingerprint for a machine_guid, or None.
+    """
+    return _machine_record(conn, machine_guid)
+
+
+def list_hosts(conn: sqlite3.Connection) -> list:
+    """
+    Lists every known machine once, under its current hostname (older hostnames only resolve in find_by_hostname()).
+
+        Returns:
+            list: (hostname, machine_guid, last_seen) tuples sorted by hostname
+    """
+    return conn.execute("SELECT hostname, machine_guid, last_seen FROM machines ORDER BY hostname, machine_guid").fetchall()
+
+
+def hosts_with_controller(conn: sqlite3.Connection, controller_name: str, instance_id: int = None) -> list:
+    """
+    Finds the hosts that have a controller, e.g. every sim with a second Bravo Throttle Quadrant.
+
+        Args:
+            conn (sqlite3.Connection): An open store
+            controller_name (str): The DCS controller name
+            instance_id (int): Optional instance (2 for the second identical device)
+
+        Returns:
+            list: (hostname, machine_guid, instance_id, dcs_guid) tuples, one per machine and instance, sorted by hostname
+    """
+    query = ("SELECT m.hostname, c.machine_guid, c.instance_id, c.dcs_guid FROM controllers c "
+             "JOIN machines m ON m.machine_guid = c.machine_guid WHERE c.controller_name = ?")
+    params = [controller_name]
+    if instance_id is not None:
+        query += " AND c.instance_id = ?"
+        params.append(instance_id)
+    return conn.execute(query + " ORDER BY m.hostname, c.instance_id", params).fetchall()
+
+
+def hosts_with_dcs_guid(conn: sqlite3.Connection, dcs_guid: str) -> list:
+    """
+    Finds the hosts that have a specific device GUID.
+
+        Returns:
+            list: (hostname, machine_guid, controller_name, instance_id) tuples, one per machine, sorted by hostname
+    """
+    return conn.execute(
+        "SELECT m.hostname, c.machine_guid, c.controller_name, c.instance_id FROM controllers c "
+        "JOIN machines m ON m.machine_guid = c.machine_guid WHERE c.dcs_guid = ? ORDER BY m.hostname",
+        (dcs_guid,)).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='fprint_db', description='Query the fingerprint database.')
+    parser.add_argument('command', choices=['import', 'hosts', 'host', 'machine', 'controller', 'guid'])
+    parser.add_argument('value', nargs='?', help='host: hostname. machine: machine_guid. controller: controller name. guid: DCS device GUID')
+    parser.add_argument('--instance', type=int, help='controller: only this instance_id')
+    parser.add_argument('--repofprints', type=str, default=".", help='Fingerprint directory')
+    parser.add_argument('--db', type=str, help=f'Database file (defaults to <repofprints>/{DB_FILENAME})')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    fprint_dir = Path(args.repofprints)
+    db_path = Path(args.db) if args.db else None
+
+    if args.command != "import" and args.command != "hosts" and not args.value:
+        parser.error(f"{args.command} needs a value")
+
+    if args.command == "import":
+        conn = _connect(db_path or fprint_dir / DB_FILENAME)
+        stats = import_json_dir(conn, fprint_dir)
+        print(f"Imported {stats['files']} files: {stats['machines']} machines, {stats['hosts']} hostnames, "
+              f"{stats['duplicates']} machine_guids with more than one file.")
+    else:
+        conn = open_store(fprint_dir, db_path)
+        if args.command == "hosts":
+            for hostname, machine_guid, last_seen in list_hosts(conn):
+                print(f"{hostname:30} {machine_guid}  {last_seen}")
+        elif args.command == "host":
+            record = find_by_hostname(conn, args.value)
+            if not record:
+                raise SystemExit(f"Error: No fingerprint found for hostname '{args.value}'")
+            print(json.dumps(record, indent=2))
+        elif args.command == "machine":
+            record = find_by_machine_guid(conn, args.value)
+            if not record:
+                raise SystemExit(f"Error: No fingerprint found for machine_guid '{args.value}'")
+            print(json.dumps(record, indent=2))
+        elif args.command == "controller":
+            for hostname, machine_guid, instance_id, dcs_guid in hosts_with_controller(conn, args.value, args.instance):
+                print(f"{hostname:30} instance {instance_id}  {dcs_guid}")
+        else:
+            for hostname, machine_guid, controller_name, instance_id in hosts_with_dcs_guid(conn, args.value):
+                print(f"{hostname:30} {controller_name} (instance {instance_id})")
+
+    conn.close()
@@ -0,0 +1,83 @@
+import json
+import os
+from pathlib import Path
+import helpers_generic
+
+# Constants
+INDEX_FILENAME = ".fingerprint_index.json"
+INDEX_VERSION = 2
+
+
+def _load_index_file(index_path: Path) -> dict:
+    """
+    Loads the on-disk index, returning an empty index if it is missing, corrupt or from another version.
+
+        Args:
+            index_path (Path): The index file location
+
+        Returns:
+            dict: The raw index data
+    """
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION and isinstance(data.get("files"), dict):
+            return data
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+
+    return {"version": INDEX_VERSION, "files": {}}
+
+
+def load_fingerprint_index(search_path: Path) -> dict:
+    """
+    Loads the fingerprint index for a directory: the name, mtime and size of every fingerprint file.
+    Only the directory is scanned (no file is opened), and the index is written back to disk when anything was added, changed or removed.
+
+        Args:
+            search_path (Path): The fingerprint directory
+
+        Returns:
+            dict: The index containing:
+                - files (dict): filename -> {mtime_ns, size}
+    """
+    helpers_generic.print_debug(f"load_fingerprint_index({search_path})")
+
+    index_path = search_path / INDEX_FILENAME
+    index = _load_index_file(index_path)
+    old_files = index["files"]
+    files = {}
+    dirty = False
+
+    with os.scandir(search_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or entry.name == INDEX_FILENAME or not entry.is_file():
+                continue
+
+            st = entry.stat()
+            cached = old_files.get(entry.name)
+            if cached and cached.get("mtime_ns") == st.st_mtime_ns and cached.get("size") == st.st_size:
+                files[entry.name] = cached
+                continue
+
+            helpers_generic.print_debug(f"  Indexing: {entry.name}")
+            files[entry.name] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            dirty = True
+
+    # Files that disappeared since the last run
+    if set(old_files) - set(files):
+        dirty = True
+
+    index = {"version": INDEX_VERSION, "files": files}
+
+    if dirty:
+        # The index is a cache, so a read-only fingerprint folder is not an error
+        try:
+            with helpers_generic.span("write fingerprint index", "io"):
+                tmp_path = index_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+                tmp_path.replace(index_path)
+        except OSError as e:
+            helpers_generic.print_debug(f"  Could not write index {index_path}: {e}")
+
+    return index
@@ -1,6 +1,9 @@
 import json
+import os
 import socket
-import re
+import sys
+import time
+import uuid
 import argparse
 import subprocess
 
@@ -13,15 +16,31 @@ import helpers_dcs
 # Constants
 SCHEMA_VERSION = 1
 
+# Local cache of the hardware UUID (see get_machine_guid())
+STATE_DIRNAME = "dcs-config-mapper"
+GUID_STATE_FILENAME = "machine_guid.json"
+GUID_STATE_VERSION = 1
 
+# An unchanged fingerprint only has its last_seen refreshed once it is this old
+LAST_SEEN_STALE_DAYS = 30
 
-def get_dcs_controllers(save_root: str = None) -> list:
+# Watch mode polling (seconds)
+WATCH_INTERVAL = 2.0
+WATCH_DEBOUNCE = 1.0
+
+# Optional callable returning the machine GUID; bypasses the hardware providers and the cache (for tests)
+MACHINE_GUID_PROVIDER = None
+
+
+
+def get_dcs_controllers(save_root: str = None, scan: dict = None) -> list:
     """
     Scans DCS config files to find registered joystick devices.
     Tracks multiple instances of the same hardware name.
     
         Args:
-            None
+            save_root (str): The root path name where DCS saved games are stored.
+            scan (dict): Optional result of helpers_dcs.scan_joystick_dirs() to reuse instead of walking Config/Input again.
         
         Returns:
             controllers (list): A list of dictionaries containing controller metadata
@@ -45,41 +64,35 @@ def get_dcs_controllers(save_root: str = None) -> list:
         print(f"Error: Path {input_path} does not exist.")
         raise SystemExit(1)
 
-    # Regex to extract "Name" and "{GUID}" from "Name {GUID}.diff.lua"
-    # Matches: Joy Name {1234-5678...}
-    pattern = re.compile(r"^(.*)\s+({.*})\.diff\.lua$")
-    
     # Track how many times we've seen a specific controller name
     # to handle identical hardware devices.
     seen_guids = set()
 
-    # Walk through the Input folder to find joystick subfolders
-    # Sort the directories so we process aircraft in a fixed order (A-10 before F-16)
-    for joy_dir in sorted(input_path.glob("**/joystick")):        
+    # Walk through the Input folder's joystick subfolders
+    # The scan is already sorted so we process aircraft in a fixed order (A-10 before F-16)
+    # and the files in each folder so {666} ALWAYS comes before {777}
+    if scan is None:
+        scan = helpers_dcs.scan_joystick_dirs(input_path)
+
+    for configs in scan.values():
 
         # instance_id is per-aircraft
         name_counts = {} 
         
-        # Use sorted() to make instance_id assignment deterministic
-        # This sort the files so {666} ALWAYS comes before {777}
-        for file in sorted(joy_dir.glob("*.diff.lua")):
-            match = pattern.match(file.name)
-            if match:
-                ctrl_name = match.group(1).strip()
-                ctrl_guid = match.group(2).strip()
-
-                # Increment the instance count BEFORE the seen_guids check
-                # so that the 2nd joystick in a folder is always "Instance 2"
-                instance_count = name_counts.get(ctrl_name, 0) + 1
-                name_counts[ctrl_name] = instance_count
-
-                if ctrl_guid not in seen_guids:
-                    controllers.append({
-                        "controller_name": ctrl_name,
-                        "dcs_guid": ctrl_guid,
-                        "instance_id": instance_count  # Helps DPM-003 match dual-sticks
-                    })
-                    seen_guids.add(ctrl_guid)
+        for ctrl_name, ctrl_guid, _ in configs:
+
+            # Increment the instance count BEFORE the seen_guids check
+            # so that the 2nd joystick in a folder is always "Instance 2"
+            instance_count = name_counts.get(ctrl_name, 0) + 1
+            name_counts[ctrl_name] = instance_count
+
+            if ctrl_guid not in seen_guids:
+                controllers.append({
+                    "controller_name": ctrl_name,
+                    "dcs_guid": ctrl_guid,
+                    "instance_id": instance_count  # Helps DPM-003 match dual-sticks
+                })
+                seen_guids.add(ctrl_guid)
 
     # We will not hard-exit here if a machine simply has no sticks yet
     if not controllers:
@@ -91,13 +104,193 @@ def get_dcs_controllers(save_root: str = None) -> list:
 
 
 
-def get_machine_guid() -> str:
+def _normalize_uuid(value: str) -> str:
+    """
+    Formats a hardware UUID the way WMIC reports it (upper case, dashed).
+
+        Args:
+            value (str): A UUID with or without braces and dashes
+
+        Returns:
+            str: The normalized UUID, or None if the value is not a usable UUID
+    """
+    if not value:
+        return None
+    try:
+        normalized = str(uuid.UUID(value.strip().strip("{}"))).upper()
+    except ValueError:
+        return None
+
+    # Boards without a programmed UUID report all zeros or all Fs
+    if normalized.replace("-", "") in ("0" * 32, "F" * 32):
+        return None
+    return normalized
+
+
+def _windows_smbios_uuid() -> str:
+    """
+    Reads the system UUID from the raw SMBIOS table (the value WMIC's csproduct reports), without a subprocess.
+    """
+    import ctypes
+
+    get_table = ctypes.windll.kernel32.GetSystemFirmwareTable
+    provider = int.from_bytes(b"RSMB", "big")
+    size = get_table(provider, 0, None, 0)
+    if not size:
+        return None
+    buffer = ctypes.create_string_buffer(size)
+    if get_table(provider, 0, buffer, size) != size:
+        return None
+    return _smbios_system_uuid(buffer.raw)
+
+
+def _smbios_system_uuid(data: bytes) -> str:
+    """
+    Finds the System Information (type 1) UUID in a RawSMBIOSData blob.
+
+        Args:
+            data (bytes): The RSMB firmware table
+
+        Returns:
+            str: The normalized UUID, or None if the table has none
+    """
+    # RawSMBIOSData: calling method, major, minor, DMI revision, table length, table
+    major, minor = data[1], data[2]
+    table = data[8:8 + int.from_bytes(data[4:8], "little")]
+
+    offset = 0
+    while offset + 4 <= len(table):
+        struct_type, struct_len = table[offset], table[offset + 1]
+        if struct_len < 4 or struct_type == 127:
+            break
+        if struct_type == 1 and struct_len >= 0x19:
+            raw = table[offset + 8:offset + 24]
+            # SMBIOS 2.6 and later store the first three fields little endian
+            value = uuid.UUID(bytes_le=raw) if (major, minor) >= (2, 6) else uuid.UUID(bytes=raw)
+            return _normalize_uuid(str(value))
+        # Skip the formatted area and the string set that ends with a double NUL
+        end = table.find(b"\0\0", offset + struct_len)
+        if end < 0:
+            break
+        offset = end + 2
+    return None
+
+
+def _windows_registry_uuid() -> str:
+    """
+    Reads the SMBIOS system UUID Windows records under HKLM\\SYSTEM\\HardwareConfig.
+    """
+    import winreg
+
+    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\HardwareConfig") as key:
+        value, _ = winreg.QueryValueEx(key, "LastConfig")
+    return _normalize_uuid(value)
+
+
+def _wmic_uuid() -> str:
+    """
+    Asks WMIC for the hardware UUID. This is the slow fallback (a subprocess, and wmic is deprecated in Windows 10/11).
+    """
+    output = subprocess.check_output(["wmic", "csproduct", "get", "uuid"], stderr=subprocess.DEVNULL).decode()
+
+    # The output typically looks like this (including blank lines):
+    #     UUID
+    #     12345678-1234-1234-1234-123456789ABC
+    # so the UUID is the second non-blank line.
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    return _normalize_uuid(lines[1]) if len(lines) >= 2 else None
+
+
+def _linux_dmi_uuid() -> str:
+    """
+    Reads the SMBIOS system UUID exposed by the kernel (usually readable by root only).
+    """
+    return _normalize_uuid(Path("/sys/class/dmi/id/product_uuid").read_text(encoding="ascii"))
+
+
+def _linux_machine_id() -> str:
+    """
+    Reads the systemd machine id, formatted as a UUID.
+    """
+    for path in ("/etc/machine-id", "/var/lib/dbus/machine-id"):
+        try:
+            return _normalize_uuid(Path(path).read_text(encoding="ascii"))
+        except OSError:
+            continue
+    return None
+
+
+def get_machine_guid_providers() -> list:
+    """
+    Returns the hardware UUID providers for this platform, fastest and most faithful first.
+
+        Returns:
+            list: (name, callable) pairs; each callable returns a UUID or None
+    """
+    if MACHINE_GUID_PROVIDER is not None:
+        return [("injected", MACHINE_GUID_PROVIDER)]
+    if sys.platform == "win32":
+        return [("smbios", _windows_smbios_uuid), ("registry", _windows_registry_uuid), ("wmic", _wmic_uuid)]
+    if sys.platform.startswith("linux"):
+        return [("dmi", _linux_dmi_uuid), ("machine-id", _linux_machine_id)]
+    return []
+
+
+def get_guid_state_file() -> Path:
+    """
+    Returns where the resolved hardware UUID is cached for this user.
+
+        Returns:
+            Path: %LOCALAPPDATA%\\dcs-config-mapper\\machine_guid.json, or $XDG_CACHE_HOME/dcs-config-mapper/machine_guid.json
+    """
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"])
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / STATE_DIRNAME / GUID_STATE_FILENAME
+
+
+def _load_cached_guid(state_file: Path, hostname: str) -> str:
+    """
+    Returns the cached hardware UUID if it was recorded on this hostname.
+    """
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if state.get("version") != GUID_STATE_VERSION or state.get("hostname") != hostname:
+        return None
+    return _normalize_uuid(state.get("machine_guid"))
+
+
+def _save_cached_guid(state_file: Path, hostname: str, machine_guid: str, provider: str):
+    """
+    Records the resolved hardware UUID. The state file is only a cache, so failures are not errors.
+    """
+    state = {"version": GUID_STATE_VERSION, "hostname": hostname, "machine_guid": machine_guid, "provider": provider}
+    try:
+        state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_file.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        tmp_path.replace(state_file)
+    except OSError as e:
+        helpers_generic.print_debug(f"  Could not write {state_file}: {e}")
+
+
+def get_machine_guid(hostname: str = None, state_file: Path = None, refresh: bool = False) -> str:
     """
-    Retrieves the unique Hardware UUID from the BIOS via WMIC.
+    Retrieves the unique Hardware UUID of the machine (the SMBIOS system UUID).
     This is unique per physical machine, regardless of OS cloning.
+    The value is cached in a local state file and reused while the hostname matches,
+    so normal runs never start a subprocess. On a cache miss the platform providers are tried in order
+    (see get_machine_guid_providers()); set MACHINE_GUID_PROVIDER to inject a value in tests.
     
         Args:
-            None
+            hostname (str): The current hostname (looked up if not given)
+            state_file (Path): Override for the cache file (see get_guid_state_file())
+            refresh (bool): Ignore the cached value and query the hardware again
         
         Returns:
             uuid: the unique hardware key of the machine from the motherboard
@@ -105,37 +298,32 @@ def get_machine_guid() -> str:
     """
     helpers_generic.print_debug("get_machine_guid()")
 
-    try:
-        # Executes the wmic command to get the UUID
-        # Note that wmic is deprecated in Windows 10/11, but it is still widely available and works for this purpose.
-        cmd = 'wmic csproduct get uuid'
-        output = subprocess.check_output(cmd, shell=True).decode()
-        
-        # The output from the shell typically looks like this (including blank lines):
-        #     UUID
-        #     12345678-1234-1234-1234-123456789ABC
-        #
-        #
-        # From which we need to extract the UUID value itself.
-        # The algorithm for this is:
-        #     splitlines() returns a list of lines (including blank lines)
-        #     strip() removes whitespace if a line exists - in doing this the blank lines become enpty strings and the if return False so they are filtered out
-        #     Finally, the list is stripped again to remove any remaining whitespace.
-        # So
-        #     Parsing the output returns: ['UUID', 'XXXX-XXXX...'])
-        # We then take the second value in the list as the UUID as long as there are at least two lines of output.
-        lines = [line.strip() for line in output.splitlines() if line.strip()]
-        
-        if len(lines) < 2:
-            raise ValueError("No UUID returned from WMIC.")
-            
-        uuid = lines[1]
-        print(f"Found Hardware UUID: {uuid}")
-        return uuid
+    if MACHINE_GUID_PROVIDER is not None:
+        return MACHINE_GUID_PROVIDER()
 
-    except Exception as e:
-        print(f"Error: Failed to retrieve Hardware UUID: {e}")
-        raise SystemExit(1)
+    hostname = hostname or get_hostname()
+    state_file = state_file or get_guid_state_file()
+
+    if not refresh:
+        cached = _load_cached_guid(state_file, hostname)
+        if cached:
+            helpers_generic.print_debug(f"  Using cached Hardware UUID from {state_file}")
+            return cached
+
+    with helpers_generic.span("machine GUID lookup", "system"):
+        for name, provider in get_machine_guid_providers():
+            try:
+                machine_guid = provider()
+            except Exception as e:
+                helpers_generic.print_debug(f"  Provider {name} failed: {e}")
+                continue
+            if machine_guid:
+                print(f"Found Hardware UUID: {machine_guid} (via {name})")
+                _save_cached_guid(state_file, hostname, machine_guid, name)
+                return machine_guid
+
+    print(f"Error: Failed to retrieve Hardware UUID on {sys.platform}.")
+    raise SystemExit(1)
 
 
 
@@ -163,53 +351,212 @@ def get_hostname() -> str:
 
 
 
-def build_machine_record(save_root: str = None) -> dict:
+def build_machine_record(save_root: str = None, scan: dict = None, hostname: str = None) -> dict:
     """
     Builds a machine record dictionary containing metadata about the current machine.
     
         Args:
-            None
+            save_root (str): The root path name where DCS saved games are stored.
+            scan (dict): Optional result of helpers_dcs.scan_joystick_dirs() to reuse.
+            hostname (str): Record under this hostname instead of the machine's (e.g. a staged host folder).
 
         Returns:
             dict: A dictionary containing the machine record data
     """
     helpers_generic.print_debug(f"build_machine_record()")
 
+    hostname = hostname or get_hostname()
+
     return {
         "schema_version": SCHEMA_VERSION,
-        "machine_guid": get_machine_guid(),
-        "hostname": get_hostname(),
+        "machine_guid": get_machine_guid(hostname),
+        "hostname": hostname,
         "last_seen": datetime.now(UTC).isoformat(timespec="seconds"),
-        "controllers": get_dcs_controllers(save_root=save_root)
+        "controllers": get_dcs_controllers(save_root=save_root, scan=scan)
     }
 
 
 
 
-def build_machine_fingerprint(save_root: str = None,dest_dir: Path = Path(".")):
+def _last_seen_age_days(last_seen: str, now: datetime) -> float:
+    """
+    Returns how many days ago an ISO last_seen timestamp was, or None if it cannot be parsed.
+    """
+    try:
+        seen = datetime.fromisoformat(last_seen)
+    except (TypeError, ValueError):
+        return None
+    if seen.tzinfo is None:
+        seen = seen.replace(tzinfo=UTC)
+    return (now - seen).total_seconds() / 86400
+
+
+def fingerprint_needs_write(record: dict, output_path: Path, stale_days: float = LAST_SEEN_STALE_DAYS) -> bool:
+    """
+    Decides whether a new machine record has to be written over the existing fingerprint file.
+    The file is only rewritten when something other than last_seen changed, or when the stored
+    last_seen is older than stale_days, so routine runs do not produce a commit on every machine.
+
+        Args:
+            record (dict): The new machine record (see build_machine_record())
+            output_path (Path): The fingerprint file it would be written to
+            stale_days (float): Refresh last_seen once it is this many days old (0 always refreshes)
+
+        Returns:
+            bool: True if the file is missing, different or stale
+    """
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    except (OSError, ValueError):
+        return True
+
+    if {k: v for k, v in existing.items() if k != "last_seen"} != {k: v for k, v in record.items() if k != "last_seen"}:
+        return True
+
+    age = _last_seen_age_days(existing.get("last_seen"), datetime.now(UTC))
+    return age is None or age >= stale_days
+
+
+def build_machine_fingerprint(save_root: str = None,dest_dir: Path = Path("."), scan: dict = None, stale_days: float = LAST_SEEN_STALE_DAYS, hostname: str = None) -> tuple:
     """
     Builds a machine fingerprint record containing metadata about the current machine.
+    The file is left untouched when the record is unchanged (see fingerprint_needs_write()).
     
         Args:
             save_root (str): The root path name where DCS saved games are stored.
             dest_dir (Path): The destination directory where the machine fingerprint file will be written.
                 Accepts and optional destination directory to make testing easier.
+            scan (dict): Optional result of helpers_dcs.scan_joystick_dirs() to reuse.
+            stale_days (float): Refresh an unchanged file's last_seen once it is this many days old.
+            hostname (str): Record under this hostname instead of the machine's.
 
         Returns:
-            output_path (Path): The path to the written machine fingerprint file
+            tuple: (output_path, written)
+                - output_path (Path): The path of the machine fingerprint file
+                - written (bool): Whether the file was (re)written
     """
     helpers_generic.print_debug(f"build_machine_fingerprint()")
 
-    record = build_machine_record(save_root=save_root)
+    record = build_machine_record(save_root=save_root, scan=scan, hostname=hostname)
     dest_dir.mkdir(parents=True, exist_ok=True)
 
     output_path = dest_dir / f"{record['hostname']}_{record['machine_guid']}.json"
 
-    output_path.write_text(
-        json.dumps(record, indent=2),
-        encoding="utf-8"
-    )
-    return output_path # Returning the path makes assertions easier
+    if not fingerprint_needs_write(record, output_path, stale_days):
+        helpers_generic.print_debug(f"  Fingerprint unchanged: {output_path}")
+        return output_path, False
+
+    with helpers_generic.span("write fingerprint JSON", "io"):
+        output_path.write_text(
+            json.dumps(record, indent=2),
+            encoding="utf-8"
+        )
+    return output_path, True
+
+
+def print_fingerprint_result(path: Path, written: bool):
+    """
+    Reports whether the machine fingerprint was written.
+    """
+    if written:
+        print(f"Wrote machine record to: {path.resolve()}")
+    else:
+        print(f"Machine record unchanged: {path.resolve()}")
+
+
+
+def _changed_aircraft(old: dict, new: dict) -> list:
+    """
+    Returns the aircraft whose joystick folder appeared, disappeared or changed between two snapshots.
+    """
+    missing = object()
+    return sorted(name for name in set(old) | set(new) if old.get(name, missing) != new.get(name, missing))
+
+
+def _wait_until_settled(input_path: Path, current: dict, debounce: float) -> dict:
+    """
+    Waits until two snapshots debounce seconds apart agree, so a burst of changes
+    (DCS rewriting several configs, a stick being re-plugged) triggers a single update.
+    """
+    while True:
+        time.sleep(debounce)
+        settled = helpers_dcs.snapshot_joystick_dirs(input_path)
+        if settled == current:
+            return settled
+        current = settled
+
+
+def watch_machine_fingerprint(save_root: str = None, dest_dir: Path = Path("."), interval: float = WATCH_INTERVAL, debounce: float = WATCH_DEBOUNCE, max_polls: int = None, stale_days: float = LAST_SEEN_STALE_DAYS):
+    """
+    Keeps the machine fingerprint up to date while DCS controllers are plugged in or removed.
+    Config/Input is polled with a snapshot of the joystick folder mtimes; when it changes, only the
+    affected aircraft are rescanned and the fingerprint is rewritten only if the controller set changed.
+
+        Args:
+            save_root (str): The root path name where DCS saved games are stored.
+            dest_dir (Path): The destination directory for the machine fingerprint file.
+            interval (float): Seconds between polls
+            debounce (float): Seconds the folders must stay unchanged before rescanning
+            max_polls (int): Stop after this many polls (None watches until interrupted)
+            stale_days (float): Refresh an unchanged file's last_seen once it is this many days old
+
+        Returns:
+            None
+    """
+    helpers_generic.print_debug(f"watch_machine_fingerprint()")
+
+    input_path = helpers_dcs.get_input_path(save_root)
+    if not input_path.exists():
+        print(f"Error: Path {input_path} does not exist.")
+        raise SystemExit(1)
+
+    snapshot = helpers_dcs.snapshot_joystick_dirs(input_path)
+    scan = helpers_dcs.scan_joystick_dirs(input_path)
+    controllers = get_dcs_controllers(save_root=save_root, scan=scan)
+    print_fingerprint_result(*build_machine_fingerprint(save_root=save_root, dest_dir=dest_dir, scan=scan, stale_days=stale_days))
+    print(f"Watching {input_path} for controller changes (Ctrl+C to stop).")
+
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            time.sleep(interval)
+
+            current = helpers_dcs.snapshot_joystick_dirs(input_path)
+            if current == snapshot:
+                continue
+
+            current = _wait_until_settled(input_path, current, debounce)
+            changed = _changed_aircraft(snapshot, current)
+            snapshot = current
+            helpers_generic.print_debug(f"  Changed aircraft: {changed}")
+
+            with helpers_generic.span("rescan changed aircraft", "scan", aircraft=len(changed)):
+                for aircraft_name in changed:
+                    configs = None
+                    if current.get(aircraft_name) is not None:
+                        configs = helpers_dcs.list_joystick_configs(input_path, aircraft_name)
+                    if configs:
+                        scan[aircraft_name] = configs
+                    else:
+                        scan.pop(aircraft_name, None)
+
+            # Controller discovery depends on the aircraft order (the first aircraft wins a shared GUID)
+            scan = {name: scan[name] for name in sorted(scan, key=os.path.normcase)}
+
+            new_controllers = get_dcs_controllers(save_root=save_root, scan=scan)
+            if new_controllers == controllers:
+                print(f"Config/Input changed ({', '.join(changed)}), controllers unchanged.")
+                continue
+
+            controllers = new_controllers
+            print(f"Controllers changed ({', '.join(changed)}).")
+            print_fingerprint_result(*build_machine_fingerprint(save_root=save_root, dest_dir=dest_dir, scan=scan, stale_days=stale_days))
+
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
 
 
 
@@ -255,6 +602,44 @@ def get_command_line_args():
         help='Dry run with no actions performed.'  
     )  
     
+    # Checks for '--refreshguid' to ignore the cached hardware UUID.
+    parser.add_argument(  
+        '--refreshguid',  
+        action='store_true',  
+        help='Query the hardware UUID again instead of using the cached value.'  
+    )  
+
+    # Checks for '--staledays' to control how often an unchanged fingerprint's last_seen is refreshed.
+    parser.add_argument(  
+        '--staledays',  
+        type=float,  
+        default=LAST_SEEN_STALE_DAYS,  
+        help='Rewrite an unchanged fingerprint only when its last_seen is this many days old (0 always rewrites).'  
+    )  
+
+    # Checks for '--watch' to keep the fingerprint up to date as controllers change.
+    parser.add_argument(  
+        '--watch',  
+        action='store_true',  
+        help='Keep running and rewrite the fingerprint whenever the controller set changes.'  
+    )  
+
+    parser.add_argument(  
+        '--interval',  
+        type=float,  
+        default=WATCH_INTERVAL,  
+        help='Watch mode: seconds between polls of Config/Input.'  
+    )  
+
+    # Checks for '--profile' and writes a Chrome trace of the run to the given (or default) file.
+    parser.add_argument(  
+        '--profile',  
+        type=str,  
+        nargs='?',  
+        const='fprintdcs_trace.json',  
+        help='Write a Chrome trace of the run (default: fprintdcs_trace.json) and print the slowest phases.'  
+    )  
+
     # Note: argparse automatically handles the '--help' argument (and '-h') and exits after displaying it.  
 
     # If invalid arguments argparse will print an error and exit (sys.exit(2)).  
@@ -287,10 +672,21 @@ if __name__ == "__main__":
 
     helpers_generic.print_debug(f"__main__")
 
+    if args.profile:
+        helpers_generic.start_profile()
+
     try:
-        path = build_machine_fingerprint(save_root=args.saveroot)
-        print(f"Wrote machine record to: {path.resolve()}")
+        with helpers_generic.span("fprintdcs", "cli"):
+            if args.refreshguid:
+                get_machine_guid(refresh=True)
+            if args.watch:
+                watch_machine_fingerprint(save_root=args.saveroot, interval=args.interval, stale_days=args.staledays)
+            else:
+                print_fingerprint_result(*build_machine_fingerprint(save_root=args.saveroot, stale_days=args.staledays))
 
     except Exception as e:
         print(f"\nAn unexpected error occurred: {e}")
 
+    finally:
+        if args.profile:
+            helpers_generic.finish_profile(args.profile)
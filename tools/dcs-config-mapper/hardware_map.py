@@ -0,0 +1,163 @@
+import re
+
+# Live DCS config: "Name {GUID}.diff.lua"
+# Matches: Joy Name {1234-5678...}
+CONFIG_PATTERN = re.compile(r"^(.*)\s+({.*})\.diff\.lua$")
+
+# Library template: "Name {__GUID__}_<instance_id>.diff.lua"
+TEMPLATE_PATTERN = re.compile(r"^(.*)\s+({__GUID__})_(\d+)\.diff\.lua$")
+
+
+def parse_config_name(filename: str) -> tuple:
+    """
+    Splits a live DCS config filename into its controller name and GUID.
+
+        Args:
+            filename (str): e.g. "T-Rudder {86FE4060-E9EB-11ee-8001-444553540000}.diff.lua"
+
+        Returns:
+            tuple: (controller_name, dcs_guid), or None if the name does not match
+    """
+    match = CONFIG_PATTERN.match(filename)
+    if not match:
+        return None
+    return match.group(1).strip(), match.group(2).strip()
+
+
+def parse_template_name(filename: str) -> tuple:
+    """
+    Splits a library template filename into its controller name and instance id.
+
+        Args:
+            filename (str): e.g. "T-Rudder {__GUID__}_1.diff.lua"
+
+        Returns:
+            tuple: (controller_name, instance_id), or None if the name does not match
+    """
+    match = TEMPLATE_PATTERN.match(filename)
+    if not match:
+        return None
+    return match.group(1).strip(), int(match.group(3))
+
+
+def config_name(controller_name: str, dcs_guid: str) -> str:
+    """
+    Builds the live DCS config filename for a controller.
+    """
+    return f"{controller_name} {dcs_guid}.diff.lua"
+
+
+def template_name(controller_name: str, instance_id: int) -> str:
+    """
+    Builds the library template filename for a controller instance.
+    """
+    return f"{controller_name} {{__GUID__}}_{instance_id}.diff.lua"
+
+
+class HardwareMap:
+    """
+    A fingerprint's controllers compiled into dict lookups in both directions:
+        (controller_name, instance_id) -> dcs_guid
+        dcs_guid -> (controller_name, instance_id)
+    Build it once per fingerprint and share it between restores, extracts and checks.
+    """
+    __slots__ = ("machine_guid", "hostname", "_by_key", "_by_guid")
+
+    def __init__(self, controllers: list, machine_guid: str = None, hostname: str = None):
+        """
+            Args:
+                controllers (list): The "controllers" list of a fingerprint
+                machine_guid (str): Optional machine_guid of the fingerprint
+                hostname (str): Optional hostname of the fingerprint
+        """
+        self.machine_guid = machine_guid
+        self.hostname = hostname
+        self._by_key = {}
+        self._by_guid = {}
+
+        for item in controllers:
+            key = (item["controller_name"], item["instance_id"])
+            # The first entry wins, matching the old linear next() scan
+            self._by_key.setdefault(key, item["dcs_guid"])
+            self._by_guid.setdefault(item["dcs_guid"], key)
+
+    @classmethod
+    def from_fingerprint(cls, fingerprint: dict) -> "HardwareMap":
+        """
+        Builds the map from a fingerprint record.
+        """
+        return cls(
+            fingerprint.get("controllers", []),
+            machine_guid=fingerprint.get("machine_guid"),
+            hostname=fingerprint.get("hostname"),
+        )
+
+    @classmethod
+    def from_configs(cls, configs) -> "HardwareMap":
+        """
+        Builds the map for a single joystick folder, numbering repeated controller names
+        in the given (sorted) order, the same way the fingerprint does per aircraft.
+
+            Args:
+                configs (iterable): (controller_name, dcs_guid) pairs in sorted filename order
+        """
+        name_counts = {}
+        controllers = []
+        for ctrl_name, ctrl_guid in configs:
+            instance_id = name_counts.get(ctrl_name, 0) + 1
+            name_counts[ctrl_name] = instance_id
+            controllers.append({"controller_name": ctrl_name, "dcs_guid": ctrl_guid, "instance_id": instance_id})
+        return cls(controllers)
+
+    def guid_for(self, controller_name: str, instance_id: int) -> str:
+        """
+        Returns the DCS GUID for a controller instance, or None if the machine does not have it.
+        """
+        return self._by_key.get((controller_name, instance_id))
+
+    def key_for(self, dcs_guid: str) -> tuple:
+        """
+        Returns (controller_name, instance_id) for a DCS GUID, or None if it is unknown.
+        """
+        return self._by_guid.get(dcs_guid)
+
+    def config_name_for_template(self, filename: str) -> str:
+        """
+        Maps a library template filename to this machine's live config filename.
+
+            Args:
+                filename (str): e.g. "T-Rudder {__GUID__}_1.diff.lua"
+
+            Returns:
+                str: e.g. "T-Rudder {86FE...}.diff.lua", or None if there is no matching hardware
+        """
+        parsed = parse_template_name(filename)
+        if not parsed:
+            return None
+        guid = self._by_key.get(parsed)
+        return config_name(parsed[0], guid) if guid else None
+
+    def template_name_for_config(self, filename: str) -> str:
+        """
+        Maps a live config filename to the library template filename.
+
+            Args:
+                filename (str): e.g. "T-Rudder {86FE...}.diff.lua"
+
+            Returns:
+                str: e.g. "T-Rudder {__GUID__}_1.diff.lua", or None if the GUID is unknown
+        """
+        parsed = parse_config_name(filename)
+        if not parsed:
+            return None
+        key = self._by_guid.get(parsed[1])
+        return template_name(*key) if key else None
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def __contains__(self, dcs_guid: str) -> bool:
+        return dcs_guid in self._by_guid
+
+    def __repr__(self) -> str:
+        return f"HardwareMap(hostname={self.hostname!r}, controllers={len(self._by_key)})"
@@ -1,5 +1,7 @@
+import os
 from pathlib import Path
 import helpers_generic
+from hardware_map import CONFIG_PATTERN
 
 def get_dcs_save_path(override_path: str = None) -> Path:
     """
@@ -57,4 +59,100 @@ def get_input_path(save_root: str = None) -> Path:
         raise SystemExit(1)
         
     input_path = dcs_path / "Config" / "Input"
-    return input_path
\ No newline at end of file
+    return input_path
+
+def _list_aircraft(input_path) -> list:
+    """
+    Returns the aircraft folder names under Config/Input, sorted the same way Path objects sort.
+    """
+    with os.scandir(input_path) as entries:
+        return sorted((e.name for e in entries if e.is_dir()), key=os.path.normcase)
+
+
+def list_joystick_configs(input_path: Path, aircraft_name: str) -> list:
+    """
+    Lists the controller configs of one aircraft's joystick folder.
+
+    Args:
+        input_path (Path): The DCS Config/Input directory
+        aircraft_name (str): The aircraft folder name
+
+    Returns:
+        list: (controller_name, dcs_guid, file_path) tuples in sorted filename order, or None if there is no joystick folder
+    """
+    joy_dir = os.path.join(input_path, aircraft_name, "joystick")
+    with helpers_generic.span("scan joystick folder", "scan", aircraft=aircraft_name):
+        try:
+            with os.scandir(joy_dir) as entries:
+                file_names = sorted((e.name for e in entries if e.name.endswith(".diff.lua")), key=os.path.normcase)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    joy_path = Path(joy_dir)
+    with helpers_generic.span("match config names", "regex", aircraft=aircraft_name):
+        return [(m.group(1).strip(), m.group(2).strip(), joy_path / name)
+                for name in file_names if (m := CONFIG_PATTERN.match(name))]
+
+
+def walk_joystick_configs(input_path: Path):
+    """
+    Yields every controller config under Config/Input/<aircraft>/joystick using os.scandir.
+    Only the fixed <aircraft>/joystick depth is visited, so keyboard, mouse, trackir and other folders are never walked.
+    Aircraft and files are sorted the same way Path objects sort, which keeps instance_id assignment deterministic.
+
+    Args:
+        input_path (Path): The DCS Config/Input directory
+
+    Returns:
+        generator: (aircraft_name, controller_name, dcs_guid, file_path) tuples
+    """
+    helpers_generic.print_debug(f"helpers_dcs.walk_joystick_configs({input_path})")
+
+    with helpers_generic.span("scan Config/Input", "scan"):
+        aircraft_names = _list_aircraft(input_path)
+
+    for aircraft_name in aircraft_names:
+        # The whole folder is listed before yielding so the spans do not include the caller's work
+        for ctrl_name, ctrl_guid, file_path in list_joystick_configs(input_path, aircraft_name) or ():
+            yield aircraft_name, ctrl_name, ctrl_guid, file_path
+
+
+def snapshot_joystick_dirs(input_path: Path) -> dict:
+    """
+    Takes a cheap snapshot of every aircraft joystick folder's modification time.
+    Adding, removing or renaming a controller config changes its folder's mtime, so comparing two
+    snapshots shows which aircraft need rescanning without listing any joystick folder.
+
+    Args:
+        input_path (Path): The DCS Config/Input directory
+
+    Returns:
+        snapshot (dict): aircraft name -> joystick folder mtime_ns, or None if the aircraft has no joystick folder
+    """
+    snapshot = {}
+    for aircraft_name in _list_aircraft(input_path):
+        try:
+            snapshot[aircraft_name] = os.stat(os.path.join(input_path, aircraft_name, "joystick")).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            snapshot[aircraft_name] = None
+    return snapshot
+
+
+def scan_joystick_dirs(input_path: Path) -> dict:
+    """
+    Walks Config/Input once and lists the controller configs of every aircraft joystick folder.
+    The result can be shared by controller discovery and template extraction so neither rescans the tree.
+
+    Args:
+        input_path (Path): The DCS Config/Input directory
+
+    Returns:
+        scan (dict): aircraft name -> list of (controller_name, dcs_guid, file_path), in sorted aircraft order
+    """
+    helpers_generic.print_debug(f"helpers_dcs.scan_joystick_dirs({input_path})")
+
+    scan = {}
+    for aircraft_name, ctrl_name, ctrl_guid, file_path in walk_joystick_configs(input_path):
+        scan.setdefault(aircraft_name, []).append((ctrl_name, ctrl_guid, file_path))
+
+    return scan
@@ -1,6 +1,45 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
 # Constants
 DEBUG = False
 NO_ACTION = False
+PROFILE = False
+
+# Spans recorded while PROFILE is on: (name, category, start_ns, duration_ns, thread_id, args)
+_SPANS = []
+_SPANS_LOCK = threading.Lock()
+_PROFILE_START_NS = 0
+
+# Rows printed by print_profile_summary()
+PROFILE_SUMMARY_ROWS = 15
+
+# How copy_file() copies (see COPY_STRATEGIES); set per run from the command line
+COPY_STRATEGY = "auto"
+COPY_STRATEGIES = ("auto", "reflink", "copy_file_range", "hardlink", "copy2")
+
+# Linux FICLONE ioctl: share the source's extents (btrfs, XFS, bcachefs, ...)
+FICLONE = 0x40049409
+
+# Errors meaning "this filesystem (pair) cannot do that", as opposed to a real I/O failure
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM, errno.EMLINK,
+                       getattr(errno, "EOPNOTSUPP", errno.EINVAL), getattr(errno, "ENOTSUP", errno.EINVAL),
+                       getattr(errno, "ENOTTY", errno.EINVAL)}
+
+# Per strategy: [files, bytes]; and (strategy, source device, target device) combinations known not to work
+_COPY_STATS = {}
+_COPY_UNSUPPORTED = set()
+_COPY_LOCK = threading.Lock()
+
+# Read size used when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
 
 
 def print_debug(value):  
@@ -14,6 +53,376 @@ def print_debug(value):
             None
     """
     DEBUG and print(value)  
+    PROFILE and _record(str(value), "debug", time.perf_counter_ns(), 0, None)
+
+
+def _record(name, category, start_ns, duration_ns, args):
+    with _SPANS_LOCK:
+        _SPANS.append((name, category, start_ns, duration_ns, threading.get_ident(), args))
+
+
+class _NullSpan:
+    """
+    The span handed out while profiling is off. It is a shared singleton, so a disabled span costs one global check.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """
+    Times a with-block and records it when the block exits.
+    """
+    __slots__ = ("name", "category", "args", "start_ns")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.category, self.start_ns, time.perf_counter_ns() - self.start_ns, self.args)
+        return False
+
+
+def span(name: str, category: str = "phase", **args):
+    """
+    Returns a context manager that times one phase of a run when profiling is enabled.
+
+        Example Usage
+            with helpers_generic.span("scan", "io", folder=str(input_path)):
+                ...
+
+        Args:
+            name (str): The phase name shown in the trace and the summary
+            category (str): Groups related phases (e.g. "io", "scan", "cli")
+            args: Extra details stored with the span in the trace
+
+        Returns:
+            A context manager (a shared no-op one when PROFILE is off)
+    """
+    if not PROFILE:
+        return _NULL_SPAN
+    return _Span(name, category, args or None)
+
+
+def start_profile():
+    """
+    Clears any recorded spans and turns profiling on.
+
+        Returns:
+            None
+    """
+    global PROFILE, _PROFILE_START_NS
+    with _SPANS_LOCK:
+        _SPANS.clear()
+    _PROFILE_START_NS = time.perf_counter_ns()
+    PROFILE = True
+
+
+def write_chrome_trace(file_path) -> int:
+    """
+    Writes the recorded spans in Chrome trace format (open in chrome://tracing or https://ui.perfetto.dev).
+
+        Args:
+            file_path (str | Path): The JSON file to write
+
+        Returns:
+            count (int): The number of events written
+    """
+    pid = os.getpid()
+    with _SPANS_LOCK:
+        spans = list(_SPANS)
+
+    events = []
+    for name, category, start_ns, duration_ns, tid, args in spans:
+        event = {"name": name, "cat": category, "ts": (start_ns - _PROFILE_START_NS) / 1000, "pid": pid, "tid": tid}
+        if category == "debug":
+            event.update(ph="i", s="t")
+        else:
+            event.update(ph="X", dur=duration_ns / 1000)
+        if args:
+            event["args"] = args
+        events.append(event)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+
+def summarize_spans() -> list:
+    """
+    Totals the recorded spans by name.
+
+        Returns:
+            list: (name, category, count, total_ms, max_ms) tuples, slowest total first
+    """
+    totals = {}
+    with _SPANS_LOCK:
+        for name, category, _, duration_ns, _, _ in _SPANS:
+            if category == "debug":
+                continue
+            entry = totals.setdefault((name, category), [0, 0, 0])
+            entry[0] += 1
+            entry[1] += duration_ns
+            entry[2] = max(entry[2], duration_ns)
+
+    rows = [(name, category, count, total / 1e6, longest / 1e6) for (name, category), (count, total, longest) in totals.items()]
+    return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+def print_profile_summary(limit: int = PROFILE_SUMMARY_ROWS):
+    """
+    Prints the slowest phases. Spans on worker threads overlap, so totals can add up to more than the run time.
+
+        Args:
+            limit (int): The number of rows to print
+
+        Returns:
+            None
+    """
+    print(f"\n{'Phase':40} {'Category':10} {'Count':>7} {'Total ms':>10} {'Max ms':>10}")
+    for name, category, count, total_ms, max_ms in summarize_spans()[:limit]:
+        print(f"{name[:40]:40} {category:10} {count:7} {total_ms:10.2f} {max_ms:10.2f}")
+
+
+def finish_profile(file_path):
+    """
+    Turns profiling off, writes the Chrome trace and prints the summary table.
+
+        Args:
+            file_path (str | Path): The trace JSON file to write
+
+        Returns:
+            None
+    """
+    global PROFILE
+    PROFILE = False
+    count = write_chrome_trace(file_path)
+    print_profile_summary()
+    print(f"\nWrote {count} trace events to: {file_path}")
+
+
+def hash_file(file_path) -> str:
+    """
+    Returns the SHA-256 hex digest of a file, read in large chunks.
+
+        Args:
+            file_path (str | Path): The file to hash
+
+        Returns:
+            digest (str): The hex digest
+    """
+    h = hashlib.sha256()
+    with span("hash file", "io"), open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def temp_path_for(target) -> str:
+    """
+    Returns a hidden temporary name next to a file that no other writer (thread or process) will pick,
+    so concurrent writers of the same file never write into each other's temporary file.
+
+        Args:
+            target (str | Path): The file about to be written
+
+        Returns:
+            tmp_path (str): "<folder>/.<name>.<random>.tmp"
+    """
+    folder, name = os.path.split(os.fspath(target))
+    return os.path.join(folder, f".{name}.{uuid.uuid4().hex}.tmp")
+
+
+def publish_temp_file(tmp_path, target, digest: str) -> bool:
+    """
+    Moves a finished temporary file (see temp_path_for()) over a content-addressed file.
+    Racing writers produce the same bytes, so if the move fails (Windows will not replace a file that is open)
+    but the target already holds the expected content, the race was lost harmlessly and the copy is discarded.
+
+        Args:
+            tmp_path (str | Path): The finished temporary file
+            target (str | Path): The file to publish
+            digest (str): The SHA-256 the target must have
+
+        Returns:
+            published (bool): True if tmp_path became the target, False if an identical target was already there
+    """
+    try:
+        os.replace(tmp_path, target)
+        return True
+    except OSError:
+        os.remove(tmp_path)
+        if not (os.path.exists(target) and hash_file(target) == digest):
+            raise
+        return False
+
+
+def _reflink(source, target):
+    """
+    Clones source into a new target without copying data (Linux FICLONE or macOS clonefile).
+    """
+    if sys.platform == "darwin":
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(source), os.fsencode(target), 0) != 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        return
+
+    import fcntl
+
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(target)
+            raise
+
+
+def _kernel_copy(source, target):
+    """
+    Copies inside the kernel with os.copy_file_range (which can also clone or copy server side), falling back to os.sendfile.
+    """
+    copy = getattr(os, "copy_file_range", None)
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        offset = 0
+        while remaining > 0:
+            if copy is not None:
+                sent = copy(src.fileno(), dst.fileno(), remaining)
+            else:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+                offset += sent
+            if sent == 0:
+                break
+            remaining -= sent
+
+
+def _hardlink(source, target):
+    os.link(source, target)
+
+
+_COPY_IMPLEMENTATIONS = {
+    "reflink": _reflink,
+    "copy_file_range": _kernel_copy,
+    "hardlink": _hardlink,
+}
+
+
+def _strategy_chain(strategy: str) -> tuple:
+    """
+    Returns the strategies tried, in order, for a selected strategy. copy2 always ends the chain.
+    Hard links share the file with the source, so they are only used when asked for explicitly.
+    """
+    if strategy == "hardlink":
+        return ("hardlink", "reflink", "copy_file_range", "copy2")
+    if strategy == "reflink":
+        return ("reflink", "copy2")
+    if strategy == "copy_file_range":
+        return ("copy_file_range", "copy2")
+    if strategy == "copy2":
+        return ("copy2",)
+    if strategy != "auto":
+        raise ValueError(f"Unknown copy strategy '{strategy}'")
+    return ("reflink", "copy_file_range", "copy2")
+
+
+def copy_file(source, target, strategy: str = None) -> str:
+    """
+    Copies a file like shutil.copy2 (data, mtime and permissions) using the cheapest strategy available:
+    a reflink clone, an in-kernel copy_file_range/sendfile copy, optionally a hard link, and finally copy2.
+    A strategy that fails for a pair of devices is not tried again for that pair.
+
+        Args:
+            source (str | Path): The file to copy
+            target (str | Path): The new file (an existing file is replaced)
+            strategy (str): One of COPY_STRATEGIES (defaults to COPY_STRATEGY)
+
+        Returns:
+            used (str): The strategy that copied the file
+    """
+    src_stat = os.stat(source)
+    try:
+        target_dev = os.stat(os.path.dirname(os.path.abspath(target))).st_dev
+    except OSError:
+        target_dev = None
+
+    for name in _strategy_chain(strategy or COPY_STRATEGY):
+        if name == "copy2":
+            shutil.copy2(source, target)
+            break
+
+        key = (name, src_stat.st_dev, target_dev)
+        if key in _COPY_UNSUPPORTED or name not in _COPY_IMPLEMENTATIONS:
+            continue
+        if name == "copy_file_range" and not (hasattr(os, "copy_file_range") or hasattr(os, "sendfile")):
+            continue
+
+        try:
+            if os.path.lexists(target):
+                os.unlink(target)
+            _COPY_IMPLEMENTATIONS[name](source, target)
+        except (OSError, ImportError, AttributeError) as e:
+            if isinstance(e, OSError) and e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            print_debug(f"  {name} not available for {target}: {e}")
+            with _COPY_LOCK:
+                _COPY_UNSUPPORTED.add(key)
+            continue
+
+        if name != "hardlink":
+            shutil.copystat(source, target)
+        break
+
+    with _COPY_LOCK:
+        entry = _COPY_STATS.setdefault(name, [0, 0])
+        entry[0] += 1
+        entry[1] += src_stat.st_size
+    return name
+
+
+def copy_stats() -> dict:
+    """
+    Returns what copy_file() has done so far.
+
+        Returns:
+            dict: strategy -> {"files": count, "bytes": total size}
+    """
+    with _COPY_LOCK:
+        return {name: {"files": files, "bytes": size} for name, (files, size) in _COPY_STATS.items()}
+
+
+def print_copy_stats():
+    """
+    Prints which copy strategies were used and how many bytes did not have to be copied.
+    Reflinks and hard links avoid writing the data at all; copy_file_range keeps it out of user space.
+
+        Returns:
+            None
+    """
+    stats = copy_stats()
+    if not stats:
+        return
+    parts = [f"{name} {entry['files']}" for name, entry in sorted(stats.items())]
+    avoided = sum(entry["bytes"] for name, entry in stats.items() if name in ("reflink", "hardlink"))
+    in_kernel = stats.get("copy_file_range", {}).get("bytes", 0)
+    print(f"Copied files: {', '.join(parts)} ({avoided} bytes not copied, {in_kernel} bytes copied in kernel)")
 
 
 def get_abs_pathnames(filename, path):
@@ -123,7 +532,7 @@ def copy_files_by_extension(source_folder: str, target_folder: str, extension: s
             # Define the full path for the destination file
             target_path = os.path.join(target_folder, filename)
             
-            shutil.copy2(source_path, target_path)
+            copy_file(source_path, target_path)
             copied_count += 1
             print_debug(f"  -> Copied: {filename}")
 
@@ -0,0 +1,287 @@
+import argparse
+import hashlib
+import json
+import subprocess
+from pathlib import Path
+import helpers_generic
+import helpers_dcs
+import fprintdcs
+import fprint_db
+import hardware_map
+import plan
+import restore_config
+
+# Constants
+SYNC_MANIFEST = ".sync_manifest.json"
+SYNC_MANIFEST_VERSION = 1
+
+# Where the templates live inside the library repository
+TEMPLATES_PREFIX = "data/templates"
+
+# Keys of the report returned by sync_library()
+SYNC_KEYS = ("added", "changed", "unchanged", "removed", "failed")
+
+
+class DirectoryMirror:
+    """
+    A library mirror that is a plain folder: a checkout of the library repository, or a template library itself
+    (folder, store or pack layout). Files are compared by SHA-256.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root / TEMPLATES_PREFIX if (root / TEMPLATES_PREFIX).is_dir() else root
+
+    def aircraft(self) -> list:
+        return restore_config.list_template_aircraft(self.root)
+
+    def templates(self, aircraft_name: str) -> dict:
+        """
+        Returns template filename -> (digest, source path) for one aircraft.
+        """
+        return {hardware_map.template_name(ctrl_name, instance_id): (helpers_generic.hash_file(path), path)
+                for path, ctrl_name, instance_id in restore_config.find_templates(self.root, aircraft_name) or ()}
+
+    def hash_local(self, path: Path) -> str:
+        return helpers_generic.hash_file(path)
+
+    def plan_fetch(self, p: plan.Plan, target: Path, source, **kwargs) -> bool:
+        p.add("copy", target, source=source, **kwargs)
+        return True
+
+
+class GitMirror:
+    """
+    A library mirror that is a git repository (bare or not), read without a checkout.
+    Files are compared by git blob id, so nothing is read from the repository unless it changed.
+    """
+
+    def __init__(self, git_dir: Path, ref: str = "HEAD"):
+        self.git_dir = git_dir
+        self.ref = ref
+        self._tree = {}
+        output = self._git("ls-tree", "-r", "-z", "--full-tree", ref, "--", TEMPLATES_PREFIX)
+        for record in output.split(b"\0"):
+            if not record:
+                continue
+            meta, path = record.split(b"\t", 1)
+            _, kind, blob_id = meta.split()
+            parts = path.decode("utf-8")[len(TEMPLATES_PREFIX) + 1:].split("/")
+            if kind == b"blob" and len(parts) == 3 and parts[1] == "joystick" and hardware_map.parse_template_name(parts[2]):
+                self._tree.setdefault(parts[0], {})[parts[2]] = (blob_id.decode(), blob_id.decode())
+
+    @staticmethod
+    def is_git(path: Path) -> bool:
+        return (path / "HEAD").is_file() and (path / "objects").is_dir() or (path / ".git").exists()
+
+    def _git(self, *args) -> bytes:
+        try:
+            return subprocess.run(["git", "--git-dir", str(self._git_dir_path()), *args], check=True, capture_output=True).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, "stderr", b"") or b""
+            raise SystemExit(f"Error: git failed on {self.git_dir}: {stderr.decode(errors='replace').strip() or e}")
+
+    def _git_dir_path(self) -> Path:
+        return self.git_dir / ".git" if (self.git_dir / ".git").exists() else self.git_dir
+
+    def aircraft(self) -> list:
+        return sorted(self._tree)
+
+    def templates(self, aircraft_name: str) -> dict:
+        return dict(self._tree.get(aircraft_name, {}))
+
+    def hash_local(self, path: Path) -> str:
+        data = path.read_bytes()
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+    def plan_fetch(self, p: plan.Plan, target: Path, source, **kwargs) -> bool:
+        # Plans hold text, so the blob is read now; only changed files get this far
+        try:
+            content = self._git("cat-file", "blob", source).decode("utf-8")
+        except UnicodeDecodeError as e:
+            p.add("warn", target, status="failed", name=kwargs.get("name"),
+                  message=f"  [FAILED] {kwargs.get('name')}: not a UTF-8 template ({e.reason} at byte {e.start})")
+            return False
+        p.add("write", target, content=content, **kwargs)
+        return True
+
+
+def open_mirror(path: Path, ref: str = "HEAD"):
+    """
+    Opens a library mirror: a git repository (read at ref) or a folder.
+    """
+    if not path.exists():
+        raise SystemExit(f"Error: Mirror path '{path}' does not exist.")
+    if GitMirror.is_git(path):
+        return GitMirror(path, ref)
+    return DirectoryMirror(path)
+
+
+def load_sync_manifest(target_root: Path) -> dict:
+    """
+    Loads what the last sync placed in the target library.
+
+        Returns:
+            dict: template path relative to the library -> mirror digest
+    """
+    try:
+        with open(target_root / SYNC_MANIFEST, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == SYNC_MANIFEST_VERSION:
+            return data.get("files", {})
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return {}
+
+
+def needed_templates(mirror, hw_map: hardware_map.HardwareMap, aircraft_names: list) -> dict:
+    """
+    Works out the part of the library a host needs: the templates of the aircraft it flies
+    for the controllers its fingerprint has.
+
+        Args:
+            mirror: DirectoryMirror or GitMirror
+            hw_map (HardwareMap): The host's compiled fingerprint
+            aircraft_names (list): The aircraft found under the host's Config/Input
+
+        Returns:
+            dict: "<aircraft>/joystick/<template>" -> (mirror digest, source)
+    """
+    available = set(mirror.aircraft())
+    needed = {}
+    for aircraft_name in aircraft_names:
+        if aircraft_name not in available:
+            helpers_generic.print_debug(f"  {aircraft_name} is not in the library")
+            continue
+        for name, (digest, source) in mirror.templates(aircraft_name).items():
+            if hw_map.config_name_for_template(name):
+                needed[f"{aircraft_name}/joystick/{name}"] = (digest, source)
+    return dict(sorted(needed.items()))
+
+
+def plan_sync(mirror, needed: dict, target_root: Path) -> plan.Plan:
+    """
+    Plans materializing the needed templates in the target library.
+    Files whose content already matches the mirror are left alone, and files an earlier sync placed
+    that are no longer needed are removed. Files the sync did not place are never touched.
+    A file the mirror cannot provide (e.g. a git blob that is not UTF-8) is reported as failed and skipped.
+
+        Args:
+            mirror: DirectoryMirror or GitMirror
+            needed (dict): The templates returned by needed_templates()
+            target_root (Path): The local template library
+
+        Returns:
+            Plan - The planned operations, including the new sync manifest
+    """
+    helpers_generic.print_debug(f"library_sync.plan_sync({len(needed)} templates)")
+
+    p = plan.Plan("sync")
+    old_manifest = load_sync_manifest(target_root)
+    manifest = {}
+
+    for relative, (digest, source) in needed.items():
+        target = target_root / relative
+        if target.exists() and mirror.hash_local(target) == digest:
+            p.add("skip", target, status="unchanged", name=relative)
+            manifest[relative] = digest
+            continue
+        status = "changed" if target.exists() else "added"
+        p.add("mkdir", target.parent)
+        if mirror.plan_fetch(p, target, source, status=status, name=relative, message=f"  [{status.upper()}] {relative}"):
+            manifest[relative] = digest
+        elif relative in old_manifest:
+            # Not updated, but still placed by an earlier sync
+            manifest[relative] = old_manifest[relative]
+
+    for relative in sorted(set(old_manifest) - set(needed)):
+        p.add("remove", target_root / relative, status="removed", name=relative, message=f"  [REMOVED] {relative}")
+
+    manifest = dict(sorted(manifest.items()))
+    if manifest != old_manifest:
+        p.add("mkdir", target_root)
+        p.add("write", target_root / SYNC_MANIFEST, stage=2,
+              content=json.dumps({"version": SYNC_MANIFEST_VERSION, "files": manifest}, indent=2))
+    return p
+
+
+def sync_library(mirror_path: Path, target_root: Path, save_root: str = None, fprint_dir: Path = None, hostname: str = None, ref: str = "HEAD", plan_file: Path = None) -> dict:
+    """
+    Brings a sparse local template library up to date with a mirror for this host.
+    The aircraft come from the live Config/Input scan; the controllers come from the host's stored
+    fingerprint when fprint_dir is given, otherwise from the same live scan.
+
+        Args:
+            mirror_path (Path): Library mirror: a git repository, a checkout or a template library folder
+            target_root (Path): The local template library to update
+            save_root (str): Optional override for the DCS Saved Games path
+            fprint_dir (Path): Use the stored fingerprint from this directory
+            hostname (str): The fingerprint's hostname (defaults to this machine's)
+            ref (str): The git ref to sync from (git mirrors only)
+            plan_file (Path): Save the plan here for review instead of executing it
+
+        Returns:
+            dict: Lists of template paths under each of SYNC_KEYS
+    """
+    helpers_generic.print_debug(f"sync_library({mirror_path} -> {target_root})")
+
+    input_path = helpers_dcs.get_input_path(save_root)
+    if not input_path.exists():
+        raise SystemExit(f"Error: Path {input_path} does not exist.")
+    scan = helpers_dcs.scan_joystick_dirs(input_path)
+
+    if fprint_dir is not None:
+        hostname = hostname or fprintdcs.get_hostname()
+        conn = fprint_db.open_store(fprint_dir)
+        try:
+            fingerprint = fprint_db.find_by_hostname(conn, hostname)
+        finally:
+            conn.close()
+        if not fingerprint:
+            raise SystemExit(f"Error: No fingerprint found for hostname '{hostname}' in {fprint_dir}")
+        hw_map = hardware_map.HardwareMap.from_fingerprint(fingerprint)
+    else:
+        hw_map = hardware_map.HardwareMap(fprintdcs.get_dcs_controllers(save_root=save_root, scan=scan))
+
+    mirror = open_mirror(mirror_path, ref)
+    with helpers_generic.span("plan sync", "plan"):
+        needed = needed_templates(mirror, hw_map, list(scan))
+        p = plan_sync(mirror, needed, target_root)
+
+    print(f"This host needs {len(needed)} templates for {len({r.split('/', 1)[0] for r in needed})} aircraft.")
+    if plan_file:
+        plan.save_plans([p], plan_file)
+        print(f"Wrote plan ({len(p.operations)} operations) to: {plan_file}")
+    else:
+        plan.execute_plans([p])
+
+    report = p.report(SYNC_KEYS)
+    print(f"Sync: {len(report['added'])} added, {len(report['changed'])} changed, "
+          f"{len(report['unchanged'])} unchanged, {len(report['removed'])} removed, {len(report['failed'])} failed")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='library_sync', description="Sync only this host's part of the template library from a mirror.")
+    parser.add_argument('mirror', type=str, help='Library mirror: git repository (bare or not), checkout, or template library folder')
+    parser.add_argument('--repotemplates', type=str, default=".", help='Local template library to update')
+    parser.add_argument('--saveroot', type=str, help='Override DCS saved games path')
+    parser.add_argument('--repofprints', type=str, help='Use the stored fingerprint from this directory instead of the live scan')
+    parser.add_argument('--hostname', type=str, help='With --repofprints: the fingerprint to use (defaults to this machine)')
+    parser.add_argument('--ref', type=str, default="HEAD", help='Git mirrors: the ref to sync from')
+    parser.add_argument('--plan', type=str, help='Write the plan to this JSON file instead of executing it (see plan.py)')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--noaction', action='store_true', help='Dry run: see what would happen')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+    helpers_generic.NO_ACTION = args.noaction
+
+    sync_library(
+        Path(args.mirror),
+        Path(args.repotemplates),
+        args.saveroot,
+        Path(args.repofprints) if args.repofprints else None,
+        args.hostname,
+        args.ref,
+        Path(args.plan) if args.plan else None
+    )
@@ -0,0 +1,134 @@
+from pathlib import Path
+import helpers_generic
+import difflua
+
+# Where the last restored template of each file is kept, relative to <aircraft>/
+BASE_DIRNAME = ".restore_base"
+
+
+def _entry_name(action_id, *entries) -> str:
+    """
+    Returns the human readable action name of an entry, falling back to its id.
+    """
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get("name"):
+            return entry["name"]
+    return str(action_id)
+
+
+def _merge_table(template: dict, base: dict, live: dict, prefer: str, section: str, conflicts: list) -> dict:
+    """
+    Three-way merges one table key by key.
+
+        Args:
+            template (dict): The library version
+            base (dict): The version that was last restored
+            live (dict): The version currently on disk
+            prefer (str): "template" or "live" - which side wins a conflict
+            section (str): Section name used in conflict reports
+            conflicts (list): Receives (section, action_id, action_name) for each conflict
+
+        Returns:
+            dict: The merged table
+    """
+    merged = {}
+    for key in {**template, **base, **live}:
+        t = template.get(key)
+        b = base.get(key)
+        l = live.get(key)
+
+        if t == l:
+            value = t
+        elif b == l:
+            # Only the library changed
+            value = t
+        elif b == t:
+            # Only the pilot changed it locally
+            value = l
+        else:
+            conflicts.append((section, key, _entry_name(key, l, t, b)))
+            value = t if prefer == "template" else l
+
+        if value is not None:
+            merged[key] = value
+
+    return merged
+
+
+def merge_diffs(template: dict, base: dict, live: dict, prefer: str = "template") -> tuple:
+    """
+    Three-way merges parsed .diff.lua trees per axisDiffs/keyDiffs entry.
+    Local changes the library did not touch are kept, library changes the pilot did not touch are applied,
+    and entries changed on both sides are conflicts resolved in favour of prefer.
+
+        Args:
+            template (dict): The library template
+            base (dict): The template as it was last restored (empty if never restored)
+            live (dict): The file currently in Saved Games
+            prefer (str): "template" or "live" - which side wins a conflict
+
+        Returns:
+            tuple: (merged tree, list of (section, action_id, action_name) conflicts)
+    """
+    conflicts = []
+    merged = {}
+
+    for section in {**template, **base, **live}:
+        t = template.get(section)
+        b = base.get(section)
+        l = live.get(section)
+
+        if all(v is None or isinstance(v, dict) for v in (t, b, l)):
+            value = _merge_table(t or {}, b or {}, l or {}, prefer, section, conflicts)
+            if value or (t is not None and l is not None):
+                merged[section] = value
+        else:
+            # Anything that is not a table of entries is merged as a single value
+            merged.update(_merge_table({section: t}, {section: b}, {section: l}, prefer, section, conflicts))
+
+    return merged, conflicts
+
+
+def base_path_for(target_path: Path) -> Path:
+    """
+    Returns where the last restored template for a live config file is kept.
+
+        Args:
+            target_path (Path): <aircraft>/joystick/<Name {GUID}>.diff.lua
+
+        Returns:
+            Path: <aircraft>/.restore_base/<Name {GUID}>.diff.lua
+    """
+    return target_path.parent.parent / BASE_DIRNAME / target_path.name
+
+
+def merge_file(template_path: Path, target_path: Path, prefer: str = "template") -> tuple:
+    """
+    Merges a library template into an existing live config file using the stored base.
+
+        Args:
+            template_path (Path): The library template
+            target_path (Path): The live config file (must exist)
+            prefer (str): "template" or "live" - which side wins a conflict
+
+        Returns:
+            tuple: (merged text, whether it differs from the live file, conflicts)
+    """
+    helpers_generic.print_debug(f"merge_file({target_path.name})")
+
+    with helpers_generic.span("parse diff.lua", "merge", file=target_path.name):
+        live_text = target_path.read_text(encoding="utf-8")
+        template_tree = difflua.load(template_path)
+        live_tree = difflua.loads(live_text)
+
+        base_file = base_path_for(target_path)
+        base_tree = difflua.load(base_file) if base_file.exists() else {}
+
+    with helpers_generic.span("merge bindings", "merge", file=target_path.name):
+        merged, conflicts = merge_diffs(template_tree, base_tree, live_tree, prefer)
+
+    # Compare semantically first so formatting-only differences never cause a write
+    if merged == live_tree:
+        return live_text, False, conflicts
+
+    return difflua.dumps(merged), True, conflicts
@@ -0,0 +1,321 @@
+import argparse
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+import helpers_generic
+
+# Constants
+PLAN_VERSION = 1
+
+# Operation kinds the executor understands
+OP_KINDS = ("mkdir", "backup", "copy", "blob", "write", "remove", "skip", "warn")
+
+# How each kind is described in a dry run
+DRY_RUN_VERBS = {
+    "mkdir": "create folder",
+    "backup": "back up",
+    "copy": "write",
+    "blob": "store",
+    "write": "write",
+    "remove": "remove",
+}
+
+
+@dataclass
+class Operation:
+    """
+    One planned file operation.
+
+        kind: One of OP_KINDS
+        target: The path that is created, written, removed or backed up
+        source: copy: the file to copy. blob: the file to store (target is the blob, named by its SHA-256).
+                backup: the file being backed up (target is the backup, named by its SHA-256)
+        content: write: the text to write
+        group: Operations sharing a group run in order on one worker (defaults to target)
+        stage: 1 is the concurrent bulk, 2 runs after it (folders are always created first)
+        status: The report bucket this operation counts towards (e.g. "restored"), if any
+        name: The name reported under status
+        detail: Extra report detail (e.g. the conflicting action name)
+        message: What to print once the operation has been applied
+    """
+    kind: str
+    target: str
+    source: str = None
+    content: str = None
+    group: str = None
+    stage: int = 1
+    status: str = None
+    name: str = None
+    detail: str = None
+    message: str = ""
+
+    def __post_init__(self):
+        if self.kind not in OP_KINDS:
+            raise ValueError(f"Unknown operation kind '{self.kind}'")
+
+
+@dataclass
+class Plan:
+    """
+    The operations for one host (or one run), in the order they were planned.
+    """
+    name: str
+    operations: list = field(default_factory=list)
+
+    def add(self, kind: str, target, **kwargs) -> Operation:
+        """
+        Appends an operation. Paths may be given as Path objects.
+        A folder that is already planned is not planned twice.
+        """
+        if kind == "mkdir" and any(op.kind == "mkdir" and op.target == str(target) for op in self.operations):
+            return None
+        for key in ("source", "group"):
+            if kwargs.get(key) is not None:
+                kwargs[key] = str(kwargs[key])
+        op = Operation(kind, str(target), **kwargs)
+        self.operations.append(op)
+        return op
+
+    def report(self, keys: tuple) -> dict:
+        """
+        Groups the planned statuses into a report.
+
+            Args:
+                keys (tuple): The report keys to include (in order)
+
+            Returns:
+                dict: key -> list of names, or (name, detail) pairs when a detail is set
+        """
+        report = {key: [] for key in keys}
+        for op in self.operations:
+            if op.status in report:
+                report[op.status].append((op.name, op.detail) if op.detail else op.name)
+        return report
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "operations": [asdict(op) for op in self.operations]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Plan":
+        return cls(data["name"], [Operation(**op) for op in data["operations"]])
+
+
+def save_plans(plans: list, file_path: Path):
+    """
+    Writes plans to a JSON file for review, diffing or later execution.
+
+        Args:
+            plans (list): Plan objects
+            file_path (Path): The JSON file
+
+        Returns:
+            None
+    """
+    data = {"version": PLAN_VERSION, "plans": [p.to_dict() for p in plans]}
+    with helpers_generic.span("write plan JSON", "io"):
+        file_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def load_plans(file_path: Path) -> list:
+    """
+    Reads plans written by save_plans().
+
+        Args:
+            file_path (Path): The JSON file
+
+        Returns:
+            list: Plan objects
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("version") != PLAN_VERSION:
+        raise SystemExit(f"Error: Unsupported plan version in {file_path}")
+    return [Plan.from_dict(p) for p in data["plans"]]
+
+
+def _op_signature(op: Operation) -> tuple:
+    """
+    What makes two operations the same for diffing (content is compared by hash).
+    """
+    content = hashlib.sha256(op.content.encode("utf-8")).hexdigest()[:12] if op.content is not None else None
+    return (op.kind, op.target, op.source, content)
+
+
+def diff_plans(old: list, new: list) -> dict:
+    """
+    Compares two sets of plans host by host.
+
+        Args:
+            old (list): Plan objects
+            new (list): Plan objects
+
+        Returns:
+            dict: plan name -> {"added": [ops], "removed": [ops]} for plans that differ
+    """
+    old_by_name = {p.name: p for p in old}
+    new_by_name = {p.name: p for p in new}
+    result = {}
+
+    for name in sorted(set(old_by_name) | set(new_by_name)):
+        old_ops = {_op_signature(op): op for op in old_by_name.get(name, Plan(name)).operations}
+        new_ops = {_op_signature(op): op for op in new_by_name.get(name, Plan(name)).operations}
+        added = [op for sig, op in new_ops.items() if sig not in old_ops]
+        removed = [op for sig, op in old_ops.items() if sig not in new_ops]
+        if added or removed:
+            result[name] = {"added": added, "removed": removed}
+
+    return result
+
+
+def _apply(op: Operation, dry_run: bool):
+    """
+    Applies (or in a dry run describes) a single operation.
+    """
+    target = Path(op.target)
+
+    if op.kind in ("skip", "warn"):
+        if op.message:
+            print(op.message)
+        return
+
+    if dry_run:
+        if op.message:
+            print(f"  [DRY RUN] Would {DRY_RUN_VERBS[op.kind]} {target.name if op.kind != 'backup' else Path(op.source).name}")
+        return
+
+    with helpers_generic.span(op.kind, "io", file=target.name):
+        if op.kind == "mkdir":
+            target.mkdir(parents=True, exist_ok=True)
+        elif op.kind == "backup":
+            # Snapshot blobs are named by the content planned for them; a file changed since planning
+            # (e.g. a saved plan run later) must not be stored under the old hash or overwritten unsaved
+            if helpers_generic.hash_file(op.source) != target.name:
+                raise SystemExit(f"Error: {op.source} changed since the plan was made; plan the restore again")
+            # An existing blob already holds this file
+            if not target.exists():
+                Path(op.source).replace(target)
+        elif op.kind == "copy":
+            helpers_generic.copy_file(op.source, target)
+        elif op.kind == "blob":
+            # A blob is only published under its name once its content is known to match it,
+            # so an interrupted copy or a source changed since planning never leaves a wrong blob.
+            # The temporary name is our own, as a convert or another extract may write the same blob.
+            if not target.exists():
+                tmp_path = helpers_generic.temp_path_for(target)
+                helpers_generic.copy_file(op.source, tmp_path)
+                if helpers_generic.hash_file(tmp_path) != target.name:
+                    Path(tmp_path).unlink()
+                    raise SystemExit(f"Error: {op.source} changed since the plan was made; extract again")
+                helpers_generic.publish_temp_file(tmp_path, target, target.name)
+        elif op.kind == "write":
+            # Never write through a hard link into the file it shares (e.g. a library template)
+            if target.exists() and target.stat().st_nlink > 1:
+                target.unlink()
+            target.write_text(op.content, encoding="utf-8", newline="")
+        elif op.kind == "remove":
+            target.unlink(missing_ok=True)
+
+    if op.message:
+        print(op.message)
+
+
+def _apply_group(ops: list, dry_run: bool):
+    for op in ops:
+        _apply(op, dry_run)
+
+
+def execute_plans(plans: list, max_workers: int = 8, dry_run: bool = None):
+    """
+    Applies plans with batched, concurrent I/O.
+    Folders are created first, then each group of operations (normally everything touching one file)
+    runs in order on a worker thread, then stage 2 operations (e.g. manifests) run last.
+
+        Args:
+            plans (list): Plan objects
+            max_workers (int): Maximum concurrent operation groups
+            dry_run (bool): Describe instead of apply (defaults to helpers_generic.NO_ACTION)
+
+        Returns:
+            None
+    """
+    helpers_generic.print_debug(f"execute_plans({len(plans)} plans)")
+
+    if dry_run is None:
+        dry_run = helpers_generic.NO_ACTION
+
+    ops = [op for p in plans for op in p.operations]
+
+    # Stage 0: create each folder once
+    for target in dict.fromkeys(op.target for op in ops if op.kind == "mkdir"):
+        _apply(Operation("mkdir", target), dry_run)
+
+    # Stage 1: groups run concurrently, each group in planned order
+    groups = {}
+    for op in ops:
+        if op.kind != "mkdir" and op.stage == 1:
+            groups.setdefault(op.group or op.target, []).append(op)
+
+    with helpers_generic.span("execute plans", "plan", operations=len(ops)), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for future in [pool.submit(_apply_group, group, dry_run) for group in groups.values()]:
+            future.result()
+
+    # Stage 2: anything that depends on the bulk being finished
+    for op in ops:
+        if op.kind != "mkdir" and op.stage == 2:
+            _apply(op, dry_run)
+
+
+def print_plan(p: Plan):
+    """
+    Prints a plan in a reviewable form.
+    """
+    print(f"Plan: {p.name} ({len(p.operations)} operations)")
+    for op in p.operations:
+        detail = f" <- {op.source}" if op.source else ""
+        print(f"  {op.kind:7} {op.target}{detail}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='plan', description='Review, diff and execute saved restore/extract plans.')
+    parser.add_argument('command', choices=['show', 'diff', 'execute'])
+    parser.add_argument('plans', nargs='+', help='Plan JSON file(s); diff takes two')
+    parser.add_argument('--workers', type=int, default=8, help='Maximum concurrent operation groups')
+    parser.add_argument('--copystrategy', choices=helpers_generic.COPY_STRATEGIES, default='auto', help='How files are copied: auto tries reflink then copy_file_range then copy2; hardlink is for read-only staging trees only')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--noaction', action='store_true', help='Dry run: see what would happen')
+    parser.add_argument('--profile', type=str, nargs='?', const='plan_trace.json', help='Write a Chrome trace of the run (default: plan_trace.json) and print the slowest phases')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+    helpers_generic.NO_ACTION = args.noaction
+    helpers_generic.COPY_STRATEGY = args.copystrategy
+
+    if args.profile:
+        helpers_generic.start_profile()
+
+    try:
+        with helpers_generic.span("plan", "cli"):
+            if args.command == "show":
+                for file in args.plans:
+                    for p in load_plans(Path(file)):
+                        print_plan(p)
+            elif args.command == "diff":
+                if len(args.plans) != 2:
+                    parser.error("diff needs exactly two plan files")
+                changes = diff_plans(load_plans(Path(args.plans[0])), load_plans(Path(args.plans[1])))
+                for name, change in changes.items():
+                    print(f"Plan: {name}")
+                    for op in change["removed"]:
+                        print(f"  - {op.kind:7} {op.target}")
+                    for op in change["added"]:
+                        print(f"  + {op.kind:7} {op.target}")
+                if not changes:
+                    print("Plans are identical.")
+            else:
+                execute_plans([p for file in args.plans for p in load_plans(Path(file))], args.workers)
+        helpers_generic.print_copy_stats()
+    finally:
+        if args.profile:
+            helpers_generic.finish_profile(args.profile)
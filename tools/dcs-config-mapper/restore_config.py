@@ -1,17 +1,26 @@
 import argparse
-import json
-import re
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import helpers_generic
 import helpers_dcs
+import fprint_db
+import hardware_map
+import merge_bindings
+import plan
+import snapshot_store
+import template_store
+import template_pack
+
+# Keys of the report returned by apply_templates() and restore_fleet()
+REPORT_KEYS = ("restored", "merged", "unchanged", "backed_up", "unmatched", "conflicts")
 
 def find_fingerprint_by_hostname(search_path: Path, hostname: str) -> dict:
     """
-    Finds the fingerprint JSON in repo/fingerprints/ matching the hostname.
+    Finds the fingerprint in repo/fingerprints/ matching the hostname.
+    Uses the fingerprint database (see fprint_db), which is re-imported only when a JSON file changed.
 
         Args:
-            repo_root: Path - The root of the repository
+            search_path: Path - The fingerprint directory
             hostname: str - The target machine's hostname to match in the fingerprints
 
         Returns:
@@ -19,24 +28,185 @@ def find_fingerprint_by_hostname(search_path: Path, hostname: str) -> dict:
     """
     helpers_generic.print_debug(f"find_fingerprint_by_hostname()")
 
-    if not search_path.exists():
-        raise SystemExit(f"Error: Fingerprint path '{search_path}' not found.")
+    conn = fprint_db.open_store(search_path)
+    try:
+        fingerprint = fprint_db.find_by_hostname(conn, hostname)
+    finally:
+        conn.close()
 
-    for file in search_path.glob("*.json"):
-        try:
-            with open(file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if data.get("hostname") == hostname:
-                    return data
-        except (json.JSONDecodeError, KeyError):
-            continue
+    if fingerprint:
+        return fingerprint
     
     raise SystemExit(f"Error: No fingerprint found for hostname '{hostname}' in {search_path}")
 
 
 
 
-def restore_aircraft_config(aircraft_name: str, hostname: str, fprint_dir: Path, template_root: Path, save_root: str = None):
+def find_templates(template_root: Path, aircraft_name: str) -> list:
+    """
+    Lists the GUID-sanitized templates for one aircraft, parsed once so they can be reused for many hosts.
+    The library can be a template folder, a content-addressed store (see template_store)
+    or a single-file pack (see template_pack).
+
+        Args:
+            template_root: Path - Root directory of the joystick templates, or a template pack
+            aircraft_name: str - The name of the aircraft module (e.g., "F-16C_50")
+
+        Returns:
+            list - (template_path, controller_name, instance_id) tuples sorted by filename, or None if the library has no such aircraft
+    """
+    helpers_generic.print_debug(f"find_templates({aircraft_name})")
+
+    if template_pack.is_pack(template_root):
+        return template_pack.load_pack_templates(template_root, aircraft_name)
+
+    stored = template_store.load_store_templates(template_root, aircraft_name)
+    if stored is not None:
+        return stored
+
+    src_dir = template_root / aircraft_name / "joystick"
+    if not src_dir.exists():
+        return None
+
+    templates = []
+
+    for t_file in sorted(src_dir.glob("*.diff.lua")):
+        parsed = hardware_map.parse_template_name(t_file.name)
+        if parsed:
+            templates.append((t_file, *parsed))
+
+    return templates
+
+
+
+
+def load_templates(template_root: Path, aircraft_name: str) -> list:
+    """
+    Like find_templates(), but a missing aircraft is an error.
+    """
+    templates = find_templates(template_root, aircraft_name)
+    if templates is None:
+        raise SystemExit(f"Error: Template source not found for '{aircraft_name}' in {template_root}")
+    return templates
+
+
+
+
+def new_report() -> dict:
+    """
+    Returns an empty restore report.
+
+        Returns:
+            dict - Empty lists under every report key
+    """
+    return {key: [] for key in REPORT_KEYS}
+
+
+
+
+def plan_templates(templates: list, hw_map: hardware_map.HardwareMap, output_dir: Path, label: str = "", merge: bool = False, prefer: str = "template", name: str = "restore") -> plan.Plan:
+    """
+    Plans copying templates into output_dir, renaming each to the real DCS GUID of the matching controller.
+    In merge mode existing files are three-way merged with the library instead of overwritten,
+    and files whose merged result matches the live file are skipped. Files that already match their
+    template are skipped too. Files that are replaced are saved in a snapshot first (see snapshot_store).
+    Nothing is written here; the plan is applied by plan.execute_plans().
+
+        Args:
+            templates: list - The tuples returned by load_templates()
+            hw_map: HardwareMap - The compiled controllers of the target machine's fingerprint
+            output_dir: Path - The <aircraft>/joystick folder to write into
+            label: str (optional) - Prefix for status messages (used by batch restores)
+            merge: bool (optional) - Merge into existing files instead of replacing them
+            prefer: str (optional) - "template" or "live", which side wins a merge conflict
+            name: str (optional) - The plan name (e.g. "<hostname>/<aircraft>")
+
+        Returns:
+            Plan - The planned operations; plan.report(REPORT_KEYS) gives the expected report
+    """
+    p = plan.Plan(name)
+    p.add("mkdir", output_dir)
+    snapshot = snapshot_store.PlannedSnapshot(output_dir.parent.parent, output_dir.parent.name)
+
+    for t_file, ctrl_name, instance_id in templates:
+
+        # Marriage: Find matching hardware
+        real_guid = hw_map.guid_for(ctrl_name, instance_id)
+
+        if not real_guid:
+            p.add("warn", t_file, status="unmatched", name=hardware_map.template_name(ctrl_name, instance_id),
+                  message=f"  {label}[WARNING] No hardware match for: {ctrl_name} (Instance {instance_id})")
+            continue
+
+        restored_filename = hardware_map.config_name(ctrl_name, real_guid)
+        target_path = output_dir / restored_filename
+        base_path = merge_bindings.base_path_for(target_path)
+        merged_text = None
+
+        if merge and target_path.exists():
+            try:
+                merged_text, changed, conflicts = merge_bindings.merge_file(t_file, target_path, prefer)
+            except ValueError as e:
+                p.add("warn", target_path, message=f"  {label}[WARNING] Cannot merge {restored_filename} ({e}), replacing it instead")
+            else:
+                for section, action_id, action_name in conflicts:
+                    p.add("warn", target_path, status="conflicts", name=restored_filename, detail=action_name,
+                          message=f"  {label}[CONFLICT] {restored_filename}: {section} '{action_name}' changed locally and in the library, kept {prefer}")
+
+                if not changed:
+                    p.add("skip", target_path, status="unchanged", name=restored_filename,
+                          message=f"  {label}[UNCHANGED] {restored_filename}")
+                    p.add("mkdir", base_path.parent)
+                    p.add("copy", base_path, source=t_file, group=target_path)
+                    continue
+
+        live_digest = helpers_generic.hash_file(target_path) if target_path.exists() else None
+        if merged_text is None and live_digest is not None:
+            template_digest = helpers_generic.hash_file(t_file)
+            if live_digest == template_digest:
+                # Already restored: no snapshot and no write, so no-op restores never crowd out real rollback points
+                p.add("skip", target_path, status="unchanged", name=restored_filename,
+                      message=f"  {label}[UNCHANGED] {restored_filename}")
+                if not (base_path.exists() and helpers_generic.hash_file(base_path) == template_digest):
+                    p.add("mkdir", base_path.parent)
+                    p.add("copy", base_path, source=t_file, group=target_path)
+                continue
+
+        # Snapshot the existing file (or its absence) before overwriting
+        snapshot.record(p, target_path, label, live_digest)
+
+        if merged_text is not None:
+            p.add("write", target_path, content=merged_text, status="merged", name=restored_filename,
+                  message=f"  {label}[MERGED] {restored_filename}")
+        else:
+            p.add("copy", target_path, source=t_file, status="restored", name=restored_filename,
+                  message=f"  {label}[RESTORED] {restored_filename}")
+
+        # Record what was applied as the base for the next merge
+        p.add("mkdir", base_path.parent)
+        p.add("copy", base_path, source=t_file, group=target_path)
+
+    snapshot.finish(p)
+    return p
+
+
+
+
+def apply_templates(templates: list, hw_map: hardware_map.HardwareMap, output_dir: Path, label: str = "", merge: bool = False, prefer: str = "template") -> dict:
+    """
+    Plans and immediately executes a restore into output_dir (see plan_templates()).
+
+        Returns:
+            dict - Lists of filenames under each of REPORT_KEYS ("conflicts" holds (filename, action name) pairs)
+    """
+    p = plan_templates(templates, hw_map, output_dir, label, merge, prefer)
+    plan.execute_plans([p])
+    return p.report(REPORT_KEYS)
+
+
+
+
+def restore_aircraft_config(aircraft_name: str, hostname: str, fprint_dir: Path, template_root: Path, save_root: str = None, merge: bool = False, prefer: str = "template", plan_file: Path = None) -> dict:
     """
     Restores joystick configuration for a specific aircraft by matching template files to the hardware fingerprints.
 
@@ -46,8 +216,11 @@ def restore_aircraft_config(aircraft_name: str, hostname: str, fprint_dir: Path,
             fprint_dir: Path - Directory where fingerprint JSON files are stored   
             template_root: Path - Root directory of the joystick templates
             save_root: str (optional) - If provided, the root path of the DCS Saved Games directory to directly place restored configs. If not provided, outputs to current directory for manual staging.
+            merge: bool (optional) - Three-way merge into existing files instead of replacing them
+            prefer: str (optional) - "template" or "live", which side wins a merge conflict
+            plan_file: Path (optional) - Save the plan here for review instead of executing it
         Returns:
-            None - The function performs file operations and prints status messages.
+            dict - The planned report (see plan_templates()); the function also performs file operations and prints status messages.
     """
     # Load Fingerprint
     fingerprint = find_fingerprint_by_hostname(fprint_dir, hostname)
@@ -56,12 +229,10 @@ def restore_aircraft_config(aircraft_name: str, hostname: str, fprint_dir: Path,
     print(f"machine_guid:{fingerprint.get('machine_guid')}")
     print(f"with {len(fingerprint.get('controllers', []))} controllers.")
 
-    hardware_map = fingerprint.get("controllers", [])
+    hw_map = hardware_map.HardwareMap.from_fingerprint(fingerprint)
 
     # Locate Templates
-    src_dir = template_root / aircraft_name / "joystick"
-    if not src_dir.exists():
-        raise SystemExit(f"Error: Template source not found at {src_dir}")
+    templates = load_templates(template_root, aircraft_name)
 
     # Determine Output Location
     if save_root:
@@ -72,67 +243,250 @@ def restore_aircraft_config(aircraft_name: str, hostname: str, fprint_dir: Path,
         print("Targeting local directory for manual staging.")
 
     output_dir = base_output / aircraft_name / "joystick"
-    template_pattern = re.compile(r"^(.*)\s+({__GUID__})_(\d+)\.diff\.lua$")
 
-    if not helpers_generic.NO_ACTION:
-        output_dir.mkdir(parents=True, exist_ok=True)
+    p = plan_templates(templates, hw_map, output_dir, merge=merge, prefer=prefer, name=f"{hostname}/{aircraft_name}")
+
+    if plan_file:
+        plan.save_plans([p], plan_file)
+        print(f"Wrote plan ({len(p.operations)} operations) to: {plan_file}")
+    else:
+        plan.execute_plans([p])
+
+    return p.report(REPORT_KEYS)
+
 
-    for t_file in src_dir.glob("*.diff.lua"):
-        match = template_pattern.match(t_file.name)
-        if not match:
+
+
+def list_template_aircraft(template_root: Path) -> list:
+    """
+    Lists every aircraft in the template library that has a joystick folder or a store manifest, or every aircraft in a pack.
+
+        Args:
+            template_root: Path - Root directory of the joystick templates, or a template pack
+
+        Returns:
+            list - Sorted aircraft names
+    """
+    if template_pack.is_pack(template_root):
+        return template_pack.list_pack_aircraft(template_root)
+
+    return sorted(d.name for d in template_root.iterdir()
+                  if (d / "joystick").is_dir() or (d / template_store.STORE_MANIFEST).is_file())
+
+
+
+
+def plan_fleet(hostnames: list, aircraft_names: list, fprint_dir: Path, template_root: Path, host_root: Path, max_workers: int = 8, merge: bool = False, prefer: str = "template") -> list:
+    """
+    Plans restoring many aircraft onto many hosts.
+    Each fingerprint and template folder is loaded once, then the (host, aircraft) pairs are planned on a bounded thread pool.
+
+        Args:
+            hostnames: list - Target hostnames, or ["all"] for every fingerprinted host
+            aircraft_names: list - Aircraft module names, or ["all"] for every aircraft in the template library
+            fprint_dir: Path - Directory where fingerprint JSON files are stored
+            template_root: Path - Root directory of the joystick templates
+            host_root: Path - Each host is restored into <host_root>/<hostname> laid out as a DCS Saved Games root
+            max_workers: int - Maximum number of pairs planned concurrently
+            merge: bool - Three-way merge into existing files instead of replacing them
+            prefer: str - "template" or "live", which side wins a merge conflict
+
+        Returns:
+            list - One Plan per (host, aircraft), named "<hostname>/<aircraft>"
+    """
+    helpers_generic.print_debug(f"plan_fleet()")
+
+    conn = fprint_db.open_store(fprint_dir)
+    try:
+        # Load every fingerprint once; "all" is every machine under its current hostname
+        if hostnames == ["all"]:
+            fingerprints = [(row[0], fprint_db.find_by_machine_guid(conn, row[1])) for row in fprint_db.list_hosts(conn)]
+        else:
+            fingerprints = [(hostname, fprint_db.find_by_hostname(conn, hostname)) for hostname in hostnames]
+
+        hw_maps = {}
+        for hostname, fingerprint in fingerprints:
+            if not fingerprint:
+                print(f"Warning: No fingerprint found for hostname '{hostname}', skipping.")
+                continue
+            hw_maps[hostname] = hardware_map.HardwareMap.from_fingerprint(fingerprint)
+    finally:
+        conn.close()
+
+    if aircraft_names == ["all"]:
+        aircraft_names = list_template_aircraft(template_root)
+
+    # Load every template folder once
+    templates = {}
+    for aircraft_name in aircraft_names:
+        aircraft_templates = find_templates(template_root, aircraft_name)
+        if aircraft_templates is None:
+            print(f"Warning: No templates found for '{aircraft_name}', skipping.")
             continue
+        templates[aircraft_name] = aircraft_templates
 
-        ctrl_name = match.group(1).strip()
-        instance_id = int(match.group(3))
+    print(f"Planning {len(templates)} aircraft onto {len(hw_maps)} hosts ({max_workers} workers).")
 
-        # Marriage: Find matching hardware
-        target_hw = next(
-            (item for item in hardware_map 
-             if item['controller_name'] == ctrl_name and item['instance_id'] == instance_id),
+    with helpers_generic.span("plan restore", "plan", hosts=len(hw_maps)), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = []
+        for hostname, hw_map in hw_maps.items():
+            input_path = host_root / hostname / "Config" / "Input"
+            for aircraft_name, aircraft_templates in templates.items():
+                futures.append(pool.submit(
+                    plan_templates,
+                    aircraft_templates,
+                    hw_map,
+                    input_path / aircraft_name / "joystick",
+                    f"[{hostname}/{aircraft_name}] ",
+                    merge,
+                    prefer,
+                    f"{hostname}/{aircraft_name}"
+                ))
+
+        return [future.result() for future in futures]
+
+
+
+
+def fleet_report(plans: list) -> dict:
+    """
+    Aggregates the reports of fleet plans.
+
+        Args:
+            plans: list - The plans returned by plan_fleet()
+
+        Returns:
+            dict - Lists of (hostname, aircraft, entry) under each of REPORT_KEYS
+    """
+    report = new_report()
+
+    for p in plans:
+        hostname, aircraft_name = p.name.split("/", 1)
+        for key, names in p.report(REPORT_KEYS).items():
+            report[key].extend((hostname, aircraft_name, name) for name in names)
+
+    for key in report:
+        report[key].sort()
+
+    return report
+
+
+
+
+def restore_fleet(hostnames: list, aircraft_names: list, fprint_dir: Path, template_root: Path, host_root: Path, max_workers: int = 8, merge: bool = False, prefer: str = "template", plan_file: Path = None) -> dict:
+    """
+    Restores many aircraft onto many hosts in one process.
+    Every (host, aircraft) pair is planned up front (see plan_fleet()), then all plans are executed together
+    on a bounded thread pool, or saved to plan_file for review.
+
+        Args:
+            hostnames: list - Target hostnames, or ["all"] for every fingerprinted host
+            aircraft_names: list - Aircraft module names, or ["all"] for every aircraft in the template library
+            fprint_dir: Path - Directory where fingerprint JSON files are stored
+            template_root: Path - Root directory of the joystick templates
+            host_root: Path - Each host is restored into <host_root>/<hostname> laid out as a DCS Saved Games root
+            max_workers: int - Maximum number of concurrent file operations
+            merge: bool - Three-way merge into existing files instead of replacing them
+            prefer: str - "template" or "live", which side wins a merge conflict
+            plan_file: Path - Save the plans here for review instead of executing them
+
+        Returns:
+            dict - Aggregated lists of (hostname, aircraft, entry) under each of REPORT_KEYS
+    """
+    helpers_generic.print_debug(f"restore_fleet()")
+
+    plans = plan_fleet(hostnames, aircraft_names, fprint_dir, template_root, host_root, max_workers, merge, prefer)
+
+    if plan_file:
+        plan.save_plans(plans, plan_file)
+        print(f"Wrote {len(plans)} plans to: {plan_file}")
+    else:
+        plan.execute_plans(plans, max_workers)
+
+    return fleet_report(plans)
+
+
+
+
+def print_fleet_report(report: dict):
+    """
+    Prints the aggregated result of restore_fleet().
+
+        Args:
+            report: dict - The report returned by restore_fleet()
+
+        Returns:
             None
-        )
-
-        if target_hw:
-            real_guid = target_hw['dcs_guid']
-            restored_filename = f"{ctrl_name} {real_guid}.diff.lua"
-            target_path = output_dir / restored_filename
-
-            # Backup any existing files before overwriting
-            if target_path.exists():
-                backup_path = target_path.with_suffix(target_path.suffix + ".old")
-                if not helpers_generic.NO_ACTION:
-                    # Overwrite existing .old if it exists to keep only the most recent backup
-                    target_path.replace(backup_path)
-                    print(f"  [BACKUP] Existing file renamed to: {backup_path.name}")
-                else:
-                    print(f"  [DRY RUN] Would rename existing {target_path.name} to .old")
-
-            if not helpers_generic.NO_ACTION:
-                shutil.copy2(t_file, target_path)
-                print(f"  [RESTORED] {restored_filename}")
-            else:
-                print(f"  [DRY RUN] Would map {ctrl_name}_{instance_id} to {real_guid}")
-        else:
-            print(f"  [WARNING] No hardware match for: {ctrl_name} (Instance {instance_id})")
+    """
+    print("\n--- Restore Report ---")
+    for key in REPORT_KEYS:
+        print(f"{key}: {len(report[key])}")
+
+    for hostname, aircraft_name, name in report["unmatched"]:
+        print(f"  [UNMATCHED] {hostname}/{aircraft_name}: {name}")
+
+    for hostname, aircraft_name, (name, action_name) in report["conflicts"]:
+        print(f"  [CONFLICT] {hostname}/{aircraft_name}: {name}: {action_name}")
+
+
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='restoredcs')
-    parser.add_argument('aircraft', help='The aircraft module name')
-    parser.add_argument('hostname', help='Target machine hostname')
+    parser.add_argument('aircraft', nargs='?', help='The aircraft module name')
+    parser.add_argument('hostname', nargs='?', help='Target machine hostname')
     parser.add_argument('--repofprints', type=str, default=".", help='Fingerprint directory')
-    parser.add_argument('--repotemplates', type=str, default=".", help='Templates directory')
+    parser.add_argument('--repotemplates', type=str, default=".", help='Templates directory, or a template pack (see template_pack.py)')
     parser.add_argument('--saveroot', type=str, help='DCS Saved Games root')
+    parser.add_argument('--hosts', type=str, help='Batch mode: comma separated hostnames, or "all"')
+    parser.add_argument('--aircraftlist', type=str, default="all", help='Batch mode: comma separated aircraft names, or "all"')
+    parser.add_argument('--hostroot', type=str, default=".", help='Batch mode: folder holding one Saved Games root per host')
+    parser.add_argument('--workers', type=int, default=8, help='Batch mode: maximum concurrent restores')
+    parser.add_argument('--merge', action='store_true', help='Three-way merge into existing configs instead of replacing them')
+    parser.add_argument('--prefer', choices=['template', 'live'], default='template', help='Which side wins a merge conflict')
+    parser.add_argument('--plan', type=str, help='Write the plan to this JSON file instead of executing it (see plan.py)')
+    parser.add_argument('--copystrategy', choices=helpers_generic.COPY_STRATEGIES, default='auto', help='How files are copied: auto tries reflink then copy_file_range then copy2; hardlink is for read-only staging trees only')
     parser.add_argument('--debug', action='store_true')
     parser.add_argument('--noaction', action='store_true')
+    parser.add_argument('--profile', type=str, nargs='?', const='restore_config_trace.json', help='Write a Chrome trace of the run (default: restore_config_trace.json) and print the slowest phases')
 
     args = parser.parse_args()
     helpers_generic.DEBUG = args.debug
     helpers_generic.NO_ACTION = args.noaction
+    helpers_generic.COPY_STRATEGY = args.copystrategy
 
-    restore_aircraft_config(
-        args.aircraft, 
-        args.hostname, 
-        Path(args.repofprints), 
-        Path(args.repotemplates),
-        args.saveroot
-    )
\ No newline at end of file
+    if args.profile:
+        helpers_generic.start_profile()
+
+    try:
+        with helpers_generic.span("restore_config", "cli"):
+            if args.hosts:
+                report = restore_fleet(
+                    args.hosts.split(","),
+                    args.aircraftlist.split(","),
+                    Path(args.repofprints),
+                    Path(args.repotemplates),
+                    Path(args.hostroot),
+                    args.workers,
+                    args.merge,
+                    args.prefer,
+                    Path(args.plan) if args.plan else None
+                )
+                print_fleet_report(report)
+            elif args.aircraft and args.hostname:
+                restore_aircraft_config(
+                    args.aircraft, 
+                    args.hostname, 
+                    Path(args.repofprints), 
+                    Path(args.repotemplates),
+                    args.saveroot,
+                    args.merge,
+                    args.prefer,
+                    Path(args.plan) if args.plan else None
+                )
+            else:
+                parser.error("aircraft and hostname are required unless --hosts is given")
+        helpers_generic.print_copy_stats()
+    finally:
+        if args.profile:
+            helpers_generic.finish_profile(args.profile)
@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+import helpers_generic
+import helpers_dcs
+import plan
+import template_store
+
+# Constants
+SNAPSHOT_DIRNAME = ".config_snapshots"
+SNAPSHOT_MANIFEST_DIRNAME = "snapshots"
+SNAPSHOT_VERSION = 1
+
+# Snapshots kept per aircraft by "prune" unless --keep is given
+DEFAULT_KEEP = 10
+
+
+def snapshot_root(input_path: Path) -> Path:
+    """
+    Returns a host's snapshot store: next to Config/ in the Saved Games root, so DCS never sees it.
+
+        Args:
+            input_path (Path): The host's DCS Config/Input directory
+
+        Returns:
+            Path: <Saved Games root>/.config_snapshots
+    """
+    return input_path.parent.parent / SNAPSHOT_DIRNAME
+
+
+def manifest_path(root: Path, snapshot_id: str) -> Path:
+    return root / SNAPSHOT_MANIFEST_DIRNAME / f"{snapshot_id}.json"
+
+
+def new_snapshot_id(root: Path, aircraft_name: str) -> str:
+    """
+    Returns a new snapshot id, e.g. "20261017T031400Z_F-15C", with "-2", "-3", ... appended for
+    more snapshots of the aircraft in the same second (see _snapshot_order()).
+    """
+    base = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}_{aircraft_name}"
+    snapshot_id = base
+    count = 1
+    while manifest_path(root, snapshot_id).exists():
+        count += 1
+        snapshot_id = f"{base}-{count}"
+    return snapshot_id
+
+
+class PlannedSnapshot:
+    """
+    Collects the files a plan is about to replace into one snapshot.
+    Each replaced file is moved into the blob area under its SHA-256 (nothing is copied), or left alone
+    if an identical blob is already stored. The executor checks the hash again before the move, so a
+    saved plan run after the file has changed fails instead of storing the wrong content.
+    Files the plan creates are recorded as absent, so a rollback removes them again.
+    """
+
+    def __init__(self, input_path: Path, aircraft_name: str):
+        self.input_path = input_path
+        self.aircraft = aircraft_name
+        self.root = snapshot_root(input_path)
+        self.id = new_snapshot_id(self.root, aircraft_name)
+        self.files = {}
+
+    def record(self, p: plan.Plan, target_path: Path, label: str = "", digest: str = None):
+        """
+        Adds the operations that save target_path to the plan. Call it before planning the write to target_path.
+        Pass digest if the caller has already hashed the file.
+        """
+        relative = target_path.relative_to(self.input_path).as_posix()
+        if not target_path.exists():
+            self.files[relative] = None
+            return
+
+        digest = digest or helpers_generic.hash_file(target_path)
+        self.files[relative] = digest
+        blob = template_store.blob_path(self.root, digest)
+        p.add("mkdir", blob.parent)
+        p.add("backup", blob, source=target_path, group=target_path, status="backed_up", name=target_path.name,
+              message=f"  {label}[BACKUP] {target_path.name} saved in snapshot {self.id}")
+
+    def finish(self, p: plan.Plan):
+        """
+        Adds the snapshot manifest to the plan, written once every file has been saved.
+        """
+        if not self.files:
+            return
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "id": self.id,
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+            "aircraft": self.aircraft,
+            "files": dict(sorted(self.files.items())),
+        }
+        target = manifest_path(self.root, self.id)
+        p.add("mkdir", target.parent)
+        p.add("write", target, content=json.dumps(data, indent=2), stage=2)
+
+
+def load_snapshot(root: Path, snapshot_id: str) -> dict:
+    try:
+        with open(manifest_path(root, snapshot_id), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise SystemExit(f"Error: Cannot read snapshot '{snapshot_id}': {e}")
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise SystemExit(f"Error: Unsupported snapshot version in '{snapshot_id}'")
+    return data
+
+
+def _snapshot_order(snapshot: dict) -> tuple:
+    """
+    Sorts snapshots by creation: the id's timestamp, then its numeric same-second counter (so "-10" follows "-9").
+    """
+    timestamp, _, rest = snapshot["id"].partition("_")
+    suffix = rest[len(snapshot["aircraft"]) + 1:]
+    return timestamp, int(suffix) if suffix.isdigit() else 1, snapshot["id"]
+
+
+def list_snapshots(root: Path) -> list:
+    """
+    Lists a host's snapshots, oldest first.
+
+        Args:
+            root (Path): The snapshot store
+
+        Returns:
+            list: Snapshot manifests (id, created, aircraft and files)
+    """
+    manifest_dir = root / SNAPSHOT_MANIFEST_DIRNAME
+    if not manifest_dir.is_dir():
+        return []
+    with os.scandir(manifest_dir) as entries:
+        ids = [e.name[:-len(".json")] for e in entries if e.name.endswith(".json")]
+    return sorted((load_snapshot(root, snapshot_id) for snapshot_id in ids), key=_snapshot_order)
+
+
+def resolve_snapshot(root: Path, ref: str) -> str:
+    """
+    Resolves "latest", a full snapshot id or a unique id prefix to a snapshot id.
+    """
+    ids = [s["id"] for s in list_snapshots(root)]
+    if not ids:
+        raise SystemExit(f"Error: No snapshots in {root}")
+    if ref == "latest":
+        return ids[-1]
+    if ref in ids:
+        return ref
+    matches = [snapshot_id for snapshot_id in ids if snapshot_id.startswith(ref)]
+    if len(matches) != 1:
+        raise SystemExit(f"Error: '{ref}' matches {len(matches)} snapshots")
+    return matches[0]
+
+
+def plan_rollback(input_path: Path, snapshot_id: str) -> plan.Plan:
+    """
+    Plans putting every file of a snapshot back the way it was before the restore that took it.
+    The files the rollback replaces are snapshotted too, so a rollback can itself be rolled back.
+
+        Args:
+            input_path (Path): The host's DCS Config/Input directory
+            snapshot_id (str): The snapshot to roll back to
+
+        Returns:
+            Plan - The planned operations
+    """
+    helpers_generic.print_debug(f"snapshot_store.plan_rollback({snapshot_id})")
+
+    root = snapshot_root(input_path)
+    data = load_snapshot(root, snapshot_id)
+    p = plan.Plan(f"rollback/{snapshot_id}")
+    undo = PlannedSnapshot(input_path, data["aircraft"])
+
+    for relative, digest in data["files"].items():
+        target = input_path / relative
+
+        if digest is None:
+            # The restore created this file
+            if target.exists():
+                undo.record(p, target)
+                p.add("remove", target, group=target, status="removed", name=target.name,
+                      message=f"  [REMOVED] {target.name}")
+            continue
+
+        blob = template_store.blob_path(root, digest)
+        if not blob.exists():
+            raise SystemExit(f"Error: Snapshot '{snapshot_id}' is missing blob {digest} for {relative}")
+        if target.exists() and helpers_generic.hash_file(target) == digest:
+            p.add("skip", target, status="unchanged", name=target.name)
+            continue
+
+        undo.record(p, target)
+        p.add("mkdir", target.parent)
+        p.add("copy", target, source=blob, group=target, status="restored", name=target.name,
+              message=f"  [RESTORED] {target.name}")
+
+    undo.finish(p)
+    return p
+
+
+def prune_snapshots(root: Path, keep: int = DEFAULT_KEEP, days: float = None) -> tuple:
+    """
+    Removes old snapshots and then every blob no remaining snapshot uses (honours helpers_generic.NO_ACTION).
+    A snapshot is kept if it is one of the newest `keep` for its aircraft, or younger than `days`.
+
+        Args:
+            root (Path): The snapshot store
+            keep (int): Snapshots kept per aircraft
+            days (float): Also keep anything newer than this many days (None to keep by count only)
+
+        Returns:
+            tuple: (removed snapshot ids, oldest first, removed blob count)
+    """
+    helpers_generic.print_debug(f"snapshot_store.prune_snapshots({root})")
+
+    snapshots = list_snapshots(root)
+    now = datetime.now(UTC)
+    by_aircraft = {}
+    for s in snapshots:
+        by_aircraft.setdefault(s["aircraft"], []).append(s)
+
+    removed = []
+    for aircraft_snapshots in by_aircraft.values():
+        for s in aircraft_snapshots[:max(len(aircraft_snapshots) - keep, 0)]:
+            if days is not None and (now - datetime.fromisoformat(s["created"])).total_seconds() < days * 86400:
+                continue
+            removed.append(s["id"])
+
+    referenced = {digest for s in snapshots if s["id"] not in removed for digest in s["files"].values() if digest}
+    blobs = []
+    blob_root = root / template_store.BLOB_DIRNAME
+    if blob_root.is_dir():
+        blobs = [path for path in blob_root.glob("*/*") if path.name not in referenced]
+
+    for snapshot_id in removed:
+        if helpers_generic.NO_ACTION:
+            print(f"  [DRY RUN] Would remove snapshot {snapshot_id}")
+        else:
+            manifest_path(root, snapshot_id).unlink()
+    if not helpers_generic.NO_ACTION:
+        for path in blobs:
+            path.unlink()
+
+    return removed, len(blobs)
+
+
+def print_snapshots(snapshots: list):
+    for s in snapshots:
+        replaced = sum(1 for digest in s["files"].values() if digest)
+        created = len(s["files"]) - replaced
+        print(f"{s['id']:<40} {s['created']}  {replaced} replaced, {created} created")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='snapshot_store', description='List, roll back and prune the config snapshots taken by restores.')
+    parser.add_argument('command', choices=['list', 'rollback', 'prune'])
+    parser.add_argument('snapshot', nargs='?', default='latest', help='rollback: snapshot id, unique id prefix, or "latest"')
+    parser.add_argument('--saveroot', type=str, help='DCS Saved Games root of the host')
+    parser.add_argument('--aircraft', type=str, help='list: only this aircraft')
+    parser.add_argument('--keep', type=int, default=DEFAULT_KEEP, help='prune: snapshots kept per aircraft')
+    parser.add_argument('--days', type=float, help='prune: also keep snapshots newer than this many days')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--noaction', action='store_true', help='Dry run: see what would happen')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+    helpers_generic.NO_ACTION = args.noaction
+
+    input_path = helpers_dcs.get_input_path(args.saveroot)
+    root = snapshot_root(input_path)
+
+    if args.command == "list":
+        snapshots = [s for s in list_snapshots(root) if not args.aircraft or s["aircraft"] == args.aircraft]
+        if not snapshots:
+            print(f"No snapshots in {root}")
+        print_snapshots(snapshots)
+    elif args.command == "rollback":
+        snapshot_id = resolve_snapshot(root, args.snapshot)
+        p = plan_rollback(input_path, snapshot_id)
+        plan.execute_plans([p])
+        report = p.report(("restored", "removed", "unchanged"))
+        print(f"Rolled back to {snapshot_id}: {len(report['restored'])} restored, "
+              f"{len(report['removed'])} removed, {len(report['unchanged'])} unchanged")
+    else:
+        removed, blob_count = prune_snapshots(root, args.keep, args.days)
+        verb = "Would remove" if helpers_generic.NO_ACTION else "Removed"
+        print(f"{verb} {len(removed)} snapshots and {blob_count} unreferenced blobs.")
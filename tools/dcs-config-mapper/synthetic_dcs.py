@@ -0,0 +1,133 @@
+import argparse
+import random
+from pathlib import Path
+import helpers_generic
+import difflua
+import hardware_map
+
+# The template library this tool ships with, used to seed realistic binding files
+DEFAULT_SEED_TEMPLATES = Path(__file__).resolve().parent.parent.parent / "data" / "templates" / "F-15C" / "joystick"
+
+# Folders DCS keeps next to joystick/ for every aircraft
+OTHER_INPUT_DIRS = ("keyboard", "mouse", "trackir", "headtracker", "modifiers")
+
+
+def load_seed_trees(template_dir: Path = DEFAULT_SEED_TEMPLATES) -> dict:
+    """
+    Loads the real templates used to seed synthetic binding files.
+
+        Args:
+            template_dir (Path): A <aircraft>/joystick template folder
+
+        Returns:
+            dict: controller name -> parsed diff tree
+    """
+    seeds = {}
+    for file in sorted(template_dir.glob("*.diff.lua")):
+        parsed = hardware_map.parse_template_name(file.name)
+        if parsed:
+            seeds[parsed[0]] = difflua.load(file)
+
+    if not seeds:
+        raise SystemExit(f"Error: No seed templates found in {template_dir}")
+    return seeds
+
+
+def _random_guid(rng: random.Random) -> str:
+    """
+    Returns a DCS style device GUID such as {86FEB590-E9EB-11ee-8002-444553540000}.
+    """
+    return "{%08X-%04X-11ee-%04X-444553540000}" % (rng.getrandbits(32), rng.getrandbits(16), rng.getrandbits(16))
+
+
+def _grow_tree(tree: dict, target_size: int, rng: random.Random) -> dict:
+    """
+    Pads a diff tree with extra keyDiffs entries until it serializes to roughly target_size bytes.
+    """
+    if not target_size:
+        return tree
+
+    tree = {section: dict(entries) for section, entries in tree.items()}
+    key_diffs = tree.setdefault("keyDiffs", {})
+    n = 0
+    while len(difflua.dumps(tree)) < target_size:
+        # Add entries in batches so very large files do not re-serialize for every entry
+        for _ in range(16):
+            n += 1
+            key_diffs[f"d{3000 + n}pnilu{rng.randint(100, 9999)}cdnilvdnilvpnilvunil"] = {
+                "name": f"Synthetic Action {n}",
+                "added": {1: {"key": f"JOY_BTN{rng.randint(1, 128)}"}},
+            }
+    return tree
+
+
+def generate_saved_games(root: Path, aircraft_count: int = 10, controllers_per_aircraft: int = 5, dual_sticks: int = 0,
+                         diff_size: int = 0, seed: int = 1, template_dir: Path = DEFAULT_SEED_TEMPLATES) -> dict:
+    """
+    Creates a synthetic DCS Saved Games tree for benchmarks and manual testing.
+
+        Args:
+            root (Path): The Saved Games root to create (Config/Input is created inside it)
+            aircraft_count (int): Number of aircraft folders
+            controllers_per_aircraft (int): Distinct controllers bound in every aircraft
+            dual_sticks (int): Controllers that appear twice (same name, different GUID) on the machine
+            diff_size (int): Approximate size in bytes of each .diff.lua (0 keeps the seed size)
+            seed (int): Random seed, so the same arguments always produce the same tree
+            template_dir (Path): Real templates used as the content of the generated files
+
+        Returns:
+            dict: The devices on the synthetic machine: controller name -> list of GUIDs
+    """
+    helpers_generic.print_debug(f"generate_saved_games({root}, aircraft={aircraft_count})")
+
+    rng = random.Random(seed)
+    seeds = load_seed_trees(template_dir)
+    seed_names = list(seeds)
+
+    # One machine: every controller gets a stable GUID, dual sticks get a second one
+    names = [seed_names[i] if i < len(seed_names) else f"Synthetic Controller {i + 1}" for i in range(controllers_per_aircraft)]
+    devices = {name: [_random_guid(rng)] for name in names}
+    for name in names[:dual_sticks]:
+        devices[name].append(_random_guid(rng))
+
+    # Serialize each controller's content once and reuse it for every aircraft
+    contents = {}
+    for i, name in enumerate(names):
+        tree = _grow_tree(seeds[seed_names[i % len(seed_names)]], diff_size, rng)
+        contents[name] = difflua.dumps(tree)
+
+    input_path = root / "Config" / "Input"
+    for a in range(aircraft_count):
+        aircraft_dir = input_path / f"Aircraft-{a:03d}"
+        joy_dir = aircraft_dir / "joystick"
+        joy_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, guids in devices.items():
+            for guid in guids:
+                (joy_dir / hardware_map.config_name(name, guid)).write_text(contents[name], encoding="utf-8", newline="")
+
+        for other in OTHER_INPUT_DIRS:
+            other_dir = aircraft_dir / other
+            other_dir.mkdir(exist_ok=True)
+            (other_dir / "Device {00000000-0000-0000-0000-000000000000}.diff.lua").write_text("local diff = {\n}\nreturn diff")
+
+    return devices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='synthetic_dcs', description='Generate a synthetic DCS Saved Games tree.')
+    parser.add_argument('root', type=str, help='Saved Games root to create')
+    parser.add_argument('--aircraft', type=int, default=10, help='Number of aircraft folders')
+    parser.add_argument('--controllers', type=int, default=5, help='Controllers per aircraft')
+    parser.add_argument('--dualsticks', type=int, default=0, help='Controllers duplicated as a second identical device')
+    parser.add_argument('--diffsize', type=int, default=0, help='Approximate bytes per .diff.lua (0 keeps the seed size)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--templates', type=str, default=str(DEFAULT_SEED_TEMPLATES), help='Seed template folder')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    devices = generate_saved_games(Path(args.root), args.aircraft, args.controllers, args.dualsticks,
+                                   args.diffsize, args.seed, Path(args.templates))
+    print(f"Generated {args.aircraft} aircraft with {sum(len(g) for g in devices.values())} devices in {args.root}")
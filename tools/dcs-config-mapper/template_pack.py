@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import json
+import zipfile
+from pathlib import Path
+import helpers_generic
+import hardware_map
+import template_store
+
+# Constants
+PACK_VERSION = 1
+PACK_INDEX = "index.json"
+BLOB_PREFIX = "blobs/"
+CACHE_SUFFIX = ".cache"
+
+COMPRESSION = {
+    "lzma": zipfile.ZIP_LZMA,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "store": zipfile.ZIP_STORED,
+}
+
+
+def is_pack(path: Path) -> bool:
+    """
+    Returns True if path is a template pack rather than a template folder.
+    """
+    return path.is_file() and zipfile.is_zipfile(path)
+
+
+def _library_templates(template_root: Path) -> dict:
+    """
+    Lists every template in a library, in either the folder or the store layout.
+
+        Returns:
+            dict: aircraft name -> list of (template filename, source path)
+    """
+    library = {}
+    for aircraft_dir in sorted(d for d in template_root.iterdir() if d.is_dir() and not d.name.startswith(".")):
+        stored = template_store.load_aircraft_manifest(template_root, aircraft_dir.name)
+        if stored is not None:
+            library[aircraft_dir.name] = [(name, template_store.blob_path(template_root, digest)) for name, digest in sorted(stored.items())]
+        elif (aircraft_dir / "joystick").is_dir():
+            library[aircraft_dir.name] = [(f.name, f) for f in sorted((aircraft_dir / "joystick").glob("*.diff.lua"))]
+    return library
+
+
+def build_pack(template_root: Path, pack_path: Path, compression: str = "lzma") -> dict:
+    """
+    Packs a template library into a single zip file.
+    Identical templates are stored once, and index.json maps aircraft -> controller -> instance to
+    the blob member. The zip's central directory locates each member, so one template can be read
+    without unpacking the rest. Cached templates the new pack no longer holds are removed.
+
+        Args:
+            template_root (Path): The template library (folder or store layout)
+            pack_path (Path): The pack to write (replaced if it exists)
+            compression (str): "lzma", "deflate" or "store"
+
+        Returns:
+            dict: Counts of "aircraft", "templates" and "blobs", and the pack "bytes"
+    """
+    helpers_generic.print_debug(f"template_pack.build_pack({template_root} -> {pack_path})")
+
+    library = _library_templates(template_root)
+    index = {}
+    members = {}
+
+    tmp_path = pack_path.with_name(pack_path.name + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w", compression=COMPRESSION[compression]) as zf:
+        for aircraft_name, templates in library.items():
+            for name, source in templates:
+                parsed = hardware_map.parse_template_name(name)
+                if not parsed:
+                    continue
+                data = source.read_bytes()
+                digest = hashlib.sha256(data).hexdigest()
+                member = BLOB_PREFIX + digest
+                if member not in members:
+                    zf.writestr(member, data)
+                    members[member] = digest
+
+                ctrl_name, instance_id = parsed
+                index.setdefault(aircraft_name, {}).setdefault(ctrl_name, {})[str(instance_id)] = {
+                    "blob": digest,
+                    "size": len(data),
+                }
+
+        zf.writestr(PACK_INDEX, json.dumps({"version": PACK_VERSION, "aircraft": index}, indent=1, sort_keys=True))
+
+    tmp_path.replace(pack_path)
+    prune_cache(pack_path, set(members.values()))
+    return {
+        "aircraft": len(index),
+        "templates": sum(len(instances) for controllers in index.values() for instances in controllers.values()),
+        "blobs": len(members),
+        "bytes": pack_path.stat().st_size,
+    }
+
+
+class TemplatePack:
+    """
+    Random access to a template pack. Only index.json is read up front; templates are decompressed on demand.
+    """
+
+    def __init__(self, pack_path: Path):
+        self.path = pack_path
+        self._zip = zipfile.ZipFile(pack_path)
+        try:
+            data = json.loads(self._zip.read(PACK_INDEX))
+        except KeyError:
+            raise SystemExit(f"Error: {pack_path} is not a template pack (no {PACK_INDEX})")
+        if data.get("version") != PACK_VERSION:
+            raise SystemExit(f"Error: Unsupported template pack version in {pack_path}")
+        self.index = data["aircraft"]
+
+    def aircraft(self) -> list:
+        return sorted(self.index)
+
+    def templates(self, aircraft_name: str) -> list:
+        """
+        Lists an aircraft's templates.
+
+            Returns:
+                list: (template filename, controller_name, instance_id, blob digest) sorted by filename,
+                      or None if the pack has no such aircraft
+        """
+        controllers = self.index.get(aircraft_name)
+        if controllers is None:
+            return None
+        templates = [(hardware_map.template_name(ctrl_name, int(instance)), ctrl_name, int(instance), entry["blob"])
+                     for ctrl_name, instances in controllers.items() for instance, entry in instances.items()]
+        return sorted(templates)
+
+    def read_blob(self, digest: str) -> bytes:
+        return self._zip.read(BLOB_PREFIX + digest)
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def cache_dir_for(pack_path: Path) -> Path:
+    """
+    Returns the folder that holds templates read from a pack (<pack>.cache next to it).
+    """
+    return pack_path.with_name(pack_path.name + CACHE_SUFFIX)
+
+
+def prune_cache(pack_path: Path, digests: set) -> int:
+    """
+    Removes cached templates that are not in digests (the pack's blobs). Other cache files (e.g. indexes) are kept.
+
+        Returns:
+            int: The number of files removed
+    """
+    cache_dir = cache_dir_for(pack_path)
+    if not cache_dir.is_dir():
+        return 0
+    removed = 0
+    for path in cache_dir.iterdir():
+        if path.is_file() and not path.name.startswith(".") and path.name not in digests:
+            path.unlink()
+            removed += 1
+    helpers_generic.print_debug(f"  Pruned {removed} cached templates from {cache_dir}")
+    return removed
+
+
+def list_pack_aircraft(pack_path: Path) -> list:
+    with TemplatePack(pack_path) as pack:
+        return pack.aircraft()
+
+
+def load_pack_templates(pack_path: Path, aircraft_name: str) -> list:
+    """
+    Lists an aircraft's templates the same way restore_config.load_templates() does for a folder.
+    Only this aircraft's templates are decompressed into the pack's cache folder (named by hash),
+    so restores and saved plans can use ordinary file paths. A cached file is hashed before it is
+    used and extracted again if it does not match its name.
+
+        Args:
+            pack_path (Path): The template pack
+            aircraft_name (str): The aircraft name
+
+        Returns:
+            list: (cached_path, controller_name, instance_id) tuples sorted by template filename, or None if not in the pack
+    """
+    helpers_generic.print_debug(f"template_pack.load_pack_templates({aircraft_name})")
+
+    cache_dir = cache_dir_for(pack_path)
+    with TemplatePack(pack_path) as pack:
+        templates = pack.templates(aircraft_name)
+        if templates is None:
+            return None
+
+        result = []
+        for _, ctrl_name, instance_id, digest in templates:
+            cached = cache_dir / digest
+            if not cached.exists() or helpers_generic.hash_file(cached) != digest:
+                with helpers_generic.span("read template from pack", "io"):
+                    cache_dir.mkdir(parents=True, exist_ok=True)
+                    # Restore workers share the cache, so each writes its own temporary file
+                    tmp_path = helpers_generic.temp_path_for(cached)
+                    with open(tmp_path, 'wb') as f:
+                        f.write(pack.read_blob(digest))
+                    helpers_generic.publish_temp_file(tmp_path, cached, digest)
+            result.append((cached, ctrl_name, instance_id))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='template_pack', description='Build and inspect packed template libraries.')
+    parser.add_argument('command', choices=['build', 'list'])
+    parser.add_argument('pack', type=str, help='The pack file (e.g. templates.dcspack)')
+    parser.add_argument('--repotemplates', type=str, default=".", help='build: template library to pack')
+    parser.add_argument('--compression', choices=list(COMPRESSION), default="lzma", help='build: member compression')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    pack_path = Path(args.pack)
+    if args.command == "build":
+        root = Path(args.repotemplates)
+        if not root.is_dir():
+            raise SystemExit(f"Error: Template path '{root}' does not exist.")
+        stats = build_pack(root, pack_path, args.compression)
+        print(f"Packed {stats['templates']} templates for {stats['aircraft']} aircraft "
+              f"into {stats['blobs']} blobs ({stats['bytes']} bytes): {pack_path}")
+    else:
+        with TemplatePack(pack_path) as pack:
+            for aircraft_name in pack.aircraft():
+                print(aircraft_name)
+                for name, _, _, digest in pack.templates(aircraft_name):
+                    print(f"  {name}  {digest[:12]}")
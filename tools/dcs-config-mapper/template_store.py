@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+import helpers_generic
+import hardware_map
+
+# Constants
+BLOB_DIRNAME = ".blobs"
+STORE_MANIFEST = "templates.json"
+STORE_VERSION = 1
+
+
+def is_store(template_root: Path) -> bool:
+    """
+    Returns True if the template library uses the content-addressed layout.
+    """
+    return (template_root / BLOB_DIRNAME).is_dir()
+
+
+def blob_path(template_root: Path, digest: str) -> Path:
+    """
+    Returns where a template with the given SHA-256 is stored.
+
+        Args:
+            template_root (Path): The template library
+            digest (str): The template's SHA-256 hex digest
+
+        Returns:
+            Path: <template_root>/.blobs/<first two hex digits>/<digest>
+    """
+    return template_root / BLOB_DIRNAME / digest[:2] / digest
+
+
+def manifest_path(template_root: Path, aircraft_name: str) -> Path:
+    """
+    Returns the location of an aircraft's store manifest.
+    """
+    return template_root / aircraft_name / STORE_MANIFEST
+
+
+def load_aircraft_manifest(template_root: Path, aircraft_name: str) -> dict:
+    """
+    Loads an aircraft's store manifest.
+
+        Args:
+            template_root (Path): The template library
+            aircraft_name (str): The aircraft folder name
+
+        Returns:
+            dict: template filename -> blob digest, or None if the aircraft is not in the store
+    """
+    try:
+        with open(manifest_path(template_root, aircraft_name), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        raise SystemExit(f"Error: Cannot read template manifest for '{aircraft_name}': {e}")
+
+    if data.get("version") != STORE_VERSION:
+        raise SystemExit(f"Error: Unsupported template manifest version for '{aircraft_name}'")
+    return data.get("templates", {})
+
+
+def dump_aircraft_manifest(templates: dict) -> str:
+    """
+    Serializes an aircraft's store manifest (sorted, so unchanged manifests are byte-identical).
+
+        Args:
+            templates (dict): template filename -> blob digest
+
+        Returns:
+            str: The manifest JSON
+    """
+    return json.dumps({"version": STORE_VERSION, "templates": dict(sorted(templates.items()))}, indent=2) + "\n"
+
+
+def list_store_aircraft(template_root: Path) -> list:
+    """
+    Lists the aircraft that have a store manifest.
+    """
+    return sorted(d.name for d in template_root.iterdir() if (d / STORE_MANIFEST).is_file())
+
+
+def load_store_templates(template_root: Path, aircraft_name: str) -> list:
+    """
+    Lists an aircraft's templates the same way restore_config.load_templates() does for a joystick folder,
+    with each template resolved to its blob.
+
+        Args:
+            template_root (Path): The template library
+            aircraft_name (str): The aircraft folder name
+
+        Returns:
+            list: (blob_path, controller_name, instance_id) tuples sorted by template filename, or None if not in the store
+    """
+    manifest = load_aircraft_manifest(template_root, aircraft_name)
+    if manifest is None:
+        return None
+
+    templates = []
+    for name, digest in sorted(manifest.items()):
+        parsed = hardware_map.parse_template_name(name)
+        if not parsed:
+            continue
+        path = blob_path(template_root, digest)
+        if not path.exists():
+            raise SystemExit(f"Error: Template store is missing blob {digest} for {aircraft_name}/{name}")
+        templates.append((path, *parsed))
+    return templates
+
+
+def put_blob(template_root: Path, source: Path, digest: str = None) -> tuple:
+    """
+    Stores a file in the blob store unless an identical blob already exists.
+
+        Args:
+            template_root (Path): The template library
+            source (Path): The template file
+            digest (str): The file's SHA-256 if already known
+
+        Returns:
+            tuple: (digest, whether a new blob was written)
+    """
+    digest = digest or helpers_generic.hash_file(source)
+    target = blob_path(template_root, digest)
+    if target.exists():
+        return digest, False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Copy to a temporary name of our own first so a half-written blob is never mistaken for a complete one,
+    # even when another convert or extract is writing the same blob
+    tmp_path = helpers_generic.temp_path_for(target)
+    shutil.copyfile(source, tmp_path)
+    return digest, helpers_generic.publish_temp_file(tmp_path, target, digest)
+
+
+def referenced_blobs(template_root: Path) -> set:
+    """
+    Returns the digests referenced by any aircraft manifest.
+    """
+    digests = set()
+    for aircraft_name in list_store_aircraft(template_root):
+        digests.update(load_aircraft_manifest(template_root, aircraft_name).values())
+    return digests
+
+
+def _iter_blobs(template_root: Path):
+    blob_root = template_root / BLOB_DIRNAME
+    if not blob_root.is_dir():
+        return
+    with os.scandir(blob_root) as prefixes:
+        for prefix in prefixes:
+            if not prefix.is_dir():
+                continue
+            with os.scandir(prefix.path) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        yield entry
+
+
+def collect_garbage(template_root: Path) -> list:
+    """
+    Removes blobs no aircraft manifest references (honours helpers_generic.NO_ACTION).
+
+        Args:
+            template_root (Path): The template library
+
+        Returns:
+            list: The digests that were (or in a dry run would be) removed
+    """
+    helpers_generic.print_debug(f"template_store.collect_garbage({template_root})")
+
+    referenced = referenced_blobs(template_root)
+    removed = []
+    for entry in _iter_blobs(template_root):
+        if entry.name in referenced:
+            continue
+        removed.append(entry.name)
+        if helpers_generic.NO_ACTION:
+            print(f"  [DRY RUN] Would remove blob {entry.name}")
+        else:
+            os.remove(entry.path)
+    return sorted(removed)
+
+
+def store_stats(template_root: Path) -> dict:
+    """
+    Measures how much the store saves compared with one file per aircraft template.
+
+        Returns:
+            dict: templates, blobs, template_bytes (as separate files) and blob_bytes (as stored)
+    """
+    sizes = {entry.name: entry.stat().st_size for entry in _iter_blobs(template_root)}
+    templates = 0
+    template_bytes = 0
+    for aircraft_name in list_store_aircraft(template_root):
+        for digest in load_aircraft_manifest(template_root, aircraft_name).values():
+            templates += 1
+            template_bytes += sizes.get(digest, 0)
+    return {"templates": templates, "blobs": len(sizes), "template_bytes": template_bytes, "blob_bytes": sum(sizes.values())}
+
+
+def convert_library(template_root: Path, remove_folders: bool = False) -> dict:
+    """
+    Moves every <aircraft>/joystick template folder into the store (honours helpers_generic.NO_ACTION).
+
+        Args:
+            template_root (Path): The template library
+            remove_folders (bool): Delete each joystick folder once its manifest is written
+
+        Returns:
+            dict: Counts of "aircraft", "templates" and "new_blobs"
+    """
+    helpers_generic.print_debug(f"template_store.convert_library({template_root})")
+
+    stats = {"aircraft": 0, "templates": 0, "new_blobs": 0}
+    if not helpers_generic.NO_ACTION:
+        (template_root / BLOB_DIRNAME).mkdir(exist_ok=True)
+
+    aircraft_dirs = sorted(d for d in template_root.iterdir() if (d / "joystick").is_dir())
+
+    for aircraft_dir in aircraft_dirs:
+        templates = load_aircraft_manifest(template_root, aircraft_dir.name) or {}
+        for file in sorted((aircraft_dir / "joystick").glob("*.diff.lua")):
+            if not hardware_map.parse_template_name(file.name):
+                continue
+            if helpers_generic.NO_ACTION:
+                templates[file.name] = helpers_generic.hash_file(file)
+                continue
+            templates[file.name], written = put_blob(template_root, file)
+            stats["new_blobs"] += written
+
+        stats["aircraft"] += 1
+        stats["templates"] += len(templates)
+
+        if helpers_generic.NO_ACTION:
+            print(f"  [DRY RUN] Would store {len(templates)} templates for {aircraft_dir.name}")
+            continue
+
+        manifest_path(template_root, aircraft_dir.name).write_text(dump_aircraft_manifest(templates), encoding="utf-8")
+        if remove_folders:
+            shutil.rmtree(aircraft_dir / "joystick")
+        print(f"  [STORED] {aircraft_dir.name}: {len(templates)} templates")
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='template_store', description='Manage the content-addressed template store.')
+    parser.add_argument('command', choices=['convert', 'gc', 'stats'])
+    parser.add_argument('--repotemplates', type=str, default=".", help='Template library root')
+    parser.add_argument('--removefolders', action='store_true', help='convert: delete the joystick folders once stored')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--noaction', action='store_true', help='Dry run: see what would happen')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+    helpers_generic.NO_ACTION = args.noaction
+
+    root = Path(args.repotemplates)
+    if not root.is_dir():
+        raise SystemExit(f"Error: Template path '{root}' does not exist.")
+
+    if args.command == "convert":
+        stats = convert_library(root, args.removefolders)
+        print(f"Stored {stats['templates']} templates for {stats['aircraft']} aircraft ({stats['new_blobs']} new blobs).")
+    elif args.command == "gc":
+        removed = collect_garbage(root)
+        print(f"Removed {len(removed)} unreferenced blobs.")
+    else:
+        stats = store_stats(root)
+        saved = stats["template_bytes"] - stats["blob_bytes"]
+        print(f"{stats['templates']} templates in {stats['blobs']} blobs: "
+              f"{stats['blob_bytes']} bytes stored, {saved} bytes saved by deduplication.")
@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+import pytest
+
+# The tool's modules are flat scripts, imported by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import extract_template
+import synthetic_dcs
+
+
+@pytest.fixture
+def saved_games(tmp_path):
+    root = tmp_path / "saved_games"
+    synthetic_dcs.generate_saved_games(root, aircraft_count=3, controllers_per_aircraft=3)
+    return root
+
+
+@pytest.fixture
+def library(tmp_path, saved_games):
+    root = tmp_path / "library"
+    root.mkdir()
+    extract_template.extract_all(str(saved_games), root)
+    return root
@@ -0,0 +1,35 @@
+from pathlib import Path
+import pytest
+import difflua
+
+SAMPLE_TEMPLATES = sorted((Path(__file__).resolve().parents[3] / "data" / "templates").glob("*/joystick/*.diff.lua"))
+
+
+@pytest.mark.parametrize("path", SAMPLE_TEMPLATES, ids=lambda path: path.name)
+def test_sample_templates_are_canonical(path):
+    text = path.read_text(encoding="utf-8")
+    assert difflua.dumps(difflua.loads(text)) == text
+
+
+@pytest.mark.parametrize("path", SAMPLE_TEMPLATES, ids=lambda path: path.name)
+def test_dumps_is_stable(path):
+    tree = difflua.load(path)
+    text = difflua.dumps(tree)
+    assert difflua.loads(text) == tree
+    assert difflua.dumps(difflua.loads(text)) == text
+
+
+def test_reformatted_file_parses_to_the_same_tree():
+    text = ('local diff = {\n["keyDiffs"]={["d1"]={["name"]="Fire",["added"]={[1]={["key"]="JOY_BTN1"}}}},\n'
+            '  ["axisDiffs"] = {},\n}\nreturn diff')
+    tree = difflua.loads(text)
+    assert tree == {"keyDiffs": {"d1": {"name": "Fire", "added": {1: {"key": "JOY_BTN1"}}}}, "axisDiffs": {}}
+    assert difflua.loads(difflua.dumps(tree)) == tree
+
+
+def test_scalars_round_trip():
+    tree = {"keyDiffs": {"d1": {"name": 'Say "hi" \\ now\nplease', "added": {1: {"key": "JOY_BTN1", "reformers": {}}}}},
+            "axisDiffs": {"a1": {"changed": {1: {"filter": {"curvature": {1: 0.25}, "deadzone": 0, "invert": False}}}}}}
+    text = difflua.dumps(tree)
+    assert difflua.loads(text) == tree
+    assert difflua.dumps(difflua.loads(text)) == text
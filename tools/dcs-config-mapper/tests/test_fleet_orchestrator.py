@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+import fleet_orchestrator
+
+
+class StubTransport:
+    """
+    Runs tasks in-process: each (host, task) sleeps for a scripted time, then exits with a scripted code.
+    Attempts are scripted in order, so [1, 0] fails once and then succeeds.
+    """
+
+    def __init__(self, seconds: float = 0.01, codes: dict = None, delays: dict = None):
+        self.seconds = seconds
+        self.codes = codes or {}
+        self.delays = delays or {}
+        self.attempts = {}
+        self.running = {}
+        self.max_running = {}
+
+    async def run(self, hostname, task, options, on_line, timeout):
+        key = (hostname, task)
+        attempt = self.attempts.get(key, 0)
+        self.attempts[key] = attempt + 1
+        self.running[task] = self.running.get(task, 0) + 1
+        self.max_running[task] = max(self.max_running.get(task, 0), self.running[task])
+        try:
+            on_line(f"{task} on {hostname}, attempt {attempt + 1}")
+            await asyncio.wait_for(asyncio.sleep(self.delays.get(key, self.seconds)), timeout)
+            codes = self.codes.get(key, [0])
+            return codes[min(attempt, len(codes) - 1)]
+        finally:
+            self.running[task] -= 1
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(fleet_orchestrator, "RETRY_BACKOFF", 0.0)
+
+
+def _orchestrate(transport, hostnames, tasks, **kwargs):
+    return asyncio.run(fleet_orchestrator.orchestrate(transport, hostnames, tasks, {}, **kwargs))
+
+
+def test_tasks_run_in_order_on_every_host():
+    events = []
+    results = _orchestrate(StubTransport(), ["a", "b"], ["fingerprint", "restore"],
+                           on_event=lambda hostname, kind, detail: events.append((hostname, kind)))
+
+    assert all(host["ok"] for host in results.values())
+    assert [r["task"] for r in results["a"]["tasks"]] == ["fingerprint", "restore"]
+    assert ("a", "done") in events and ("b", "done") in events
+
+
+def test_failed_task_is_retried():
+    transport = StubTransport(codes={("a", "fingerprint"): [1, 0]})
+    results = _orchestrate(transport, ["a"], ["fingerprint"], retries=1)
+
+    assert results["a"]["ok"]
+    assert results["a"]["tasks"][0]["attempts"] == 2
+
+
+def test_host_stops_at_first_failure():
+    transport = StubTransport(codes={("a", "fingerprint"): [3]})
+    results = _orchestrate(transport, ["a", "b"], ["fingerprint", "restore"], retries=1)
+
+    assert not results["a"]["ok"]
+    assert results["a"]["tasks"] == [results["a"]["tasks"][0]]
+    assert results["a"]["tasks"][0]["error"] == "exit code 3"
+    assert results["a"]["tasks"][0]["attempts"] == 2
+    assert "a, attempt 2" in results["a"]["tasks"][0]["tail"][-1]
+    assert results["b"]["ok"]
+    assert ("a", "restore") not in transport.attempts
+
+
+def test_timeout_is_retried_then_reported():
+    transport = StubTransport(delays={("a", "fingerprint"): 5.0})
+    results = _orchestrate(transport, ["a", "b"], ["fingerprint"], timeout=0.05, retries=1)
+
+    task = results["a"]["tasks"][0]
+    assert not task["ok"]
+    assert task["error"] == "timed out after 0.05s"
+    assert task["attempts"] == 2
+    assert results["b"]["ok"]
+
+
+def test_task_limits_serialize_extract_across_hosts():
+    hostnames = [f"host{i}" for i in range(6)]
+    # Restores outlast an extract, so unlimited restores overlap while extracts queue
+    transport = StubTransport(seconds=0.02, delays={(hostname, "restore"): 0.2 for hostname in hostnames})
+    results = _orchestrate(transport, hostnames, ["fingerprint", "extract", "restore"])
+
+    assert all(host["ok"] for host in results.values())
+    assert transport.max_running["extract"] == fleet_orchestrator.TASK_LIMITS["extract"]
+    assert transport.max_running["fingerprint"] == len(hostnames)
+    assert transport.max_running["restore"] > 1
+
+
+def test_concurrency_limits_hosts():
+    transport = StubTransport()
+    _orchestrate(transport, [f"host{i}" for i in range(6)], ["fingerprint"], concurrency=2)
+
+    assert transport.max_running["fingerprint"] == 2
+
+
+def test_summary_sums_task_time_not_queue_time(capsys):
+    results = {
+        "a": {"ok": True, "seconds": 1.0, "tasks": [{"task": "extract", "seconds": 1.0}]},
+        "b": {"ok": True, "seconds": 9.0, "tasks": [{"task": "extract", "seconds": 1.5}]},
+    }
+    fleet_orchestrator.print_rollout_summary(results, 2.5)
+
+    assert "slowest host b 1.5s, 2.5s if run one at a time" in capsys.readouterr().out
+
+
+def test_subprocess_transport_is_abstract():
+    with pytest.raises(TypeError):
+        fleet_orchestrator.SubprocessTransport()
@@ -0,0 +1,49 @@
+import shutil
+from pathlib import Path
+import pytest
+import fprint_db
+import restore_config
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+MACHINE_GUID = "e8324982-e5b3-465f-a5be-uas123456789"
+
+
+@pytest.fixture
+def fprint_dir(tmp_path):
+    # The sample fingerprints are the same machine under its old (D33F3C1D-5BE3-4) and current (uas-sim1) hostname
+    root = tmp_path / "fingerprints"
+    root.mkdir()
+    for path in (REPO_ROOT / "data" / "fingerprints").glob("*.json"):
+        shutil.copy2(path, root / path.name)
+    return root
+
+
+@pytest.fixture
+def conn(fprint_dir):
+    conn = fprint_db.open_store(fprint_dir)
+    yield conn
+    conn.close()
+
+
+def test_list_hosts_lists_each_machine_once(conn):
+    assert fprint_db.list_hosts(conn) == [("uas-sim1", MACHINE_GUID, "2026-02-06T23:10:29+00:00")]
+
+
+def test_every_hostname_still_resolves_to_the_machine(conn):
+    for hostname in ("uas-sim1", "D33F3C1D-5BE3-4"):
+        record = fprint_db.find_by_hostname(conn, hostname)
+        assert record["machine_guid"] == MACHINE_GUID
+        assert record["hostname"] == "uas-sim1"
+
+
+def test_controller_queries_return_one_row_per_machine(conn):
+    assert fprint_db.hosts_with_controller(conn, "Throttle - HOTAS Warthog") == [
+        ("uas-sim1", MACHINE_GUID, 1, "{86FEB590-E9EB-11ee-8008-444553540000}")]
+    assert fprint_db.hosts_with_dcs_guid(conn, "{86FE4060-E9EB-11ee-8001-444553540000}") == [
+        ("uas-sim1", MACHINE_GUID, "T-Rudder", 1)]
+
+
+def test_plan_fleet_all_plans_each_machine_once(fprint_dir, tmp_path):
+    plans = restore_config.plan_fleet(["all"], ["F-15C"], fprint_dir, REPO_ROOT / "data" / "templates",
+                                      tmp_path / "hosts", max_workers=1)
+    assert [plan.name for plan in plans] == ["uas-sim1/F-15C"]
@@ -0,0 +1,125 @@
+import shutil
+import subprocess
+import pytest
+import library_sync
+
+
+@pytest.fixture
+def target(tmp_path):
+    root = tmp_path / "target"
+    root.mkdir()
+    return root
+
+
+def _counts(report: dict) -> dict:
+    return {key: len(report[key]) for key in library_sync.SYNC_KEYS}
+
+
+def _template(root, aircraft="Aircraft-001", controller="Alpha Flight Controls"):
+    return root / aircraft / "joystick" / f"{controller} {{__GUID__}}_1.diff.lua"
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   check=True, capture_output=True)
+
+
+def test_directory_mirror_added_changed_removed(library, target, saved_games):
+    report = library_sync.sync_library(library, target, str(saved_games))
+    assert _counts(report) == {"added": 9, "changed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+    assert _template(target).read_bytes() == _template(library).read_bytes()
+
+    with open(_template(library), "a", encoding="utf-8") as f:
+        f.write("\n-- edited in the library\n")
+    _template(library, "Aircraft-002").unlink()
+
+    report = library_sync.sync_library(library, target, str(saved_games))
+    assert _counts(report) == {"added": 0, "changed": 1, "unchanged": 7, "removed": 1, "failed": 0}
+    assert _template(target).read_bytes() == _template(library).read_bytes()
+    assert not _template(target, "Aircraft-002").exists()
+
+
+def test_directory_mirror_rerun_transfers_nothing(library, target, saved_games):
+    library_sync.sync_library(library, target, str(saved_games))
+    mtimes = {path: path.stat().st_mtime_ns for path in target.rglob("*.diff.lua")}
+
+    report = library_sync.sync_library(library, target, str(saved_games))
+    assert _counts(report) == {"added": 0, "changed": 0, "unchanged": 9, "removed": 0, "failed": 0}
+    assert {path: path.stat().st_mtime_ns for path in target.rglob("*.diff.lua")} == mtimes
+
+
+def test_files_not_placed_by_sync_are_kept(library, target, saved_games):
+    own = target / "Aircraft-000" / "joystick" / "Local Controller {__GUID__}_1.diff.lua"
+    own.parent.mkdir(parents=True)
+    own.write_text("local diff = {}\nreturn diff", encoding="utf-8")
+
+    library_sync.sync_library(library, target, str(saved_games))
+    library_sync.sync_library(library, target, str(saved_games))
+    assert own.exists()
+
+
+@pytest.fixture
+def bare_mirror(tmp_path, library):
+    if shutil.which("git") is None:
+        pytest.skip("git is not installed")
+    work = tmp_path / "work"
+    shutil.copytree(library, work / library_sync.TEMPLATES_PREFIX)
+    _git(tmp_path, "init", "-q", str(work))
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "-m", "library")
+    bare = tmp_path / "mirror.git"
+    _git(tmp_path, "clone", "-q", "--bare", str(work), str(bare))
+    return work, bare
+
+
+def _push(work, bare, message):
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "-m", message)
+    _git(work, "push", "-q", str(bare), "HEAD")
+
+
+def test_git_mirror_added_changed_removed(bare_mirror, target, saved_games):
+    work, bare = bare_mirror
+    templates = work / library_sync.TEMPLATES_PREFIX
+
+    report = library_sync.sync_library(bare, target, str(saved_games))
+    assert _counts(report) == {"added": 9, "changed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+    assert _template(target).read_bytes() == _template(templates).read_bytes()
+
+    with open(_template(templates), "a", encoding="utf-8") as f:
+        f.write("\n-- edited in the library\n")
+    _template(templates, "Aircraft-002").unlink()
+    _push(work, bare, "edit")
+
+    report = library_sync.sync_library(bare, target, str(saved_games))
+    assert _counts(report) == {"added": 0, "changed": 1, "unchanged": 7, "removed": 1, "failed": 0}
+    assert _template(target).read_bytes() == _template(templates).read_bytes()
+    assert not _template(target, "Aircraft-002").exists()
+
+
+def test_git_mirror_rerun_reads_no_blobs(bare_mirror, target, saved_games, monkeypatch):
+    _, bare = bare_mirror
+    library_sync.sync_library(bare, target, str(saved_games))
+
+    calls = []
+    original = library_sync.GitMirror._git
+
+    def recording_git(self, *args):
+        calls.append(args[0])
+        return original(self, *args)
+
+    monkeypatch.setattr(library_sync.GitMirror, "_git", recording_git)
+    report = library_sync.sync_library(bare, target, str(saved_games))
+    assert _counts(report) == {"added": 0, "changed": 0, "unchanged": 9, "removed": 0, "failed": 0}
+    assert "cat-file" not in calls
+
+
+def test_git_mirror_reports_non_utf8_template(bare_mirror, target, saved_games):
+    work, bare = bare_mirror
+    templates = work / library_sync.TEMPLATES_PREFIX
+    _template(templates).write_bytes(b"-- caf\xe9\nlocal diff = {}\nreturn diff")
+    _push(work, bare, "latin-1 template")
+
+    report = library_sync.sync_library(bare, target, str(saved_games))
+    assert _counts(report) == {"added": 8, "changed": 0, "unchanged": 0, "removed": 0, "failed": 1}
+    assert not _template(target).exists()
@@ -0,0 +1,98 @@
+import copy
+import pytest
+import difflua
+import merge_bindings
+
+
+def _binding(key: str) -> dict:
+    return {"added": {1: {"key": key}}}
+
+
+@pytest.fixture
+def base():
+    return {
+        "keyDiffs": {
+            "d1": {"name": "Weapon Release", **_binding("JOY_BTN1")},
+            "d2": {"name": "Trim Up", **_binding("JOY_BTN_POV1_U")},
+        },
+        "axisDiffs": {
+            "a1": {"name": "Pitch", **_binding("JOY_Y")},
+        },
+    }
+
+
+def test_one_sided_changes_merge_without_conflicts(base):
+    template = copy.deepcopy(base)
+    template["keyDiffs"]["d2"] = {"name": "Trim Up", **_binding("JOY_BTN5")}
+    live = copy.deepcopy(base)
+    live["axisDiffs"]["a1"] = {"name": "Pitch", **_binding("JOY_Z")}
+    live["keyDiffs"]["d3"] = {"name": "Gear", **_binding("JOY_BTN9")}
+
+    merged, conflicts = merge_bindings.merge_diffs(template, base, live)
+    assert conflicts == []
+    assert merged["keyDiffs"]["d2"] == template["keyDiffs"]["d2"]
+    assert merged["axisDiffs"]["a1"] == live["axisDiffs"]["a1"]
+    assert merged["keyDiffs"]["d3"] == live["keyDiffs"]["d3"]
+
+
+@pytest.mark.parametrize("prefer", ["template", "live"])
+def test_conflicting_binding_is_resolved_by_prefer(base, prefer):
+    template = copy.deepcopy(base)
+    template["keyDiffs"]["d1"] = {"name": "Weapon Release", **_binding("JOY_BTN2")}
+    live = copy.deepcopy(base)
+    live["keyDiffs"]["d1"] = {"name": "Weapon Release", **_binding("JOY_BTN3")}
+
+    merged, conflicts = merge_bindings.merge_diffs(template, base, live, prefer)
+    assert conflicts == [("keyDiffs", "d1", "Weapon Release")]
+    winner = template if prefer == "template" else live
+    assert merged["keyDiffs"]["d1"] == winner["keyDiffs"]["d1"]
+    assert merged["keyDiffs"]["d2"] == base["keyDiffs"]["d2"]
+
+
+@pytest.mark.parametrize("prefer", ["template", "live"])
+def test_removed_on_one_side_changed_on_the_other_is_a_conflict(base, prefer):
+    template = copy.deepcopy(base)
+    del template["keyDiffs"]["d1"]
+    live = copy.deepcopy(base)
+    live["keyDiffs"]["d1"] = {"name": "Weapon Release", **_binding("JOY_BTN3")}
+
+    merged, conflicts = merge_bindings.merge_diffs(template, base, live, prefer)
+    assert conflicts == [("keyDiffs", "d1", "Weapon Release")]
+    assert ("d1" in merged["keyDiffs"]) == (prefer == "live")
+
+
+def test_merge_file_uses_the_stored_base(tmp_path, base):
+    target = tmp_path / "F-15C" / "joystick" / "Stick {GUID}.diff.lua"
+    target.parent.mkdir(parents=True)
+    base_file = merge_bindings.base_path_for(target)
+    base_file.parent.mkdir()
+    difflua.dump(base, base_file)
+
+    template = copy.deepcopy(base)
+    template["keyDiffs"]["d2"] = {"name": "Trim Up", **_binding("JOY_BTN5")}
+    template_file = tmp_path / "template.diff.lua"
+    difflua.dump(template, template_file)
+
+    live = copy.deepcopy(base)
+    live["keyDiffs"]["d1"] = {"name": "Weapon Release", **_binding("JOY_BTN3")}
+    difflua.dump(live, target)
+
+    text, changed, conflicts = merge_bindings.merge_file(template_file, target)
+    assert changed and conflicts == []
+    merged = difflua.loads(text)
+    assert merged["keyDiffs"]["d1"] == live["keyDiffs"]["d1"]
+    assert merged["keyDiffs"]["d2"] == template["keyDiffs"]["d2"]
+    assert text == difflua.dumps(merged)
+
+
+def test_merge_file_leaves_a_merged_file_alone(tmp_path, base):
+    target = tmp_path / "F-15C" / "joystick" / "Stick {GUID}.diff.lua"
+    target.parent.mkdir(parents=True)
+    template_file = tmp_path / "template.diff.lua"
+    difflua.dump(base, template_file)
+    # Same bindings, different formatting
+    target.write_text(difflua.dumps(base).replace("\t", "    "), encoding="utf-8")
+
+    text, changed, conflicts = merge_bindings.merge_file(template_file, target)
+    assert not changed and conflicts == []
+    assert text == target.read_text(encoding="utf-8")
@@ -0,0 +1,125 @@
+import os
+from pathlib import Path
+import pytest
+import hardware_map
+import plan
+import restore_config
+import snapshot_store
+
+AIRCRAFT = "Aircraft-001"
+
+
+@pytest.fixture
+def templates(library):
+    return restore_config.load_templates(library, AIRCRAFT)
+
+
+@pytest.fixture
+def hw_map(templates):
+    # A different machine: the same controllers under new GUIDs
+    controllers = [{"controller_name": ctrl_name, "instance_id": instance_id,
+                    "dcs_guid": f"{{00000000-0000-0000-0000-{number:012d}}}"}
+                   for number, (_, ctrl_name, instance_id) in enumerate(templates, start=1)]
+    return hardware_map.HardwareMap.from_fingerprint({"machine_guid": "host-guid", "hostname": "host", "controllers": controllers})
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    return tmp_path / "host" / "Config" / "Input"
+
+
+def _output_dir(input_path):
+    return input_path / AIRCRAFT / "joystick"
+
+
+def _live_files(input_path) -> dict:
+    return {path.name: path.read_bytes() for path in _output_dir(input_path).glob("*.diff.lua")}
+
+
+def _restore(templates, hw_map, input_path) -> dict:
+    return restore_config.apply_templates(templates, hw_map, _output_dir(input_path))
+
+
+def _seed_live_files(templates, hw_map, input_path) -> dict:
+    """
+    Writes a locally edited config for every template, as if the host had been flown and rebound.
+    """
+    _output_dir(input_path).mkdir(parents=True)
+    for number, (_, ctrl_name, instance_id) in enumerate(templates):
+        target = _output_dir(input_path) / hardware_map.config_name(ctrl_name, hw_map.guid_for(ctrl_name, instance_id))
+        target.write_bytes(f"local diff = {{}}\n-- local edit {number}\nreturn diff".encode("utf-8"))
+    return _live_files(input_path)
+
+
+def _expected_files(templates, hw_map) -> dict:
+    return {hardware_map.config_name(ctrl_name, hw_map.guid_for(ctrl_name, instance_id)): t_file.read_bytes()
+            for t_file, ctrl_name, instance_id in templates}
+
+
+def _rollback(input_path, ref="latest"):
+    root = snapshot_store.snapshot_root(input_path)
+    plan.execute_plans([snapshot_store.plan_rollback(input_path, snapshot_store.resolve_snapshot(root, ref))])
+
+
+def test_restore_onto_a_fresh_host_and_roll_back(templates, hw_map, input_path):
+    report = _restore(templates, hw_map, input_path)
+    assert len(report["restored"]) == len(templates)
+    assert _live_files(input_path) == _expected_files(templates, hw_map)
+
+    _rollback(input_path)
+    assert _live_files(input_path) == {}
+
+
+def test_restore_backs_up_and_rollback_puts_back_byte_for_byte(templates, hw_map, input_path):
+    before = _seed_live_files(templates, hw_map, input_path)
+
+    report = _restore(templates, hw_map, input_path)
+    assert len(report["backed_up"]) == len(templates)
+    assert _live_files(input_path) == _expected_files(templates, hw_map)
+
+    _rollback(input_path)
+    assert _live_files(input_path) == before
+
+    # The rollback took its own snapshot, so it can be undone too
+    _rollback(input_path)
+    assert _live_files(input_path) == _expected_files(templates, hw_map)
+
+
+def test_rerun_restore_changes_nothing(templates, hw_map, input_path):
+    _restore(templates, hw_map, input_path)
+    root = snapshot_store.snapshot_root(input_path)
+    snapshots = snapshot_store.list_snapshots(root)
+
+    report = _restore(templates, hw_map, input_path)
+    assert len(report["unchanged"]) == len(templates)
+    assert snapshot_store.list_snapshots(root) == snapshots
+
+
+def test_live_file_changed_after_planning_is_not_overwritten(templates, hw_map, input_path):
+    _seed_live_files(templates, hw_map, input_path)
+    p = restore_config.plan_templates(templates, hw_map, _output_dir(input_path))
+
+    backup = next(op for op in p.operations if op.kind == "backup")
+    live = Path(backup.source)
+    with open(live, "a", encoding="utf-8") as f:
+        f.write("\n-- edited after planning")
+    edited = live.read_bytes()
+
+    with pytest.raises(SystemExit, match="changed since the plan was made"):
+        plan.execute_plans([p], max_workers=1)
+    assert live.read_bytes() == edited
+    assert not Path(backup.target).exists()
+
+
+def test_write_does_not_change_a_hard_linked_template(tmp_path, templates):
+    t_file = templates[0][0]
+    original = t_file.read_bytes()
+    target = tmp_path / "live.diff.lua"
+    os.link(t_file, target)
+
+    p = plan.Plan("write")
+    p.add("write", target, content="local diff = {}\nreturn diff")
+    plan.execute_plans([p])
+
+    assert target.read_text(encoding="utf-8") == "local diff = {}\nreturn diff"
+    assert t_file.read_bytes() == original
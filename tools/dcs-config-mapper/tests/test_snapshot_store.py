@@ -0,0 +1,40 @@
+import json
+import snapshot_store
+
+
+def _write_manifest(root, snapshot_id, aircraft):
+    path = snapshot_store.manifest_path(root, snapshot_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"version": snapshot_store.SNAPSHOT_VERSION, "id": snapshot_id,
+                                "created": "2026-10-17T03:14:00+00:00", "aircraft": aircraft, "files": {}}),
+                    encoding="utf-8")
+
+
+def test_same_second_snapshots_sort_by_counter(tmp_path):
+    ids = ["20261017T031400Z_F-15C"] + [f"20261017T031400Z_F-15C-{count}" for count in range(2, 12)]
+    for snapshot_id in reversed(ids):
+        _write_manifest(tmp_path, snapshot_id, "F-15C")
+    _write_manifest(tmp_path, "20261017T031359Z_F-15C-12", "F-15C")
+
+    assert [s["id"] for s in snapshot_store.list_snapshots(tmp_path)] == ["20261017T031359Z_F-15C-12"] + ids
+    assert snapshot_store.resolve_snapshot(tmp_path, "latest") == "20261017T031400Z_F-15C-11"
+
+
+def test_aircraft_names_ending_in_a_number(tmp_path):
+    _write_manifest(tmp_path, "20261017T031400Z_Aircraft-010", "Aircraft-010")
+    _write_manifest(tmp_path, "20261017T031400Z_Aircraft-002", "Aircraft-002")
+    _write_manifest(tmp_path, "20261017T031400Z_Aircraft-002-2", "Aircraft-002")
+
+    snapshots = snapshot_store.list_snapshots(tmp_path)
+    assert [s["id"] for s in snapshots if s["aircraft"] == "Aircraft-002"] == [
+        "20261017T031400Z_Aircraft-002", "20261017T031400Z_Aircraft-002-2"]
+
+
+def test_prune_keeps_the_newest(tmp_path):
+    ids = ["20261017T031400Z_F-15C"] + [f"20261017T031400Z_F-15C-{count}" for count in range(2, 12)]
+    for snapshot_id in ids:
+        _write_manifest(tmp_path, snapshot_id, "F-15C")
+
+    removed, _ = snapshot_store.prune_snapshots(tmp_path, keep=2)
+    assert removed == ids[:-2]
+    assert [s["id"] for s in snapshot_store.list_snapshots(tmp_path)] == ids[-2:]
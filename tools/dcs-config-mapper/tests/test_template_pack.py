@@ -0,0 +1,63 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import helpers_generic
+import template_pack
+
+
+@pytest.fixture
+def pack(tmp_path, library):
+    pack_path = tmp_path / "templates.dcspack"
+    template_pack.build_pack(library, pack_path)
+    return pack_path
+
+
+def test_concurrent_loads_share_the_cache(pack, library):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: template_pack.load_pack_templates(pack, "Aircraft-001"), range(16)))
+
+    assert all(result == results[0] for result in results)
+    for cached, ctrl_name, instance_id in results[0]:
+        source = library / "Aircraft-001" / "joystick" / f"{ctrl_name} {{__GUID__}}_{instance_id}.diff.lua"
+        assert cached.read_bytes() == source.read_bytes()
+    assert not list(template_pack.cache_dir_for(pack).glob(".*.tmp"))
+
+
+def test_corrupt_cache_entry_is_extracted_again(pack):
+    cached, _, _ = template_pack.load_pack_templates(pack, "Aircraft-001")[0]
+    good = cached.read_bytes()
+    cached.write_bytes(b"corrupt")
+
+    template_pack.load_pack_templates(pack, "Aircraft-001")
+    assert cached.read_bytes() == good
+
+
+def test_lost_publish_race_with_identical_target_is_success(tmp_path, monkeypatch):
+    target = tmp_path / "blob"
+    target.write_bytes(b"same")
+    temp = helpers_generic.temp_path_for(target)
+    with open(temp, 'wb') as f:
+        f.write(b"same")
+
+    def busy_replace(source, destination):
+        raise PermissionError("file is open")
+
+    monkeypatch.setattr(os, "replace", busy_replace)
+    assert helpers_generic.publish_temp_file(temp, target, helpers_generic.hash_file(target)) is False
+    assert not os.path.exists(temp)
+
+
+def test_lost_publish_race_with_different_target_raises(tmp_path, monkeypatch):
+    target = tmp_path / "blob"
+    target.write_bytes(b"other")
+    temp = helpers_generic.temp_path_for(target)
+    with open(temp, 'wb') as f:
+        f.write(b"same")
+    digest = helpers_generic.hash_file(temp)
+
+    def busy_replace(source, destination):
+        raise PermissionError("file is open")
+
+    monkeypatch.setattr(os, "replace", busy_replace)
+    with pytest.raises(PermissionError):
+        helpers_generic.publish_temp_file(temp, target, digest)
@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+import template_store
+
+
+def test_concurrent_writers_of_one_blob(tmp_path, library):
+    source = next(library.glob("*/joystick/*.diff.lua"))
+    store = tmp_path / "store"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: template_store.put_blob(store, source), range(16)))
+
+    digest = results[0][0]
+    assert {result[0] for result in results} == {digest}
+    assert template_store.blob_path(store, digest).read_bytes() == source.read_bytes()
+    assert not list(template_store.blob_path(store, digest).parent.glob(".*.tmp"))
+
+
+def test_existing_blob_is_not_rewritten(tmp_path, library):
+    source = next(library.glob("*/joystick/*.diff.lua"))
+    store = tmp_path / "store"
+
+    digest, written = template_store.put_blob(store, source)
+    assert written
+    assert template_store.put_blob(store, source) == (digest, False)
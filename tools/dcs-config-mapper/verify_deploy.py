@@ -1,23 +1,43 @@
+import argparse
+import json
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import helpers_generic
+
+# Constants
+TOOL_DIR = Path(__file__).resolve().parent
+REPO_ROOT = TOOL_DIR.parent.parent
+DEPLOY_MANIFEST = "deploy_manifest.json"
+DEPLOY_MANIFEST_VERSION = 1
+STAT_CACHE = ".deploy_hashes.json"
+
+# What the manifest covers, relative to the repo root
+MANIFEST_ROOTS = ("tools/dcs-config-mapper", "data")
+
+# Never part of a deployment (caches, build output and the manifest itself)
+SKIP_DIRS = {"__pycache__"}
+SKIP_SUFFIXES = (".pyc", ".tmp", "_trace.json")
+
 
 def check_files():
     essential_files = [
-        'fprintdcs.py', 'extract_template.py', 'restore_config.py', 
+        'fprintdcs.py', 'extract_template.py', 'restore_config.py',
         'helpers_dcs.py', 'helpers_generic.py', 'requirements.txt', 'version.txt'
     ]
     print("--- 📦 Checking Files ---")
     for f in essential_files:
-        if os.path.exists(f):
+        if (TOOL_DIR / f).exists():
             print(f"✅ {f} found.")
         else:
             print(f"❌ {f} MISSING!")
 
 def check_version():
-    if os.path.exists('version.txt'):
+    if (TOOL_DIR / 'version.txt').exists():
         print("\n--- 📝 Build Info ---")
-        with open('version.txt', 'r') as f:
+        with open(TOOL_DIR / 'version.txt', 'r') as f:
             print(f.read().strip())
 
 def check_dependencies():
@@ -30,8 +50,160 @@ def check_dependencies():
         print("⚠️  Dependency conflict or missing packages detected.")
         print("Run: pip install -r requirements.txt")
 
+
+def list_deployed_files(repo_root: Path = REPO_ROOT) -> dict:
+    """
+    Lists the files a deployment is made of, skipping dot files and folders (caches, git) and build output.
+
+        Args:
+            repo_root (Path): The repository root
+
+        Returns:
+            dict: repo-relative POSIX path -> os.stat_result
+    """
+    files = {}
+    for root in MANIFEST_ROOTS:
+        for dir_path, dir_names, file_names in os.walk(repo_root / root):
+            dir_names[:] = [d for d in dir_names if not d.startswith(".") and d not in SKIP_DIRS]
+            for name in file_names:
+                if name.startswith(".") or name.endswith(SKIP_SUFFIXES) or name == DEPLOY_MANIFEST:
+                    continue
+                path = os.path.join(dir_path, name)
+                files[Path(path).relative_to(repo_root).as_posix()] = os.stat(path)
+    return files
+
+
+def _load_stat_cache(cache_path: Path) -> dict:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == DEPLOY_MANIFEST_VERSION and isinstance(data.get("files"), dict):
+            return data["files"]
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return {}
+
+
+def hash_deployed_files(files: dict, repo_root: Path = REPO_ROOT, max_workers: int = 8) -> dict:
+    """
+    Hashes the deployed files on a thread pool.
+    Files whose size and mtime match the stat cache (.deploy_hashes.json) are not read again.
+
+        Args:
+            files (dict): The files returned by list_deployed_files()
+            repo_root (Path): The repository root
+            max_workers (int): Maximum files hashed concurrently
+
+        Returns:
+            dict: repo-relative path -> {"sha256", "size"}
+    """
+    helpers_generic.print_debug(f"verify_deploy.hash_deployed_files({len(files)} files)")
+
+    cache_path = TOOL_DIR / STAT_CACHE
+    cache = _load_stat_cache(cache_path)
+    hashes = {}
+    stale = []
+
+    for name, st in files.items():
+        entry = cache.get(name)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            hashes[name] = entry["sha256"]
+        else:
+            stale.append(name)
+
+    with helpers_generic.span("hash deployed files", "io", files=len(stale)), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for name, digest in zip(stale, pool.map(lambda name: helpers_generic.hash_file(repo_root / name), stale)):
+            hashes[name] = digest
+
+    new_cache = {name: {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": hashes[name]} for name, st in sorted(files.items())}
+    if new_cache != cache:
+        # The cache is only an optimization, so a read-only deployment is not an error
+        try:
+            tmp_path = cache_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"version": DEPLOY_MANIFEST_VERSION, "files": new_cache}), encoding="utf-8")
+            tmp_path.replace(cache_path)
+        except OSError as e:
+            helpers_generic.print_debug(f"  Could not write stat cache {cache_path}: {e}")
+
+    return {name: {"sha256": hashes[name], "size": files[name].st_size} for name in sorted(files)}
+
+
+def generate_manifest(max_workers: int = 8) -> int:
+    """
+    Writes deploy_manifest.json next to version.txt. Run it as part of the build that writes version.txt.
+
+        Returns:
+            int: The number of files in the manifest
+    """
+    manifest = hash_deployed_files(list_deployed_files(), max_workers=max_workers)
+    data = {"version": DEPLOY_MANIFEST_VERSION, "roots": list(MANIFEST_ROOTS), "files": manifest}
+    (TOOL_DIR / DEPLOY_MANIFEST).write_text(json.dumps(data, indent=1) + "\n", encoding="utf-8")
+    return len(manifest)
+
+
+def verify_manifest(max_workers: int = 8) -> dict:
+    """
+    Compares the deployed files with deploy_manifest.json.
+
+        Returns:
+            dict: Sorted lists of paths under "modified", "missing" and "extra", or None if there is no manifest
+    """
+    try:
+        with open(TOOL_DIR / DEPLOY_MANIFEST, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        raise SystemExit(f"Error: Cannot read {DEPLOY_MANIFEST}: {e}")
+    if data.get("version") != DEPLOY_MANIFEST_VERSION:
+        raise SystemExit(f"Error: Unsupported {DEPLOY_MANIFEST} version")
+
+    expected = data["files"]
+    actual = hash_deployed_files(list_deployed_files(), max_workers=max_workers)
+    return {
+        "modified": sorted(name for name in expected.keys() & actual.keys() if expected[name]["sha256"] != actual[name]["sha256"]),
+        "missing": sorted(expected.keys() - actual.keys()),
+        "extra": sorted(actual.keys() - expected.keys()),
+    }
+
+
+def check_integrity(max_workers: int = 8) -> bool:
+    print("\n--- 🔒 Checking Integrity ---")
+    result = verify_manifest(max_workers)
+    if result is None:
+        print(f"⚠️  No {DEPLOY_MANIFEST} found; generate it with: python verify_deploy.py --generate")
+        return True
+
+    for key, icon in (("modified", "❌"), ("missing", "❌"), ("extra", "⚠️ ")):
+        for name in result[key]:
+            print(f"{icon} {key.upper()}: {name}")
+
+    if result["modified"] or result["missing"]:
+        print(f"❌ {len(result['modified'])} modified, {len(result['missing'])} missing, {len(result['extra'])} extra files.")
+        return False
+    print(f"✅ All files match the manifest ({len(result['extra'])} extra).")
+    return True
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='verify_deploy', description='Verify a deployment of the tool and template library.')
+    parser.add_argument('--generate', action='store_true', help=f'Write {DEPLOY_MANIFEST} for the current tree (build step)')
+    parser.add_argument('--pipcheck', action='store_true', help='Also run pip check (slow)')
+    parser.add_argument('--workers', type=int, default=8, help='Maximum files hashed concurrently')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
+    args = parser.parse_args()
+    helpers_generic.DEBUG = args.debug
+
+    if args.generate:
+        count = generate_manifest(args.workers)
+        print(f"Wrote {DEPLOY_MANIFEST} with {count} files.")
+        raise SystemExit(0)
+
     check_files()
     check_version()
-    check_dependencies()
-    print("\nVerification Complete.")
\ No newline at end of file
+    intact = check_integrity(args.workers)
+    if args.pipcheck:
+        check_dependencies()
+    print("\nVerification Complete.")
+    if not intact:
+        raise SystemExit(1)